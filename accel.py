@@ -0,0 +1,21 @@
+"""
+Optional Numba acceleration.
+Kernels are written as plain Python over NumPy arrays; when numba is installed
+they are compiled with @njit, otherwise they run as-is.
+"""
+
+try:
+    from numba import njit as _numba_njit
+    HAVE_NUMBA = True
+except ImportError:
+    _numba_njit = None
+    HAVE_NUMBA = False
+
+
+def njit(*args, **kwargs):
+    """numba.njit when available, identity decorator otherwise"""
+    if HAVE_NUMBA:
+        return _numba_njit(*args, **kwargs)
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda func: func
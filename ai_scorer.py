@@ -0,0 +1,245 @@
+"""
+V8.0 AI SCORING LAYER
+Wraps the Cerebras call used by LiveBotV8.get_ai_score with:
+  - an LRU/TTL cache keyed on the normalized setup, so a forming bar is not
+    re-scored on every poll
+  - batching: setups from several symbols go out in one request
+  - a hard latency budget; a late or failed call scores UNAVAILABLE_SCORE, so
+    the setup is rejected rather than traded on a made-up score
+  - latency / hit-rate metrics
+Point CEREBRAS_BASE_URL at ai_stub_server.py to run without the real API.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from metrics import REGISTRY
+
+MODEL = "llama-3.3-70b"
+CACHE_TTL = 300          # seconds; longer than one 5m bar is of no use
+CACHE_SIZE = 1024
+DEADLINE = 3.0           # seconds before the setup is scored as unavailable
+BATCH_WINDOW = 0.05      # seconds to wait for other symbols' setups
+MAX_BATCH = 8
+UNAVAILABLE_SCORE = 0.0  # below any strategy's min_ai_score
+
+
+def simulated_score(signal):
+    """Deterministic score used without an API key (never as an outage fallback)"""
+    score = 6.0 + (signal['confluence'] * 0.6)
+    if signal.get('adx', 0) > 30: score += 1.0
+    if 'MACD' in signal['reasons']: score += 1.0
+    return min(10.0, score)
+
+
+def setup_key(signal, symbol=None):
+    """Features that define a setup; price drift inside the bar is ignored"""
+    return (
+        symbol,
+        str(signal.get('bar_time')),
+        signal['type'],
+        signal['confluence'],
+        tuple(sorted(signal['reasons'])),
+        round(float(signal.get('adx', 0)), 0),
+    )
+
+
+def _describe(signal):
+    return (f"{signal['type']} @ {signal['entry']:.2f} | Confluence: {signal['confluence']}/9 | "
+            f"Reasons: {', '.join(signal['reasons'])} | ADX: {signal.get('adx', 0):.1f}")
+
+
+class AIScorer:
+    """Cached, batched and deadline-bounded AI scoring"""
+
+    def __init__(self, client, model=MODEL, ttl=CACHE_TTL, max_entries=CACHE_SIZE,
+                 deadline=DEADLINE, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH,
+                 max_concurrent=4):
+        self.client = client
+        self.model = model
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.deadline = deadline
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="ai")
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._flush_task = None
+        self.counters = {"requests": 0, "cache_hits": 0, "api_calls": 0, "api_errors": 0,
+                         "timeouts": 0, "fallbacks": 0}
+        self.latencies = deque(maxlen=1000)
+        self.latency = REGISTRY.histogram("ai_latency_seconds", "LLM call latency")
+
+    # Cache
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires, result = entry
+            if expires < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key, result):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+        REGISTRY.counter(f"ai_{name}_total", f"AI scorer {name.replace('_', ' ')}").inc(n)
+
+    # API calls
+
+    def _call(self, prompt, max_tokens):
+        started = time.perf_counter()
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            timeout=self.deadline,
+        )
+        elapsed = time.perf_counter() - started
+        self.latencies.append(elapsed)
+        self.latency.observe(elapsed)
+        return json.loads(response.choices[0].message.content)
+
+    def _request(self, items):
+        """Score uncached (signal, symbol) items with one API call"""
+        if len(items) == 1:
+            signal, symbol = items[0]
+            prompt = f"""
+        Analyze this {symbol or 'Nifty 50'} trade setup (V8.0 Ultra Strategy):
+        Type: {signal['type']} @ {signal['entry']:.2f}
+        Confluence: {signal['confluence']}/9 factors
+        Reasons: {', '.join(signal['reasons'])}
+        ADX: {signal.get('adx', 0):.1f} (Trend Strength)
+
+        Rate confidence 0-10. Be strict. >9.0 requires perfect setup.
+        Return JSON: {{"score": float, "reasoning": "short explanation"}}
+        """
+            content = self._call(prompt, 100)
+            return [(float(content.get('score', 5.0)), content.get('reasoning', 'No reasoning'))]
+
+        lines = "\n".join(f"        [{i}] {symbol or ''} {_describe(signal)}"
+                          for i, (signal, symbol) in enumerate(items))
+        prompt = f"""
+        Analyze these trade setups (V8.0 Ultra Strategy):
+{lines}
+
+        Rate confidence 0-10 for each. Be strict. >9.0 requires perfect setup.
+        Return JSON: {{"scores": [{{"id": int, "score": float, "reasoning": "short explanation"}}]}}
+        """
+        content = self._call(prompt, 60 * len(items))
+        by_id = {int(s['id']): s for s in content.get('scores', []) if 'id' in s}
+        results = []
+        for i in range(len(items)):
+            entry = by_id.get(i)
+            if entry is None:
+                raise ValueError(f"AI response missing setup {i}")
+            results.append((float(entry.get('score', 5.0)), entry.get('reasoning', 'No reasoning')))
+        return results
+
+    def score_batch(self, items):
+        """Score [(signal, symbol), ...]; returns [(score, reasoning), ...]"""
+        results = [None] * len(items)
+        misses = []
+        for i, (signal, symbol) in enumerate(items):
+            cached = self._cache_get(setup_key(signal, symbol))
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.append(i)
+        self._count("requests", len(items))
+        self._count("cache_hits", len(items) - len(misses))
+
+        if misses and not self.client:
+            for i in misses:
+                results[i] = (simulated_score(items[i][0]), "Simulated Score")
+            return results
+
+        for start in range(0, len(misses), self.max_batch):
+            chunk = misses[start:start + self.max_batch]
+            self._count("api_calls")
+            future = self._executor.submit(self._request, [items[i] for i in chunk])
+            try:
+                scored = future.result(timeout=self.deadline)
+            except FutureTimeout:
+                print(f"⏱️ AI over {self.deadline:.1f}s budget - skipping setup")
+                self._count("timeouts")
+                scored = None
+            except Exception as e:
+                print(f"AI Error: {e}")
+                self._count("api_errors")
+                scored = None
+
+            for j, i in enumerate(chunk):
+                signal, symbol = items[i]
+                if scored is None:
+                    self._count("fallbacks")
+                    results[i] = (UNAVAILABLE_SCORE, "AI Unavailable - Trade Skipped")
+                else:
+                    results[i] = scored[j]
+                    self._cache_put(setup_key(signal, symbol), scored[j])
+        return results
+
+    def score(self, signal, symbol=None):
+        """Score one setup (blocking, bounded by the deadline)"""
+        return self.score_batch([(signal, symbol)])[0]
+
+    async def score_async(self, signal, symbol=None):
+        """Score one setup; concurrent callers within batch_window share a request"""
+        cached = self._cache_get(setup_key(signal, symbol))
+        if cached is not None:
+            self._count("requests")
+            self._count("cache_hits")
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((signal, symbol, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        pending, self._pending = self._pending, []
+        try:
+            results = await asyncio.to_thread(self.score_batch, [(s, sym) for s, sym, _ in pending])
+        except Exception as e:
+            for _, _, future in pending:
+                future.set_exception(e)
+            return
+        for (_, _, future), result in zip(pending, results):
+            future.set_result(result)
+
+    # Metrics
+
+    def metrics(self):
+        """Counters plus cache hit rate and API latency percentiles (ms)"""
+        with self._lock:
+            snapshot = dict(self.counters)
+            snapshot["cache_size"] = len(self._cache)
+        lookups = snapshot["requests"]
+        snapshot["hit_rate"] = round(snapshot["cache_hits"] / lookups, 3) if lookups else 0.0
+        latencies = sorted(self.latencies)
+        if latencies:
+            snapshot["latency_p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+            snapshot["latency_p95_ms"] = round(latencies[int(len(latencies) * 0.95)] * 1000, 1)
+        return snapshot
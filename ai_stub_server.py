@@ -0,0 +1,57 @@
+"""
+LOCAL AI STUB SERVER
+OpenAI-compatible stand-in for the Cerebras chat completions endpoint, for
+running the bot and AIScorer offline. Scores are deterministic (derived from
+the confluence count in the prompt); latency and error rate are tunable.
+Run: uvicorn ai_stub_server:app --port 8001
+     CEREBRAS_BASE_URL=http://localhost:8001/v1 CEREBRAS_API_KEY=stub python live_paper_trade_v8.py
+Env: STUB_DELAY_MS (default 50), STUB_ERROR_RATE (0-1, default 0)
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from fastapi import FastAPI, HTTPException, Request
+
+app = FastAPI()
+
+CONFLUENCE = re.compile(r"Confluence:\s*(\d+)/9")
+SETUP_ID = re.compile(r"^\s*\[(\d+)\]", re.MULTILINE)
+
+
+def _score(text):
+    match = CONFLUENCE.search(text)
+    confluence = int(match.group(1)) if match else 4
+    return round(min(10.0, 5.5 + confluence * 0.6), 1)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt = body["messages"][-1]["content"]
+
+    await asyncio.sleep(float(os.getenv("STUB_DELAY_MS", "50")) / 1000)
+    if random.random() < float(os.getenv("STUB_ERROR_RATE", "0")):
+        raise HTTPException(status_code=503, detail="stub: injected failure")
+
+    lines = {int(m.group(1)): prompt[m.end():].split("\n", 1)[0] for m in SETUP_ID.finditer(prompt)}
+    if lines:
+        content = {"scores": [{"id": i, "score": _score(lines[i]), "reasoning": "stub"} for i in sorted(lines)]}
+    else:
+        content = {"score": _score(prompt), "reasoning": "stub"}
+
+    return {
+        "id": "stub-completion",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": json.dumps(content)},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
@@ -4,13 +4,26 @@ Serves live trading data to the Next.js Frontend.
 Run: uvicorn api_server:app --reload --port 8000
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import json
-import pandas as pd
 import os
-import yfinance as yf
-from typing import Dict, Any, List
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from bar_store import BarStore
+from chart_cache import ChartCache
+from live_feed import LiveFeed
+from market_feed import FEED_DIR, feed_path
+from metrics import REGISTRY
+from state_store import StateReader, state_db_path
+from trade_log import TradeLog
+from trade_ledger import GROUPS, TradeLedger, ledger_path
+from wire_format import (MEDIA_TYPES, MIN_COMPRESS_BYTES, columns_from_rows, compress, encode,
+                         negotiate_encoding, negotiate_layout)
 
 app = FastAPI()
 
@@ -28,10 +41,84 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 STATE_FILE = "live_state.json"
 TRADES_FILE = "live_trades.csv"
+# Written by the bot after every cycle (portfolio runner: portfolio_state/metrics.prom)
+BOT_METRICS_FILE = os.getenv("BOT_METRICS_FILE", os.path.splitext(STATE_FILE)[0] + ".prom")
+
+bar_store = BarStore()
+# With a market_feed.py producer running, read its bars instead of polling Yahoo per worker
+chart_cache = ChartCache(bar_store, "^NSEI", "5m", feed=feed_path("^NSEI", "5m") if FEED_DIR else None)
+trade_log = TradeLog(TRADES_FILE)  # legacy CSV, until the bot has written a ledger
+trade_ledger = TradeLedger(ledger_path(TRADES_FILE))
+state_reader = StateReader(state_db_path(STATE_FILE))
+live_feed = LiveFeed(state_reader, trade_ledger, chart_cache)
+
+ENCODED_CACHE_SIZE = 64  # compressed bodies kept, keyed by ETag
+_encoded = OrderedDict()
+_encoded_lock = threading.Lock()
+
+
+def _etag(*parts):
+    return '"' + "-".join(str(p) for p in parts) + '"'
+
+
+def _not_modified(request, etag):
+    """If-None-Match holds `etag`: a list of validators, W/ (weak) ones or *"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _json(request, etag, body, headers=None, media_type="application/json"):
+    """Response with an ETag; 304 if the client already has this version.
+    `body` is bytes or a callable producing them, so 304s skip serialization.
+    Compressed per Accept-Encoding, once per ETag: every poller of the same
+    version gets the cached bytes."""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding:
+        etag = f'{etag[:-1]}-{encoding}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    with _encoded_lock:
+        cached = _encoded.get(etag)
+        if cached is not None:
+            _encoded.move_to_end(etag)
+    if cached is None:
+        content = body() if callable(body) else body
+        cached = (compress(content, encoding), encoding) if encoding and len(content) >= MIN_COMPRESS_BYTES \
+            else (content, None)
+        with _encoded_lock:
+            _encoded[etag] = cached
+            while len(_encoded) > ENCODED_CACHE_SIZE:
+                _encoded.popitem(last=False)
+    content, encoding = cached
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type=media_type, headers=headers)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    # Route template, not the raw path, to keep label cardinality bounded
+    REGISTRY.histogram("api_request_seconds", "API time to response start",
+                       path=route.path if route else "unmatched").observe(time.perf_counter() - started)
+    return response
 
 @app.get("/")
 def read_root():
@@ -39,84 +126,101 @@ def read_root():
 
 @app.get("/state")
 def get_state() -> Dict[str, Any]:
-    if os.path.exists(STATE_FILE):
-        try:
+    try:
+        state = state_reader.read()
+        if state is not None:
+            return state
+        # Bot has not started with the journaled store yet
+        if os.path.exists(STATE_FILE):
             with open(STATE_FILE, 'r') as f:
                 return json.load(f)
-        except Exception as e:
-            return {"error": str(e)}
+    except Exception as e:
+        return {"error": str(e)}
     return {"error": "State file not found"}
 
 @app.get("/trades")
-def get_trades():
-    if os.path.exists(TRADES_FILE):
-        try:
-            df = pd.read_csv(TRADES_FILE)
-            return df.to_dict(orient="records")
-        except Exception as e:
-            return {"error": str(e)}
-    return []
-
-@app.get("/chart")
-def get_chart_data() -> List[Dict]:
-    """Fetch live chart data from Yahoo Finance with indicators"""
+def get_trades(request: Request, since: Optional[str] = None, layout: Optional[str] = None):
+    """Trade log rows; `since` (row offset or exit_time) returns only newer trades.
+    X-Next-Cursor is the offset to pass as `since` on the next poll.
+    layout=columns / arrow (or Accept: application/vnd.apache.arrow.stream)
+    returns one array per field instead of one object per trade."""
     try:
-        df = yf.download("^NSEI", period="1d", interval="5m", progress=False)
-        if df.empty:
-            return []
-        
-        # Clean columns
-        df.columns = [c[0] if isinstance(c, tuple) else c for c in df.columns]
-        df.reset_index(inplace=True)
-        
-        # Calculate EMAs
-        df['EMA20'] = df['Close'].ewm(span=20).mean()
-        df['EMA50'] = df['Close'].ewm(span=50).mean()
-        
-        # Calculate ATR for Supertrend
-        high_low = df['High'] - df['Low']
-        high_close = abs(df['High'] - df['Close'].shift())
-        low_close = abs(df['Low'] - df['Close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
-        atr = true_range.rolling(14).mean()
-        
-        # Supertrend
-        hl2 = (df['High'] + df['Low']) / 2
-        multiplier = 3
-        upper_band = hl2 + (multiplier * atr)
-        lower_band = hl2 - (multiplier * atr)
-        
-        supertrend = pd.Series(index=df.index, dtype=float)
-        for i in range(1, len(df)):
-            if pd.isna(supertrend.iloc[i-1]):
-                supertrend.iloc[i] = lower_band.iloc[i]
-            else:
-                if df['Close'].iloc[i] > supertrend.iloc[i-1]:
-                    supertrend.iloc[i] = lower_band.iloc[i]
-                else:
-                    supertrend.iloc[i] = upper_band.iloc[i]
-        
-        df['Supertrend'] = supertrend
-        
-        # Convert to dict
-        result = []
-        for _, row in df.iterrows():
-            result.append({
-                "time": row['Datetime'].strftime('%H:%M') if 'Datetime' in row else str(row.name),
-                "open": float(row['Open']),
-                "high": float(row['High']),
-                "low": float(row['Low']),
-                "close": float(row['Close']),
-                "volume": int(row['Volume']),
-                "ema20": float(row['EMA20']) if not pd.isna(row['EMA20']) else None,
-                "ema50": float(row['EMA50']) if not pd.isna(row['EMA50']) else None,
-                "supertrend": float(row['Supertrend']) if not pd.isna(row['Supertrend']) else None
-            })
-        return result
+        # Version, rows and cursor of one refresh, so the ETag always matches the body
+        version, rows, cursor = trade_ledger.read(since)
+        if version is None:
+            version, rows, cursor = trade_log.read(since)
     except Exception as e:
-        print(f"Chart error: {e}")
+        return {"error": str(e)}
+    if version is None:
         return []
+    layout = negotiate_layout(request.headers.get("accept"), layout)
+    etag = _etag(*version, layout, since or "")
+
+    def body():
+        return json.dumps(rows).encode() if layout == "rows" else encode(columns_from_rows(rows), layout)
+
+    return _json(request, etag, body, {"X-Next-Cursor": str(cursor)}, MEDIA_TYPES[layout])
+
+def _analytics(request, key, compute):
+    try:
+        version = trade_ledger.refresh()
+    except Exception as e:
+        return {"error": str(e)}
+    if version is None:
+        return {"error": "Trade ledger not found"}
+    return _json(request, _etag(*version, *key), lambda: json.dumps(compute()).encode())
+
+@app.get("/analytics/equity")
+def get_equity(request: Request, symbol: Optional[str] = None):
+    """Balance after each closed trade with running peak and drawdown %"""
+    return _analytics(request, ("equity", symbol or ""), lambda: trade_ledger.equity(symbol))
+
+@app.get("/analytics/drawdown")
+def get_drawdown(request: Request, symbol: Optional[str] = None):
+    return _analytics(request, ("drawdown", symbol or ""), lambda: trade_ledger.drawdown(symbol))
+
+@app.get("/analytics/win_rate")
+def get_win_rate(request: Request, by: str = "reason"):
+    """Win rate / PnL / average R grouped by exit reason, AI-score bucket, symbol, side or strategy"""
+    if by not in GROUPS:
+        return {"error": f"by must be one of {sorted(GROUPS)}"}
+    return _analytics(request, ("win_rate", by), lambda: trade_ledger.win_rate(by))
+
+@app.get("/analytics/daily")
+def get_daily(request: Request):
+    return _analytics(request, ("daily",), trade_ledger.daily)
+
+@app.get("/chart")
+def get_chart_data(request: Request, layout: Optional[str] = None, since: Optional[str] = None,
+                   days: int = 1, points: Optional[int] = None):
+    """Today's chart data with indicators, served from the shared chart cache.
+    layout=columns returns one array per field instead of one object per bar,
+    layout=arrow (or Accept: application/vnd.apache.arrow.stream) an Arrow IPC stream;
+    `since` (row offset or "HH:MM") returns only the bars from that one on.
+    days=N covers the last N sessions; points=N downsamples (LTTB) to N bars."""
+    layout = negotiate_layout(request.headers.get("accept"), layout)
+    days = max(1, days)
+    points = points if points and points >= 3 else None
+    version, body = chart_cache.get(layout, since, days, points)  # one refresh: the ETag matches the body
+    etag = _etag(version, layout, since or "", days, points or "")
+    return _json(request, etag, body, media_type=MEDIA_TYPES[layout])
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text format: this server's metrics plus the bot's latest dump"""
+    body = REGISTRY.render()
+    try:
+        with open(BOT_METRICS_FILE, 'r') as f:
+            body += f.read()
+    except OSError:
+        pass
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/stream")
+async def stream():
+    """Server-Sent Events: state, new trades and chart bars as they change"""
+    return StreamingResponse(live_feed.subscribe(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__ == "__main__":
     import uvicorn
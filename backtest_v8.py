@@ -0,0 +1,448 @@
+"""
+V8.0 VECTORIZED BACKTEST ENGINE
+Replays the LiveBotV8 rules over a full bar history.
+Run: python backtest_v8.py --period 60d --interval 5m
+     python backtest_v8.py --csv nifty_5m.csv
+     python backtest_v8.py --csv nifty_5m.csv --htf 15m,60m
+     python backtest_v8.py --csv nifty_5m.csv --strategy v8_lean
+Thresholds, exits and sizing come from the strategy (strategies.py /
+STRATEGY_CONFIG), the same object the live bot trades.
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import fill_sim
+import live_paper_trade_v8 as v8
+import signal_rules
+import strategies
+from accel import njit
+from fill_sim import slip, order_cost, walk_bar
+from multi_timeframe import INTERVAL_MINUTES
+from signal_rules import REASONS
+EXIT_REASONS = ["SL", "TP2"]
+
+# Bot-level settings; the strategy's STRATEGY_PARAMS are added by params_for
+DEFAULT_PARAMS = {
+    "max_daily_trades": v8.MAX_DAILY_TRADES,
+    "max_daily_loss_pct": v8.MAX_DAILY_LOSS_PCT,
+    "capital": v8.CAPITAL,
+    "fill_rule": v8.FILL_RULE,
+    "slippage_bps": v8.SLIPPAGE_BPS,
+    "cost_bps": v8.COST_BPS,
+    "fee_per_order": v8.FEE_PER_ORDER,
+}
+
+# Strategy attributes that can be overridden per run (optimizer grids)
+STRATEGY_PARAMS = ("min_ai_score", "min_confluence", "min_adx", "min_volume_ratio",
+                   "sl_atr_mult", "tp1_r_mult", "tp2_r_mult")
+
+# Columns the signal engine and the trade kernel read
+BAR_COLUMNS = ["Open", "Close", "High", "Low", "ATR", "EMA20", "EMA50", "EMA200", "Supertrend_Direction",
+               "ADX", "MACD", "MACD_SIGNAL", "Volume_Ratio", "VWAP", "BB_LOWER", "BB_MID",
+               "BB_UPPER", "Stoch_RSI", "Trend_15m", "Trend_60m"]
+
+
+def get_strategy(strategy=None):
+    """Strategy object from a name (None = the live bot's STRATEGY) or as given"""
+    if isinstance(strategy, strategies.Strategy):
+        return strategy
+    return strategies.get(strategy or v8.STRATEGY)
+
+
+def params_for(strategy=None, params=None):
+    """DEFAULT_PARAMS plus the strategy's thresholds / exits, with `params` on top"""
+    strategy = get_strategy(strategy)
+    p = dict(DEFAULT_PARAMS, **{k: getattr(strategy, k) for k in STRATEGY_PARAMS})
+    p.update(params or {})
+    return p
+
+
+def load_history(csv=None, period="60d", interval=v8.INTERVAL, symbol=v8.SYMBOL):
+    """Load OHLCV bars from a CSV export or Yahoo Finance"""
+    if csv:
+        df = pd.read_csv(csv)
+        time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+        df[time_col] = pd.to_datetime(df[time_col])
+        return df
+
+    df = yf.download(symbol, period=period, interval=interval, progress=False)
+    df.columns = [c[0] if isinstance(c, tuple) else c for c in df.columns]
+    df.reset_index(inplace=True)
+    return df
+
+
+def _col(df, name):
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return df[name].to_numpy(dtype=np.float64)
+
+
+def _bar_days(df):
+    time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+    if time_col not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    times = pd.to_datetime(df[time_col])
+    if times.dt.tz is not None:
+        times = times.dt.tz_localize(None)
+    return times.dt.normalize().to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def bar_arrays(df):
+    """Plain float64 arrays for BAR_COLUMNS plus an int64 'Day' session key.
+
+    Everything downstream of the indicators works on this dict, so it can be
+    backed by shared memory or memory-mapped files instead of a DataFrame.
+    """
+    if isinstance(df, dict):
+        return df
+    arrays = {name: _col(df, name) for name in BAR_COLUMNS}
+    arrays['Day'] = _bar_days(df)
+    return arrays
+
+
+def signal_arrays(df, params=None, strategy=None):
+    """Evaluate LiveBotV8.check_signal for every bar at once.
+
+    The rule table is the strategy's (its confluence factors), compiled with
+    any min_adx / min_volume_ratio override in `params`. Returns a dict of NumPy arrays: direction (+1 BUY, -1 SELL, 0 none),
+    confluence, reasons bitmask (bit i -> REASONS[i]), entry/sl/tp1/tp2/risk
+    and the simulated AI score.
+    """
+    strategy = get_strategy(strategy)
+    p = params_for(strategy, params)
+    a = bar_arrays(df)
+
+    price, atr, adx = a['Close'], a['ATR'], a['ADX']
+    # Cached: the same table as strategy.rules unless the thresholds are overridden
+    rules = signal_rules.compile_rules(float(p['min_adx']), float(p['min_volume_ratio']), strategy.factors)
+    direction, confluence, reasons = signal_rules.evaluate(a, rules, p['min_confluence'])
+
+    risk = np.where(direction != 0, atr * p['sl_atr_mult'], np.nan)
+    sign = direction.astype(np.float64)
+    sl = price - sign * risk
+    tp1 = price + sign * risk * p['tp1_r_mult']
+    tp2 = price + sign * risk * p['tp2_r_mult']
+
+    # Same formula as ai_scorer.simulated_score
+    with np.errstate(invalid='ignore'):
+        ai_score = 6.0 + confluence * 0.6
+        ai_score = ai_score + np.where(adx > 30, 1.0, 0.0)
+        ai_score = ai_score + np.where(reasons & (1 << REASONS.index("MACD")), 1.0, 0.0)
+    ai_score = np.minimum(10.0, ai_score)
+
+    return {
+        "direction": direction,
+        "confluence": confluence,
+        "reasons": reasons,
+        "entry": price,
+        "sl": sl,
+        "tp1": tp1,
+        "tp2": tp2,
+        "risk": risk,
+        "ai_score": np.where(direction != 0, ai_score, np.nan),
+    }
+
+
+@njit(cache=True)
+def _simulate(direction, entry, sl, tp1, tp2, risk, ai_score, open_, high, low, close, day,
+              sub_open, sub_high, sub_low, sub_close, sub_start, sub_end,
+              capital, min_ai_score, max_daily_trades, max_daily_loss_pct,
+              size_scores, size_pcts, loss_count, loss_pct, win_count, win_bonus, win_cap,
+              rule, slippage_bps, cost_bps, fee_per_order, out):
+    """Bar-by-bar replay of LiveBotV8.run / manage_trade / calculate_qty.
+
+    One decision per bar, like one poll of the live loop: manage the open
+    trade if there is one, otherwise look for an entry. While a trade is
+    open, bar i is walked through its sub-bars sub_start[i]:sub_end[i] when
+    there are any (fill_sim.walk_bar). Fills one row of `out` per closed
+    trade and returns (n_trades, balance, open_entry_idx).
+    """
+    balance = capital
+    wins = 0
+    losses = 0
+    cur_day = -1
+    d_trades = 0
+    d_pnl = 0.0
+
+    active = False
+    t_idx = 0
+    t_side = 0
+    t_entry = 0.0
+    t_sl = 0.0
+    t_tp1 = 0.0
+    t_tp2 = 0.0
+    t_qty = 0
+    t_orig_qty = 0
+    t_tp1_hit = False
+    t_partial = 0.0
+    t_costs = 0.0
+    n = 0
+
+    for i in range(len(high)):
+        if day[i] != cur_day:
+            cur_day = day[i]
+            d_trades = 0
+            d_pnl = 0.0
+
+        if d_trades >= max_daily_trades:
+            continue
+        if d_pnl < -(balance * max_daily_loss_pct):
+            continue
+
+        if active:
+            exit_reason = -1
+            exit_price = 0.0
+            first = sub_start[i]
+            steps = sub_end[i] - first
+            for k in range(max(steps, 1)):
+                if steps > 0:
+                    j = first + k
+                    o, h, l, c = sub_open[j], sub_high[j], sub_low[j], sub_close[j]
+                else:
+                    o, h, l, c = open_[i], high[i], low[i], close[i]
+                tp1_filled, exit_reason, exit_price = walk_bar(
+                    t_side, t_entry, t_sl, t_tp1, t_tp2, t_tp1_hit, o, h, l, c, rule)
+                if tp1_filled:
+                    half_qty = t_orig_qty // 2
+                    cost = order_cost(t_tp1, half_qty, cost_bps, fee_per_order)
+                    partial = t_side * (t_tp1 - t_entry) * half_qty - cost
+                    balance += partial
+                    d_pnl += partial
+                    t_partial += partial
+                    t_costs += cost
+                    t_tp1_hit = True
+                    t_qty -= half_qty
+                    t_sl = t_entry
+                if exit_reason >= 0:
+                    break
+
+            if exit_reason >= 0:
+                if exit_reason == 0:  # stops fill as market orders
+                    exit_price = slip(exit_price, -t_side, slippage_bps)
+                cost = order_cost(exit_price, t_qty, cost_bps, fee_per_order)
+                t_costs += cost
+                # The entry charges are booked with the final leg
+                pnl = t_side * (exit_price - t_entry) * t_qty - cost - order_cost(
+                    t_entry, t_orig_qty, cost_bps, fee_per_order)
+                balance += pnl
+                d_pnl += pnl
+                d_trades += 1
+                # The live bot judges the streak on the final leg only
+                if pnl > 0:
+                    wins += 1
+                    losses = 0
+                else:
+                    losses += 1
+                    wins = 0
+
+                out[n, 0] = t_idx
+                out[n, 1] = i
+                out[n, 2] = t_side
+                out[n, 3] = t_entry
+                out[n, 4] = exit_price
+                out[n, 5] = sl[t_idx]
+                out[n, 6] = t_tp1
+                out[n, 7] = t_tp2
+                out[n, 8] = t_orig_qty
+                out[n, 9] = ai_score[t_idx]
+                out[n, 10] = exit_reason
+                out[n, 11] = 1.0 if t_tp1_hit else 0.0
+                out[n, 12] = t_partial
+                out[n, 13] = pnl
+                out[n, 14] = balance
+                out[n, 15] = t_costs + order_cost(t_entry, t_orig_qty, cost_bps, fee_per_order)
+                n += 1
+                active = False
+            continue
+
+        if direction[i] == 0 or not ai_score[i] >= min_ai_score:
+            continue
+
+        # calculate_qty (Strategy.risk_pct)
+        score = ai_score[i]
+        row = -1
+        for k in range(len(size_scores)):
+            if score >= size_scores[k]:
+                row = k
+                break
+        if row < 0:
+            continue
+        risk_pct = size_pcts[row]
+        if losses >= loss_count:
+            risk_pct = loss_pct
+        if wins >= win_count:
+            risk_pct = min(risk_pct + win_bonus, win_cap)
+        if risk_pct == 0.0:
+            continue
+        qty = int(balance * (risk_pct / 100) / risk[i])
+        if qty <= 0:
+            continue
+
+        active = True
+        t_idx = i
+        t_side = direction[i]
+        t_entry = slip(entry[i], t_side, slippage_bps)
+        t_sl = sl[i]
+        t_tp1 = tp1[i]
+        t_tp2 = tp2[i]
+        t_qty = qty
+        t_orig_qty = qty
+        t_tp1_hit = False
+        t_partial = 0.0
+        t_costs = 0.0
+
+    return n, balance, t_idx if active else -1
+
+
+TRADE_COLUMNS = ["entry_idx", "exit_idx", "side", "entry", "exit_price", "sl", "tp1", "tp2",
+                 "qty", "ai_score", "reason", "tp1_hit", "partial_pnl", "pnl", "balance", "costs"]
+
+
+def sizing_arrays(strategy):
+    """The strategy's sizing table and streak rules as kernel arguments"""
+    sizing = np.array(strategy.sizing, dtype=np.float64).reshape(-1, 2)
+    loss_count, loss_pct = strategy.losing_streak
+    win_count, win_bonus, win_cap = strategy.winning_streak
+    return (np.ascontiguousarray(sizing[:, 0]), np.ascontiguousarray(sizing[:, 1]),
+            int(loss_count), float(loss_pct), int(win_count), float(win_bonus), float(win_cap))
+
+
+def simulate(df, signals, params=None, sub_bars=None, strategy=None):
+    """Run the trade state machine over precomputed signal arrays.
+    `sub_bars` (fill_sim.SubBars) resolves the intrabar order from 1m bars or ticks."""
+    strategy = get_strategy(strategy)
+    p = params_for(strategy, params)
+    a = bar_arrays(df)
+    n_bars = len(a['High'])
+    sub_bars = sub_bars or fill_sim.SubBars.empty(n_bars)
+    out = np.zeros((max(n_bars // 2, 1), len(TRADE_COLUMNS)), dtype=np.float64)
+    n, balance, open_idx = _simulate(
+        signals['direction'].astype(np.int64),
+        signals['entry'], signals['sl'], signals['tp1'], signals['tp2'], signals['risk'],
+        signals['ai_score'],
+        a['Open'], a['High'], a['Low'], a['Close'], a['Day'],
+        *sub_bars.arrays(),
+        float(p['capital']), float(p['min_ai_score']),
+        int(p['max_daily_trades']), float(p['max_daily_loss_pct']),
+        *sizing_arrays(strategy),
+        fill_sim.RULES[p['fill_rule']], float(p['slippage_bps']),
+        float(p['cost_bps']), float(p['fee_per_order']),
+        out,
+    )
+    return out[:n], balance, open_idx
+
+
+def trades_frame(df, rows, signals):
+    """Turn raw kernel output into a readable trade log"""
+    trades = pd.DataFrame(rows, columns=TRADE_COLUMNS)
+    for c in ("entry_idx", "exit_idx", "qty"):
+        trades[c] = trades[c].astype(np.int64)
+    trades['type'] = np.where(trades['side'] > 0, 'BUY', 'SELL')
+    trades['reason'] = [EXIT_REASONS[int(r)] for r in trades['reason']]
+    trades['tp1_hit'] = trades['tp1_hit'].astype(bool)
+    trades['total_pnl'] = trades['partial_pnl'] + trades['pnl']
+    trades['confluence'] = signals['confluence'][trades['entry_idx'].to_numpy()]
+    trades['reasons'] = [
+        ", ".join(r for bit, r in enumerate(REASONS) if mask & (1 << bit))
+        for mask in signals['reasons'][trades['entry_idx'].to_numpy()]
+    ]
+    time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+    if time_col in df.columns:
+        times = df[time_col].to_numpy()
+        trades.insert(0, 'entry_time', times[trades['entry_idx'].to_numpy()])
+        trades.insert(1, 'exit_time', times[trades['exit_idx'].to_numpy()])
+    return trades.drop(columns=['side'])
+
+
+def summarize(trades, capital, balance, n_days):
+    """Headline stats in the same terms as the README table"""
+    equity = np.concatenate([[capital], capital + np.cumsum(trades['total_pnl'].to_numpy())])
+    peak = np.maximum.accumulate(equity)
+    drawdown = (peak - equity) / peak
+    wins = int((trades['total_pnl'] > 0).sum())
+    return {
+        "starting_capital": capital,
+        "final_balance": round(float(balance), 2),
+        "return_pct": round(float(balance / capital - 1) * 100, 2),
+        "total_trades": len(trades),
+        "win_rate": round(wins / len(trades) * 100, 1) if len(trades) else 0.0,
+        "max_drawdown_pct": round(float(drawdown.max()) * 100, 2),
+        "trading_days": n_days,
+        "avg_trades_per_day": round(len(trades) / n_days, 2) if n_days else 0.0,
+    }
+
+
+def add_trends(df, interval, htf):
+    """Trend_<tf> columns resampled from the traded bars, as the live bot sees them"""
+    from multi_timeframe import trend_history
+    return pd.concat([df, trend_history(df, interval, htf)], axis=1)
+
+
+def run_backtest(df, params=None, signals=None, sub_bars=None, strategy=None):
+    """Replay LiveBotV8 trading `strategy` (name or Strategy; None = STRATEGY)
+    over `df` (raw OHLCV or already with indicators)"""
+    strategy = get_strategy(strategy)
+    p = params_for(strategy, params)
+    if 'ATR' not in df.columns:
+        df = v8.compute_indicators(df.copy())
+    if signals is None:
+        signals = signal_arrays(df, p, strategy)
+
+    rows, balance, open_idx = simulate(df, signals, p, sub_bars, strategy)
+    trades = trades_frame(df, rows, signals)
+    n_days = len(np.unique(_bar_days(df)))
+    return {
+        "trades": trades,
+        "summary": summarize(trades, p['capital'], balance, n_days),
+        "open_entry_idx": open_idx,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 vectorized backtest")
+    parser.add_argument("--csv", help="OHLCV CSV with a Datetime column")
+    parser.add_argument("--period", default="60d")
+    parser.add_argument("--interval", default=v8.INTERVAL)
+    parser.add_argument("--symbol", default=v8.SYMBOL)
+    parser.add_argument("--htf", default="", help="Higher-timeframe confluence, e.g. 15m,60m")
+    parser.add_argument("--strategy", default=v8.STRATEGY,
+                        help="Strategy from strategies.py / STRATEGY_CONFIG (default v8)")
+    parser.add_argument("--fills", help="1m bars or ticks (CSV/Parquet) to resolve intrabar fills")
+    parser.add_argument("--fill-rule", default=DEFAULT_PARAMS['fill_rule'], choices=list(fill_sim.RULES),
+                        help="Intrabar order when a (sub-)bar touches several levels")
+    parser.add_argument("--slippage-bps", type=float, default=DEFAULT_PARAMS['slippage_bps'])
+    parser.add_argument("--cost-bps", type=float, default=DEFAULT_PARAMS['cost_bps'])
+    parser.add_argument("--fee", type=float, default=DEFAULT_PARAMS['fee_per_order'], help="Flat fee per order")
+    parser.add_argument("--out", help="Write the trade log to this CSV")
+    args = parser.parse_args()
+
+    df = load_history(args.csv, args.period, args.interval, args.symbol)
+    if df.empty:
+        print("❌ No data")
+        return
+    if args.htf:
+        df = add_trends(df, args.interval, args.htf.split(","))
+
+    params = {"fill_rule": args.fill_rule, "slippage_bps": args.slippage_bps,
+              "cost_bps": args.cost_bps, "fee_per_order": args.fee}
+    sub_bars = None
+    if args.fills:
+        time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+        sub_bars = fill_sim.SubBars(df[time_col], fill_sim.load(args.fills),
+                                    INTERVAL_MINUTES[args.interval])
+        print(f"🔬 Intrabar fills from {args.fills} ({sub_bars.coverage():.0%} of bars covered)")
+
+    result = run_backtest(df, params, sub_bars=sub_bars, strategy=args.strategy)
+    print(f"📊 V8.0 BACKTEST ({args.symbol}@{args.strategy}, {args.interval}, {len(df)} bars)")
+    for key, value in result['summary'].items():
+        print(f"   {key}: {value}")
+    if args.out:
+        result['trades'].to_csv(args.out, index=False)
+        print(f"💾 Trades saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
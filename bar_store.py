@@ -0,0 +1,294 @@
+"""
+V8.0 LOCAL BAR STORE
+Persistent OHLCV cache: one Parquet (or CSV) file per symbol/interval/day on
+disk, plus an in-memory tail of NumPy arrays. refresh() asks the source only
+for bars at or after the last stored timestamp and merges the revised forming
+bar, so a poll downloads a couple of bars instead of 5 days. A store older
+than the source's intraday window, or a delta that comes back empty, falls
+back to the initial history.
+
+Sources are pluggable: YahooSource for live data, FileSource for CSV/Parquet
+fixtures so the bot and the API run without network
+(set OFFLINE_DATA_DIR=/path/to/fixtures).
+"""
+
+import contextlib
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (enables Parquet partitions)
+    PARTITION_FORMAT = "parquet"
+except ImportError:
+    PARTITION_FORMAT = "csv"
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+DEFAULT_TZ = "Asia/Kolkata"
+
+_YAHOO_LOCK = threading.Lock()
+
+# How far back Yahoo serves intraday bars per interval, less a day's margin;
+# a delta `start` before this comes back empty or errors
+YAHOO_WINDOW = {"1m": "6D", "2m": "59D", "5m": "59D", "15m": "59D", "30m": "59D", "90m": "59D",
+                "60m": "729D", "1h": "729D"}
+
+
+def _clean(df):
+    """Normalize a downloaded/loaded frame to Datetime + OHLCV columns"""
+    df.columns = [c[0] if isinstance(c, tuple) else c for c in df.columns]
+    if 'Datetime' not in df.columns and 'Date' not in df.columns:
+        df = df.reset_index()
+    df = df.rename(columns={'Date': 'Datetime'})
+    if not pd.api.types.is_datetime64_any_dtype(df['Datetime']):
+        df['Datetime'] = pd.to_datetime(df['Datetime'], format='ISO8601')
+    if df['Datetime'].dt.tz is None:
+        df['Datetime'] = df['Datetime'].dt.tz_localize(DEFAULT_TZ)
+    df = df[['Datetime'] + OHLCV].dropna(subset=['Close'])
+    return df.sort_values('Datetime').drop_duplicates('Datetime', keep='last').reset_index(drop=True)
+
+
+def _safe_name(symbol):
+    return symbol.replace('^', '').replace('/', '_').replace('=', '_')
+
+
+def _yahoo_guard():
+    """yfinance.download before per-call state (multi._DownloadCtx) collects results
+    in module globals (yfinance.shared), so concurrent calls, e.g. multi_symbol_bot's
+    fetch threads, can return each other's frames: serialize them on those versions"""
+    import yfinance.multi
+    return contextlib.nullcontext() if hasattr(yfinance.multi, "_DownloadCtx") else _YAHOO_LOCK
+
+
+class YahooSource:
+    """Live bars from Yahoo Finance"""
+
+    def __init__(self, initial_period="5d"):
+        self.initial_period = initial_period
+
+    def window(self, interval):
+        """Oldest `start` a delta fetch may use (as an age), None if unlimited"""
+        span = YAHOO_WINDOW.get(interval)
+        return pd.Timedelta(span) if span else None
+
+    def fetch(self, symbol, interval, start=None):
+        import yfinance as yf
+        with _yahoo_guard():
+            if start is None:
+                df = yf.download(symbol, period=self.initial_period, interval=interval, progress=False)
+            else:
+                df = yf.download(symbol, start=start.to_pydatetime(), interval=interval, progress=False)
+        if df is None or df.empty:
+            return None
+        return _clean(df)
+
+    def fetch_many(self, symbols, interval, batch_size=100):
+        """Initial history for many symbols, one multi-ticker download per batch"""
+        import yfinance as yf
+        frames = {}
+        for i in range(0, len(symbols), batch_size):
+            batch = list(symbols[i:i + batch_size])
+            with _yahoo_guard():
+                df = yf.download(batch, period=self.initial_period, interval=interval, group_by='ticker',
+                                 threads=True, progress=False)
+            if df is None or df.empty:
+                continue
+            for symbol in batch:
+                if symbol not in df.columns.get_level_values(0):
+                    continue
+                bars = _clean(df[symbol].copy())
+                if not bars.empty:
+                    frames[symbol] = bars
+        return frames
+
+
+class FileSource:
+    """Offline bars from fixture files: <root>/<SYMBOL>_<interval>.parquet or .csv"""
+
+    def __init__(self, root):
+        self.root = root
+        self._cache = {}
+
+    def window(self, interval):
+        return None
+
+    def _load(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self._cache:
+            base = os.path.join(self.root, f"{_safe_name(symbol)}_{interval}")
+            if os.path.exists(base + ".parquet"):
+                df = pd.read_parquet(base + ".parquet")
+            elif os.path.exists(base + ".csv"):
+                df = pd.read_csv(base + ".csv")
+            else:
+                df = None
+            self._cache[key] = _clean(df) if df is not None else None
+        return self._cache[key]
+
+    def fetch(self, symbol, interval, start=None):
+        df = self._load(symbol, interval)
+        if df is None:
+            return None
+        if start is not None:
+            df = df[df['Datetime'] >= start]
+        return df.reset_index(drop=True)
+
+    def fetch_many(self, symbols, interval, batch_size=None):
+        frames = {}
+        for symbol in symbols:
+            df = self.fetch(symbol, interval)
+            if df is not None and not df.empty:
+                frames[symbol] = df
+        return frames
+
+
+def make_source():
+    """FileSource when OFFLINE_DATA_DIR is set, Yahoo otherwise"""
+    offline = os.getenv("OFFLINE_DATA_DIR")
+    if offline:
+        return FileSource(offline)
+    return YahooSource()
+
+
+class _Tail:
+    """Growable column arrays for one symbol/interval (amortized O(1) append)"""
+
+    def __init__(self, tz=DEFAULT_TZ, capacity=1024):
+        self.tz = tz
+        self.n = 0
+        self.ts = np.empty(capacity, dtype=np.int64)
+        self.cols = {c: np.empty(capacity, dtype=np.float64) for c in OHLCV}
+
+    def _grow(self, needed):
+        capacity = len(self.ts)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.ts = np.resize(self.ts, capacity)
+        self.cols = {c: np.resize(v, capacity) for c, v in self.cols.items()}
+
+    def last_ts(self):
+        if self.n == 0:
+            return None
+        return pd.Timestamp(int(self.ts[self.n - 1]), tz="UTC").tz_convert(self.tz)
+
+    def merge(self, df):
+        """Overwrite bars at or after df's first timestamp, append the rest.
+
+        Returns the index of the first changed row.
+        """
+        ts = df['Datetime'].dt.tz_convert("UTC").dt.as_unit('ns').astype('int64').to_numpy()
+        start = int(np.searchsorted(self.ts[:self.n], ts[0], side='left'))
+        end = start + len(ts)
+        self._grow(end)
+        self.ts[start:end] = ts
+        for c in OHLCV:
+            self.cols[c][start:end] = df[c].to_numpy(dtype=np.float64)
+        self.n = max(self.n, end)
+        return start
+
+    def index_of(self, ts):
+        """Row of the first bar at or after ts"""
+        return int(np.searchsorted(self.ts[:self.n], pd.Timestamp(ts).value, side='left'))
+
+    def frame(self, start=0):
+        """DataFrame over the tail; OHLCV columns are views, not copies"""
+        times = pd.DatetimeIndex(self.ts[start:self.n].view('datetime64[ns]'))
+        data = {"Datetime": times.tz_localize("UTC").tz_convert(self.tz)}
+        data.update({c: v[start:self.n] for c, v in self.cols.items()})
+        return pd.DataFrame(data, copy=False)
+
+
+class BarStore:
+    """Day-partitioned on-disk bars with an in-memory tail per symbol/interval"""
+
+    def __init__(self, root="market_data", source=None, keep_days=10):
+        self.root = root
+        self.source = source or make_source()
+        self.keep_days = keep_days
+        self._tails = {}
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, _safe_name(symbol), interval)
+
+    def _tail(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self._tails:
+            self._tails[key] = _Tail()
+            self._load_partitions(symbol, interval)
+        return self._tails[key]
+
+    def _load_partitions(self, symbol, interval):
+        folder = self._dir(symbol, interval)
+        if not os.path.isdir(folder):
+            return
+        files = sorted(f for f in os.listdir(folder) if f.endswith((".parquet", ".csv")))
+        frames = []
+        for name in files[-self.keep_days:]:
+            path = os.path.join(folder, name)
+            try:
+                frames.append(pd.read_parquet(path) if name.endswith(".parquet") else pd.read_csv(path))
+            except Exception as e:
+                print(f"⚠️ Skipping unreadable partition {path}: {e}")
+        if frames:
+            df = _clean(pd.concat(frames, ignore_index=True))
+            tail = self._tails[(symbol, interval)]
+            tail.tz = str(df['Datetime'].dt.tz)
+            tail.merge(df)
+
+    def _persist(self, symbol, interval, changed):
+        """Rewrite the day partitions touched by `changed` (atomic replace)"""
+        folder = self._dir(symbol, interval)
+        os.makedirs(folder, exist_ok=True)
+        tail = self._tails[(symbol, interval)]
+        first_day = changed['Datetime'].iloc[0].normalize()
+        touched = tail.frame(tail.index_of(first_day))
+        touched_days = touched['Datetime'].dt.strftime('%Y-%m-%d')
+        for day in touched_days.unique():
+            part = touched[touched_days == day]
+            path = os.path.join(folder, f"{day}.{PARTITION_FORMAT}")
+            tmp = path + ".tmp"
+            if PARTITION_FORMAT == "parquet":
+                part.to_parquet(tmp, index=False)
+            else:
+                part.to_csv(tmp, index=False)
+            os.replace(tmp, path)
+
+    def refresh(self, symbol, interval):
+        """Pull only bars newer than the last stored one; returns the changed rows"""
+        tail = self._tail(symbol, interval)
+        last = tail.last_ts()
+        window = self.source.window(interval)
+        if last is not None and window is not None and pd.Timestamp.now(tz=last.tz) - last > window:
+            print(f"📥 {symbol} {interval} store ends {last} - past the source's window, re-fetching history")
+            df = None
+        else:
+            df = self.source.fetch(symbol, interval, start=last)
+        if (df is None or df.empty) and last is not None:
+            df = self.source.fetch(symbol, interval)  # initial history, merged from `last` below
+        if df is None or df.empty:
+            return tail.frame(tail.n)
+        if last is not None:
+            df = df[df['Datetime'] >= last]
+            if df.empty:
+                return tail.frame(tail.n)
+        tail.tz = str(df['Datetime'].dt.tz)
+        start = tail.merge(df)
+        changed = tail.frame(start)
+        self._persist(symbol, interval, changed)
+        return changed
+
+    def bars(self, symbol, interval, lookback=None):
+        """Stored bars (most recent `lookback` if given) without copying OHLCV"""
+        tail = self._tail(symbol, interval)
+        start = max(0, tail.n - lookback) if lookback else 0
+        return tail.frame(start)
+
+    def arrays(self, symbol, interval):
+        """Raw column views: {'Datetime': int64 ns UTC, 'Open': ..., ...}"""
+        tail = self._tail(symbol, interval)
+        views = {c: v[:tail.n] for c, v in tail.cols.items()}
+        views['Datetime'] = tail.ts[:tail.n]
+        return views
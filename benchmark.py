@@ -0,0 +1,509 @@
+"""
+V8.0 BENCHMARK SUITE
+Offline, reproducible timings for the hot paths, on seeded synthetic NSE
+session bars (or a recorded OHLCV file):
+
+  indicators  compute_indicators (pandas_ta) and the streaming engine (full
+              replay and the per-poll forming-bar update) at 1k / 100k / 10M bars
+  signals     check_signal throughput on one-row frames and on bar mappings
+  manage      manage_trade replay, including state and ledger writes
+  api         /chart and /trades latency under concurrent in-process clients
+  state       state store save / load / reader refresh
+  feed        shared market feed: publish a forming bar, latest row, session read
+  screener    panel indicators + rules over a 500-symbol universe
+
+Every result is a lower-is-better time. Results go to a JSON file; with
+--baseline the run is compared against an earlier one and exits 1 when a
+benchmark is slower by more than --threshold.
+Run: python benchmark.py --out bench.json
+     python benchmark.py --only indicators,api --sizes 1000,100000
+     python benchmark.py --out new.json --baseline bench.json --threshold 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+DEFAULT_SIZES = (1_000, 100_000, 10_000_000)
+STREAMING_MAX_BARS = 1_000_000   # per-bar Python replay; larger sizes would take minutes
+                                 # (and the frame benchmarks run once instead of --repeat times)
+SESSION_MINUTES = 375            # 09:15-15:30 IST, 1m bars
+SIGNAL_FRAMES = 2_000
+MANAGE_BARS = 20_000
+API_REQUESTS = 400
+API_CONCURRENCY = 8
+API_TRADES = 5_000
+STATE_SAVES = 1_000
+SCREENER_SYMBOLS = 500
+LEAN_COLUMNS = ("EMA20", "EMA50", "ATR", "ADX", "Supertrend_Direction", "Volume_Ratio")
+THRESHOLD = 0.20
+
+
+def synthetic_bars(n, seed=0, start="2000-01-03"):
+    """n seeded 1m bars over consecutive NSE sessions (random-walk prices)"""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, periods=n // SESSION_MINUTES + 1)
+    i = np.arange(n)
+    times = (days[i // SESSION_MINUTES] + pd.Timedelta(hours=9, minutes=15)
+             + pd.to_timedelta(i % SESSION_MINUTES, unit="min"))
+    close = 20000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.0008, n)))
+    open_ = np.concatenate([[20000.0], close[:-1]])
+    wick = np.abs(rng.normal(0.0, 0.0005, (2, n)))
+    return pd.DataFrame({
+        "Datetime": times.tz_localize("Asia/Kolkata"),
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + wick[0]),
+        "Low": np.minimum(open_, close) * (1 - wick[1]),
+        "Close": close,
+        "Volume": rng.lognormal(10.0, 0.5, n).round(),
+    })
+
+
+class Bars:
+    """Bar source for the run: the synthetic series, or a recorded CSV cut to size"""
+
+    def __init__(self, csv=None, seed=0):
+        self.seed = seed
+        self.recorded = None
+        if csv:
+            from bar_store import _clean
+            self.recorded = _clean(pd.read_csv(csv))
+
+    def get(self, n):
+        if self.recorded is None:
+            return synthetic_bars(n, self.seed)
+        if n > len(self.recorded):
+            return None
+        return self.recorded.iloc[:n].reset_index(drop=True)
+
+
+def _measure(fn, repeat, setup=None):
+    """Median / min wall time of `repeat` runs of fn(setup())"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), min(times)
+
+
+def _result(name, seconds, best=None, **extra):
+    return {"name": name, "value": seconds, "unit": "s",
+            **({"min": best} if best is not None else {}), **extra}
+
+
+def _skip(name, reason):
+    return {"name": name, "skipped": reason}
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the bot's per-trade prints while timing"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _bot(workdir, name="bench"):
+    import live_paper_trade_v8 as v8
+    from bar_store import BarStore, FileSource
+    with _quiet():
+        return v8.LiveBotV8(state_file=os.path.join(workdir, f"{name}_state.json"),
+                            trades_file=os.path.join(workdir, f"{name}_trades.csv"),
+                            client=None, store=BarStore(os.path.join(workdir, "market_data"),
+                                                        source=FileSource(workdir)))
+
+
+# Benchmarks
+
+def bench_indicators(args, bars, workdir):
+    from indicators import StreamingIndicators
+    try:
+        import live_paper_trade_v8 as v8
+        import pandas_ta  # noqa: F401
+    except ImportError as e:
+        v8 = None
+        missing = str(e)
+
+    for n in args.sizes:
+        df = bars.get(n)
+        if df is None:
+            yield _skip(f"indicators.pandas_ta[{n}]", "recorded file is shorter")
+            continue
+        repeat = args.repeat if n <= STREAMING_MAX_BARS else 1
+        if v8 is None:
+            yield _skip(f"indicators.pandas_ta[{n}]", missing)
+        else:
+            median, best = _measure(v8.compute_indicators, repeat, setup=df.copy)
+            yield _result(f"indicators.pandas_ta[{n}]", median, best, us_per_bar=median / n * 1e6)
+        if n <= STREAMING_MAX_BARS:
+            median, best = _measure(lambda: StreamingIndicators().update_frame(df), args.repeat)
+            yield _result(f"indicators.streaming[{n}]", median, best, us_per_bar=median / n * 1e6)
+            # Only the groups a trend-only strategy reads (strategies.py lazy indicators)
+            median, best = _measure(lambda: StreamingIndicators(LEAN_COLUMNS).update_frame(df), args.repeat)
+            yield _result(f"indicators.streaming_lean[{n}]", median, best, us_per_bar=median / n * 1e6)
+        else:
+            yield _skip(f"indicators.streaming[{n}]", f"over {STREAMING_MAX_BARS} bars")
+        del df
+
+    # Steady state of fetch_data: revise the forming bar on a warm engine
+    ind = StreamingIndicators()
+    warm = bars.get(1_000)
+    if warm is None:
+        warm = synthetic_bars(1_000, bars.seed)
+    ind.update_frame(warm)
+    last = warm.iloc[-1]
+    updates = 10_000
+
+    def revise():
+        for k in range(updates):
+            ind.update(last['Datetime'], last['Open'], last['High'], last['Low'],
+                       last['Close'] + k % 7, last['Volume'])
+    median, best = _measure(revise, args.repeat)
+    yield _result("indicators.forming_bar_update", median / updates, best / updates)
+
+
+def bench_signals(args, bars, workdir):
+    from indicators import StreamingIndicators
+    bot = _bot(workdir, "signals")
+    ind = StreamingIndicators()
+    frames = []
+    df = bars.get(SIGNAL_FRAMES + 300)
+    if df is None:
+        yield _skip("signals.check_signal", "recorded file is shorter")
+        return
+    for row in df.itertuples(index=False):
+        ind.update(row.Datetime, row.Open, row.High, row.Low, row.Close, row.Volume)
+        frames.append(ind.frame())
+    frames = frames[-SIGNAL_FRAMES:]
+    rows = [frame.iloc[-1].to_dict() for frame in frames]
+    found = []
+
+    for name, inputs in (("signals.check_signal", frames), ("signals.check_signal_row", rows)):
+        def scan():
+            found[:] = [bot.check_signal(bar) for bar in inputs]
+        with _quiet():
+            median, best = _measure(scan, args.repeat)
+        yield _result(name, median / len(inputs), best / len(inputs),
+                      calls_per_sec=len(inputs) / median, signals=sum(1 for s in found if s))
+
+
+def bench_manage(args, bars, workdir):
+    df = bars.get(MANAGE_BARS)
+    if df is None:
+        yield _skip("manage.replay", "recorded file is shorter")
+        return
+    high, low, close = (df[c].to_numpy() for c in ("High", "Low", "Close"))
+
+    def replay(bot):
+        for i in range(len(close)):
+            if bot.state['active_trade'] is None:
+                risk = close[i] * 0.002
+                side = 1 if i % 2 else -1
+                signal = {"type": "BUY" if side > 0 else "SELL", "entry": close[i],
+                          "sl": close[i] - side * risk, "tp1": close[i] + side * 2 * risk,
+                          "tp2": close[i] + side * 4 * risk, "risk": risk,
+                          "confluence": 5, "reasons": ["EMA", "ADX"]}
+                bot.execute_trade(signal, 10, 9.0, "benchmark")
+                continue
+            bot.manage_trade(close[i], high[i], low[i])
+
+    runs = []
+
+    def fresh_bot():
+        bot = _bot(workdir, f"manage{len(runs)}")
+        runs.append(bot)
+        return bot
+    with _quiet():
+        median, best = _measure(replay, args.repeat, setup=fresh_bot)
+    trades = len(runs[-1].ledger.since()) if runs[-1].ledger.refresh() else 0
+    yield _result("manage.replay", median / len(close), best / len(close),
+                  bars=len(close), closed_trades=trades, bars_per_sec=len(close) / median)
+
+
+def bench_api(args, bars, workdir):
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        yield _skip("api", str(e))
+        return
+    from state_store import StateStore
+    from trade_ledger import TradeLedger
+
+    # Fixtures the server reads: 5 sessions of 5m bars, a ledger and a state journal
+    session = bars.get(5 * SESSION_MINUTES)
+    if session is None:
+        session = synthetic_bars(5 * SESSION_MINUTES, args.seed)
+    five = (session.set_index('Datetime').resample('5min')
+            .agg({"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"})
+            .dropna().reset_index())
+    five.to_csv(os.path.join(workdir, "NSEI_5m.csv"), index=False)
+    ledger = TradeLedger(os.path.join(workdir, "live_trades.db"))
+    ledger.record_many([{"symbol": "^NSEI", "type": "BUY", "exit_time": f"2024-01-01 10:{i % 60:02d}:00",
+                         "pnl": float(i % 7 - 3), "total_pnl": float(i % 7 - 3), "reason": "TP2",
+                         "balance": 30000.0 + i} for i in range(API_TRADES)])
+    ledger.close()
+    with _quiet():
+        StateStore(os.path.join(workdir, "live_state.db")).save({"balance": 30000.0, "active_trade": None})
+
+    cwd = os.getcwd()
+    os.environ["OFFLINE_DATA_DIR"] = workdir
+    os.chdir(workdir)
+    try:
+        import api_server
+        client = TestClient(api_server.app)
+        client.get("/chart")  # first bar-store load and refresh outside the timings
+        client.get("/trades")
+        chart_rows = len(json.loads(client.get("/chart").content))
+        etag = client.get("/chart").headers.get("etag", "")
+        cases = {
+            "chart": ("/chart", {}),
+            "chart_since": (f"/chart?since={max(0, chart_rows - 2)}", {}),
+            "chart_304": ("/chart", {"If-None-Match": etag}),
+            "chart_days_lttb": ("/chart?days=5&points=200&layout=columns", {}),
+            "chart_arrow": ("/chart?days=5", {"Accept": "application/vnd.apache.arrow.stream"}),
+            "trades": ("/trades", {}),
+            "trades_columns": ("/trades?layout=columns", {}),
+            "trades_since": (f"/trades?since={API_TRADES - 10}", {}),
+            "state": ("/state", {}),
+        }
+        for name, (url, headers) in cases.items():
+            def call(_):
+                started = time.perf_counter()
+                response = client.get(url, headers=headers)
+                elapsed = time.perf_counter() - started
+                if response.status_code not in (200, 304):
+                    raise RuntimeError(f"{url}: HTTP {response.status_code}")
+                return elapsed
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                latencies = sorted(pool.map(call, range(API_REQUESTS)))
+            wall = time.perf_counter() - started
+            yield _result(f"api.{name}", latencies[int(len(latencies) * 0.95)], latencies[0],
+                          metric="p95", p50=latencies[len(latencies) // 2],
+                          p99=latencies[int(len(latencies) * 0.99)],
+                          requests_per_sec=len(latencies) / wall, concurrency=args.concurrency)
+    finally:
+        os.chdir(cwd)
+
+
+def bench_state(args, bars, workdir):
+    from state_store import StateReader, StateStore
+    state = {"balance": 30000.0, "active_trade": None, "consecutive_wins": 0,
+             "consecutive_losses": 0, "last_update": ""}
+    trade = {"entry_time": "2024-01-01 10:00:00", "type": "BUY", "entry": 21500.0, "sl": 21480.0,
+             "tp1": 21540.0, "tp2": 21580.0, "qty": 10, "original_qty": 10, "tp1_hit": False,
+             "ai_score": 9.0, "ai_reasoning": "benchmark", "initial_sl": 21480.0, "risk": 20.0,
+             "confluence": 5, "signals": ["EMA", "ADX", "MACD", "VWAP", "RSI"], "partial_pnl": 0.0}
+    path = os.path.join(workdir, "state.db")
+    store = StateStore(path, export_path=os.path.join(workdir, "state.json"))
+    store.load()
+
+    def saves():
+        for i in range(STATE_SAVES):
+            state['balance'] += 1.0
+            state['active_trade'] = dict(trade) if i % 2 else None
+            state['last_update'] = str(i)
+            store.save(state)
+    median, best = _measure(saves, args.repeat)
+    yield _result("state.save", median / STATE_SAVES, best / STATE_SAVES)
+    store.close()
+
+    def load():
+        s = StateStore(path)
+        s.load()
+        s.close()
+    median, best = _measure(load, args.repeat)
+    yield _result("state.load", median, best)
+
+    reader = StateReader(path)
+    reader.read()
+    reads = 10_000
+
+    def cached_reads():
+        for _ in range(reads):
+            reader.read()
+    median, best = _measure(cached_reads, args.repeat)
+    yield _result("state.reader_cached", median / reads, best / reads)
+
+
+def bench_feed(args, bars, workdir):
+    from bar_store import BarStore, FileSource
+    from market_feed import FeedProducer, FeedReader
+    session = bars.get(5 * SESSION_MINUTES)
+    if session is None:
+        session = synthetic_bars(5 * SESSION_MINUTES, args.seed)
+    session.to_csv(os.path.join(workdir, "FEED_1m.csv"), index=False)
+    path = os.path.join(workdir, "FEED_1m.feed")
+    producer = FeedProducer(BarStore(os.path.join(workdir, "feed_data"), source=FileSource(workdir)),
+                            "FEED", "1m", path)
+    producer.step()
+    writer, reader = producer.writer, FeedReader(path)
+    ts = writer.ts[writer.count - 1:writer.count].copy()
+    data = writer.data[:, (writer.count - 1) % writer.capacity][:, None].copy()
+    updates = 10_000
+
+    def publish():
+        for _ in range(updates):
+            writer.write(writer.count - 1, ts, data)
+    median, best = _measure(publish, args.repeat)
+    yield _result("feed.publish_forming_bar", median / updates, best / updates)
+
+    def latest():
+        for _ in range(updates):
+            reader.latest()
+    median, best = _measure(latest, args.repeat)
+    yield _result("feed.latest", median / updates, best / updates)
+
+    median, best = _measure(lambda: reader.frame(SESSION_MINUTES), args.repeat)
+    yield _result("feed.read_session", median, best, rows=SESSION_MINUTES)
+    reader.close()
+    writer.close()
+
+
+def bench_screener(args, bars, workdir):
+    import screener
+    frames = {f"SYM{i}": synthetic_bars(screener.LOOKBACK, args.seed + i) for i in range(SCREENER_SYMBOLS)}
+    median, best = _measure(lambda: screener.build_panel(frames), args.repeat)
+    yield _result("screener.build_panel", median, best, symbols=SCREENER_SYMBOLS)
+    _, _, panel = screener.build_panel(frames)
+    median, best = _measure(lambda: screener.panel_indicators(panel), args.repeat)
+    yield _result("screener.panel_indicators", median, best, symbols=SCREENER_SYMBOLS,
+                  bars=screener.LOOKBACK)
+
+
+BENCHMARKS = {
+    "indicators": bench_indicators,
+    "signals": bench_signals,
+    "manage": bench_manage,
+    "api": bench_api,
+    "state": bench_state,
+    "feed": bench_feed,
+    "screener": bench_screener,
+}
+
+
+# Results
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    bars = Bars(args.csv, args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="v8bench_") as workdir:
+        for group in args.only:
+            group_dir = os.path.join(workdir, group)
+            os.makedirs(group_dir)
+            try:
+                for result in BENCHMARKS[group](args, bars, group_dir):
+                    results[result['name']] = result
+                    _print_result(result)
+            except Exception as e:
+                print(f"❌ {group}: {e}")
+                results[group] = _skip(group, f"error: {e}")
+    return {
+        "meta": {
+            "timestamp": str(datetime.now()),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "source": args.csv or "synthetic",
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def _fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.2f}µs"
+
+
+def _print_result(result):
+    if "skipped" in result:
+        print(f"   {result['name']:<36} skipped ({result['skipped']})")
+    else:
+        print(f"   {result['name']:<36} {_fmt(result['value']):>10}  {result.get('metric', 'median')}")
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """[(name, baseline, current, change)] for benchmarks in both runs; change is a ratio - 1"""
+    rows = []
+    for name, current in results['results'].items():
+        base = baseline['results'].get(name)
+        if not base or "value" not in base or "value" not in current or base['value'] <= 0:
+            continue
+        rows.append((name, base['value'], current['value'], current['value'] / base['value'] - 1))
+    regressions = [r for r in rows if r[3] > threshold]
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 benchmark suite")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help=f"Comma-separated groups ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="Bar counts for the indicator benchmarks")
+    parser.add_argument("--csv", help="Recorded OHLCV file instead of synthetic bars")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=API_CONCURRENCY)
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Allowed slowdown vs the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    args.only = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = [g for g in args.only if g not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark group(s): {', '.join(unknown)}")
+    args.sizes = [int(n) for n in args.sizes.split(",") if n]
+
+    print(f"⏱️ V8.0 benchmarks: {', '.join(args.only)} (repeat {args.repeat}, seed {args.seed})")
+    results = run(args)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.threshold)
+        print(f"📊 vs {args.baseline} ({baseline['meta'].get('commit')}), threshold +{args.threshold:.0%}")
+        for name, base, current, change in rows:
+            flag = "⚠️" if change > args.threshold else "  "
+            print(f"{flag} {name:<36} {_fmt(base):>10} -> {_fmt(current):>10}  {change:+.1%}")
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) over +{args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
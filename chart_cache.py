@@ -0,0 +1,213 @@
+"""
+V8.0 CHART CACHE
+Shared in-process cache behind the dashboard's /chart endpoint. The latest
+session is refreshed at most once per bar (or once per publish when reading
+the shared market feed), and the JSON body is serialized once per refresh so
+every connected dashboard gets the same pre-encoded bytes.
+
+EMA20 / EMA50 / Supertrend are the bot's streaming indicators: read from
+the market feed when MARKET_FEED_DIR is set, computed over the stored bars
+otherwise.
+
+Multi-day views (days=N) and LTTB-downsampled views (points=N) are built
+lazily from the same refresh and cached until the next one; bodies are
+encoded by wire_format (rows / columns JSON or Arrow IPC).
+"""
+
+import bisect
+import threading
+import time
+import zlib
+import numpy as np
+
+from accel import njit
+from market_feed import FeedReader, with_indicators
+from wire_format import encode
+
+INTERVAL_SECONDS = {"1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600}
+RETRY_SECONDS = 60       # re-poll delay once the current bar has closed (e.g. market shut)
+
+
+def _nullable(values):
+    return [None if v != v else v for v in values.tolist()]
+
+
+@njit(cache=True)
+def lttb_indices(y, threshold):
+    """Largest-Triangle-Three-Buckets over (bar index, y): `threshold` row indices,
+    first and last included, that keep the visual shape of the series"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    out = np.empty(threshold, dtype=np.int64)
+    out[0] = 0
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        for j in range(next_start, next_end):
+            avg_x += j
+            avg_y += y[j]
+        avg_x /= next_end - next_start
+        avg_y /= next_end - next_start
+
+        chosen = start = int(i * every) + 1
+        best = -1.0
+        for j in range(start, int((i + 1) * every) + 1):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a]))
+            if area > best:
+                best = area
+                chosen = j
+        out[i + 1] = chosen
+        a = chosen
+    out[threshold - 1] = n - 1
+    return out
+
+
+def chart_columns(df, time_format='%H:%M'):
+    """Bars with indicator columns -> dict of JSON-ready column lists"""
+    return {
+        "time": df['Datetime'].dt.strftime(time_format).tolist(),
+        "open": df['Open'].to_numpy(dtype=np.float64).tolist(),
+        "high": df['High'].to_numpy(dtype=np.float64).tolist(),
+        "low": df['Low'].to_numpy(dtype=np.float64).tolist(),
+        "close": df['Close'].to_numpy(dtype=np.float64).tolist(),
+        "volume": df['Volume'].fillna(0).to_numpy(dtype=np.int64).tolist(),
+        "ema20": _nullable(df['EMA20'].to_numpy(dtype=np.float64)),
+        "ema50": _nullable(df['EMA50'].to_numpy(dtype=np.float64)),
+        "supertrend": _nullable(df['Supertrend'].to_numpy(dtype=np.float64)),
+    }
+
+
+class ChartCache:
+    """Latest-session chart for one symbol, refreshed at most once per bar"""
+
+    def __init__(self, store, symbol="^NSEI", interval="5m", retry=RETRY_SECONDS, feed=None):
+        self.store = store
+        self.feed_path = feed  # market_feed file; None = fetch through the store
+        self.feed = None
+        self._feed_seq = None
+        self.symbol = symbol
+        self.interval = interval
+        self.bar_seconds = INTERVAL_SECONDS.get(interval, 300)
+        self.retry = retry
+        self.columns = {}
+        self.history = None  # every bar read at the last refresh, with indicators
+        self.views = {}      # (days, points) -> columns, since the last refresh
+        self.payloads = {("rows", 1, None): b"[]", ("columns", 1, None): b"{}"}
+        self.version = "0"
+        self.next_refresh = 0.0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+
+    def _due(self):
+        if self.feed is not None:
+            return self.feed.seq != self._feed_seq
+        return time.time() >= self.next_refresh
+
+    def _bars(self):
+        """Stored bars with indicators, from the market feed or the bar store"""
+        if self.feed_path:
+            if self.feed is None:
+                self.feed = FeedReader(self.feed_path)
+            self._feed_seq = self.feed.seq
+            return self.feed.frame()
+        self.store.refresh(self.symbol, self.interval)
+        return self.store.bars(self.symbol, self.interval)
+
+    def refresh(self):
+        """Pull new bars and rebuild the session payloads (other views on demand)"""
+        bars = self._bars()
+        now = time.time()
+        if bars.empty:
+            self.next_refresh = now + self.retry
+            return
+
+        session = bars['Datetime'].iloc[-1].normalize()
+        if self.feed is None:
+            # Indicators need the history before the session (EMA50 seeds on 50 bars)
+            bars = with_indicators(bars)
+        df = bars[bars['Datetime'] >= session]
+        columns = chart_columns(df)
+        payloads = {("rows", 1, None): encode(columns, "rows"), ("columns", 1, None): encode(columns, "columns")}
+        self.history, self.views = bars, {(1, None): columns}
+        self.columns, self.payloads = columns, payloads
+        self.refreshes += 1
+        # Content hash of the session, stable across no-op refreshes
+        self.version = f"{zlib.crc32(payloads[('columns', 1, None)]):08x}"
+        # The last bar is still forming until its interval ends
+        bar_end = bars['Datetime'].iloc[-1].timestamp() + self.bar_seconds
+        self.next_refresh = bar_end if bar_end > now else now + self.retry
+
+    def ensure_fresh(self):
+        """Refresh if the current bar has closed; only the first caller pays for it"""
+        if self._due():
+            with self._lock:
+                if self._due():
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        print(f"Chart error: {e}")
+                        self.next_refresh = time.time() + self.retry
+        return self.version
+
+    def session(self):
+        """(version, columns) of the current session, both from the same refresh"""
+        self.ensure_fresh()
+        with self._lock:
+            return self.version, self.columns
+
+    def view(self, days=1, points=None):
+        """Columns for the last `days` sessions, LTTB-downsampled on Close to
+        `points` bars if given. Multi-day times are "YYYY-MM-DD HH:MM"."""
+        with self._lock:
+            return self._view(max(1, days), points)
+
+    def _view(self, days, points):
+        # Caller holds the lock: refresh() swaps history / views / version under it
+        key = (days, points)
+        columns = self.views.get(key)
+        if columns is not None or self.history is None:
+            return columns if columns is not None else self.columns
+        if days == 1:
+            columns = self.columns
+        else:
+            times = self.history['Datetime']
+            sessions = times.dt.normalize().unique()
+            df = self.history[times >= sessions[-min(days, len(sessions))]]
+            columns = chart_columns(df, '%Y-%m-%d %H:%M')
+        if points:
+            keep = lttb_indices(np.asarray(columns['close'], dtype=np.float64), points).tolist()
+            columns = {k: [v[i] for i in keep] for k, v in columns.items()}
+        self.views[key] = columns
+        return columns
+
+    def get(self, layout="rows", since=None, days=1, points=None):
+        """(version, body) for the session (or a days / points view), or only the
+        bars from `since` on. Both come from the same refresh, and body is a
+        callable that encodes on first use, so a 304 never builds it.
+        `since` is a row offset into the view or a bar time ("HH:MM", or
+        "YYYY-MM-DD HH:MM" for multi-day views); the bar at the cursor is
+        included because the last bar keeps changing until it closes."""
+        self.ensure_fresh()
+        with self._lock:
+            version, payloads = self.version, self.payloads
+            columns = self._view(max(1, days), points)
+
+        def body():
+            if since is None or since == "" or not columns:
+                key = (layout, days, points)
+                content = payloads.get(key)
+                if content is None:
+                    content = payloads[key] = encode(columns, layout)
+                return content
+            try:
+                start = max(0, int(since))
+            except ValueError:
+                start = bisect.bisect_left(columns['time'], since)
+            return encode({k: v[start:] for k, v in columns.items()}, layout)
+        return version, body
@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import axios from 'axios';
 import { TrendingUp, Activity, DollarSign, Brain, Clock, RefreshCw, AlertTriangle, Table, Trophy, Target } from 'lucide-react';
 
@@ -54,16 +54,50 @@ export default function Dashboard() {
   const [error, setError] = useState<string | null>(null);
   const [retrying, setRetrying] = useState(false);
   const [lastUpdate, setLastUpdate] = useState<string>('');
+  const tradesCursor = useRef(0);
+  const resyncing = useRef(false);
+
+  // Trades arrive as slices starting at `from`; a gap or a reset means resync from 0
+  const applyTrades = (from: number, rows: Trade[], next: number) => {
+    const cursor = tradesCursor.current;
+    if (from > 0 && (next < cursor || from > cursor)) {
+      resyncTrades();
+      return;
+    }
+    tradesCursor.current = next;
+    setTrades(prev => (from === 0 ? rows : rows.length ? [...prev.slice(0, from), ...rows] : prev));
+  };
+
+  const loadTrades = async (since: number) => {
+    const res = await axios.get(`${API_URL}/trades`, { params: { since }, timeout: 30000 });
+    // The cursor moved (SSE or another request) while this one was in flight: its slice is stale
+    if (tradesCursor.current !== since || !Array.isArray(res.data)) return;
+    const next = Number(res.headers['x-next-cursor'] ?? since + res.data.length);
+    applyTrades(since, res.data as Trade[], next);
+  };
+
+  // Polling is off while the stream is open, so a gap is refilled with a full fetch
+  const resyncTrades = async () => {
+    if (resyncing.current) return;
+    resyncing.current = true;
+    tradesCursor.current = 0;
+    try {
+      await loadTrades(0);
+    } catch (err) {
+      console.error('Error resyncing trades:', err);
+    } finally {
+      resyncing.current = false;
+    }
+  };
 
   const fetchData = async () => {
     try {
       setError(null);
-      const [stateRes, tradesRes] = await Promise.all([
+      const [stateRes] = await Promise.all([
         axios.get(`${API_URL}/state`, { timeout: 30000 }),
-        axios.get(`${API_URL}/trades`, { timeout: 30000 })
+        loadTrades(tradesCursor.current)
       ]);
       setState(stateRes.data);
-      setTrades(Array.isArray(tradesRes.data) ? tradesRes.data : []);
       setLoading(false);
       setLastUpdate(new Date().toLocaleTimeString('en-IN'));
     } catch (err: any) {
@@ -91,8 +125,39 @@ export default function Dashboard() {
 
   useEffect(() => {
     fetchData();
-    const interval = setInterval(fetchData, 10000);
-    return () => clearInterval(interval);
+    // Live updates are pushed over SSE; fall back to polling while the stream is down
+    let poll: ReturnType<typeof setInterval> | null = null;
+    const startPolling = () => {
+      if (!poll) poll = setInterval(fetchData, 10000);
+    };
+    const stopPolling = () => {
+      if (poll) clearInterval(poll);
+      poll = null;
+    };
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return stopPolling;
+    }
+
+    const source = new EventSource(`${API_URL}/stream`);
+    source.onopen = () => {
+      stopPolling();
+      setError(null);
+    };
+    source.onerror = startPolling;  // EventSource keeps reconnecting on its own
+    source.addEventListener('state', (e) => {
+      setState(JSON.parse((e as MessageEvent).data));
+      setLoading(false);
+      setLastUpdate(new Date().toLocaleTimeString('en-IN'));
+    });
+    source.addEventListener('trades', (e) => {
+      const msg = JSON.parse((e as MessageEvent).data);
+      applyTrades(msg.from, msg.rows, msg.cursor);
+    });
+    return () => {
+      source.close();
+      stopPolling();
+    };
   }, []);
 
   useEffect(() => {
@@ -0,0 +1,152 @@
+"""
+V8.0 INTRABAR FILL SIMULATION
+Resolves the order in which a bar touched TP1, SL and TP2, and prices the
+fills with slippage and costs. Used by LiveBotV8.manage_trade (one bar or
+tick at a time) and by the backtest kernel, which walks the 1m bars (or
+ticks) inside each traded bar when they are available.
+
+Intrabar order rules, for a bar whose range covers several levels:
+  legacy   TP1 first, then SL (at breakeven once TP1 filled), then TP2
+           (the original manage_trade checks)
+  worst    the adverse extreme is visited first: O -> adverse -> favourable -> C
+  best     the favourable extreme first
+  nearest  the extreme nearer to the open first (common OHLC path assumption)
+Outside "legacy", a bar that opens beyond the stop fills at the open (gap).
+A tick is a bar with O = H = L = C, so every rule gives the same answer.
+
+Stops are market orders and pay `slippage_bps`; targets are limit orders and
+fill at their price. Every fill pays `cost_bps` of its notional plus
+`fee_per_order`.
+"""
+
+import numpy as np
+import pandas as pd
+
+from accel import njit
+
+RULES = {"legacy": 0, "worst": 1, "best": 2, "nearest": 3}
+LEGACY, WORST, BEST, NEAREST = 0, 1, 2, 3
+NO_EXIT, EXIT_SL, EXIT_TP2 = -1, 0, 1
+
+
+@njit(cache=True)
+def walk_bar(side, entry, sl, tp1, tp2, tp1_hit, open_, high, low, close, rule):
+    """Walk one bar (or tick) against an open trade.
+
+    Returns (tp1_filled, exit_code, exit_price): tp1_filled is True when TP1
+    filled on this bar (the stop then sits at `entry`); exit_code is NO_EXIT,
+    EXIT_SL or EXIT_TP2. Prices are mirrored for SELLs (x = side * price), so
+    the stop is always below and the targets above.
+    """
+    s, e, t1, t2 = side * sl, side * entry, side * tp1, side * tp2
+    xo, xc = side * open_, side * close
+    hi, lo = max(side * high, side * low), min(side * high, side * low)
+    filled = False
+
+    if rule == LEGACY:
+        if not tp1_hit and hi >= t1:
+            filled = True
+            s = e
+        if lo <= s:
+            return filled, EXIT_SL, side * s
+        if hi >= t2:
+            return filled, EXIT_TP2, tp2
+        return filled, NO_EXIT, np.nan
+
+    # Gap: the bar opens beyond a level
+    if xo <= s:
+        return filled, EXIT_SL, open_
+    if not tp1_hit and xo >= t1:
+        filled = True
+        s = e
+    if xo >= t2:
+        return filled, EXIT_TP2, tp2
+
+    if rule == WORST or (rule == NEAREST and xo - lo <= hi - xo):
+        first, second = lo, hi
+    else:
+        first, second = hi, lo
+    prev = xo
+    for x in (first, second, xc):
+        if x < prev:
+            if x <= s:
+                return filled, EXIT_SL, side * s
+        elif x > prev:
+            if not (tp1_hit or filled) and x >= t1:
+                filled = True
+                s = e
+            if x >= t2:
+                return filled, EXIT_TP2, tp2
+        prev = x
+    return filled, NO_EXIT, np.nan
+
+
+@njit(cache=True)
+def slip(price, order_side, slippage_bps):
+    """Market fill price: buys (+1) pay up, sells (-1) receive less"""
+    return price * (1.0 + order_side * slippage_bps / 10000.0)
+
+
+@njit(cache=True)
+def order_cost(price, qty, cost_bps, fee_per_order):
+    """Charges for one fill (taxes / exchange fees in bps of notional plus a flat fee)"""
+    return abs(price * qty) * cost_bps / 10000.0 + fee_per_order
+
+
+def _wall_ns(times):
+    """datetime-like -> int64 ns of local wall time (tz dropped, like _bar_days)"""
+    times = pd.to_datetime(pd.Series(times))
+    if times.dt.tz is not None:
+        times = times.dt.tz_localize(None)
+    return times.to_numpy().astype('datetime64[ns]').astype(np.int64)
+
+
+class SubBars:
+    """Lower-timeframe bars (or ticks) aligned to the traded bars.
+
+    Bar i owns sub-bars start[i]:end[i], i.e. those stamped in
+    [bar_time[i], min(bar_time[i + 1], bar_time[i] + interval)).
+    """
+
+    def __init__(self, bar_times, sub, interval_minutes):
+        if 'Close' not in sub.columns:  # ticks (Datetime, Price[, Volume])
+            price = sub['Price'].to_numpy(dtype=np.float64)
+            sub = pd.DataFrame({"Datetime": sub['Datetime'], "Open": price, "High": price,
+                                "Low": price, "Close": price})
+        time_col = 'Datetime' if 'Datetime' in sub.columns else 'Date'
+        sub_ns = _wall_ns(sub[time_col])
+        order = np.argsort(sub_ns, kind='stable')
+        sub_ns = sub_ns[order]
+        self.open = sub['Open'].to_numpy(dtype=np.float64)[order]
+        self.high = sub['High'].to_numpy(dtype=np.float64)[order]
+        self.low = sub['Low'].to_numpy(dtype=np.float64)[order]
+        self.close = sub['Close'].to_numpy(dtype=np.float64)[order]
+
+        bar_ns = _wall_ns(bar_times)
+        bar_end = bar_ns + np.int64(interval_minutes * 60 * 10**9)
+        bar_end[:-1] = np.minimum(bar_end[:-1], bar_ns[1:])
+        self.start = np.searchsorted(sub_ns, bar_ns, side='left').astype(np.int64)
+        self.end = np.maximum(np.searchsorted(sub_ns, bar_end, side='left'), self.start).astype(np.int64)
+
+    @classmethod
+    def empty(cls, n_bars):
+        """No lower-timeframe data: every bar is walked as a whole"""
+        sub = cls.__new__(cls)
+        sub.open = sub.high = sub.low = sub.close = np.zeros(0)
+        sub.start = sub.end = np.zeros(n_bars, dtype=np.int64)
+        return sub
+
+    def arrays(self):
+        return self.open, self.high, self.low, self.close, self.start, self.end
+
+    def coverage(self):
+        """Share of traded bars that have at least one sub-bar"""
+        return float((self.end > self.start).mean()) if len(self.start) else 0.0
+
+
+def load(path):
+    """1m bars or ticks from CSV / Parquet"""
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+    df[time_col] = pd.to_datetime(df[time_col])
+    return df
@@ -0,0 +1,332 @@
+"""
+V8.0 STREAMING INDICATORS
+Incremental O(1)-per-bar versions of the pandas_ta indicators used by
+compute_indicators(). Appending a bar or revising the still-forming bar costs
+a few microseconds instead of a full-frame recomputation.
+
+Every state is an immutable tuple, so a revision simply recomputes the
+forming bar from the state of the last closed bar.
+
+An engine built with `columns` only runs the indicator groups those columns
+need (a strategy that never reads Bollinger Bands does not pay for them);
+the other columns stay NaN.
+"""
+
+import math
+import os
+import pickle
+import pandas as pd
+
+NAN = float('nan')
+SNAPSHOT_VERSION = 2
+
+COLUMNS = ["EMA20", "EMA50", "EMA200", "ATR", "ADX", "MACD", "MACD_SIGNAL", "VWAP",
+           "BB_LOWER", "BB_MID", "BB_UPPER", "Supertrend", "Supertrend_Direction", "RSI",
+           "Stoch_RSI", "Volume_Ratio"]
+
+# Indicator groups of _step -> the columns each one produces
+GROUPS = {
+    "ema20": ("EMA20",), "ema50": ("EMA50",), "ema200": ("EMA200",), "atr": ("ATR",),
+    "adx": ("ADX",), "macd": ("MACD", "MACD_SIGNAL"), "vwap": ("VWAP",),
+    "bb": ("BB_LOWER", "BB_MID", "BB_UPPER"), "supertrend": ("Supertrend", "Supertrend_Direction"),
+    "rsi": ("RSI",), "stoch_rsi": ("Stoch_RSI",), "volume": ("Volume_Ratio",),
+}
+GROUP_OF = {column: group for group, columns in GROUPS.items() for column in columns}
+DEPENDS = {"adx": ("atr",), "stoch_rsi": ("rsi",)}
+
+
+def _ewm(state, x, alpha, adjust, min_periods):
+    """One step of pandas' ewm().mean() recurrence (ignore_na=False).
+
+    state is (nobs, weighted, old_wt). Returns (state, value).
+    """
+    nobs, weighted, old_wt = state
+    observed = x == x
+    if weighted != weighted:
+        if observed:
+            weighted, old_wt = x, 1.0
+    else:
+        old_wt *= 1.0 - alpha
+        if observed:
+            new_wt = 1.0 if adjust else alpha
+            if weighted != x:
+                weighted = (old_wt * weighted + new_wt * x) / (old_wt + new_wt)
+            old_wt = old_wt + new_wt if adjust else 1.0
+    nobs += observed
+    return (nobs, weighted, old_wt), (weighted if nobs >= min_periods else NAN)
+
+
+EWM_START = (0, NAN, 1.0)
+
+
+def rma(state, x, length):
+    """pandas_ta rma: ewm(alpha=1/length, min_periods=length), adjusted"""
+    return _ewm(state, x, 1.0 / length, True, length)
+
+
+def ema(state, x, length):
+    """pandas_ta ema: SMA of the first `length` values, then ewm(span, adjust=False).
+
+    state is (count, seed_sum, ewm_state); NaN inputs before the first value are skipped.
+    """
+    count, total, ewm_state = state
+    if x != x and count == 0:
+        return state, NAN
+    count += 1
+    if count < length:
+        return (count, total + x, ewm_state), NAN
+    if count == length:
+        x = (total + x) / length
+    ewm_state, value = _ewm(ewm_state, x, 2.0 / (length + 1), False, 0)
+    return (count, total, ewm_state), value
+
+
+EMA_START = (0, 0.0, EWM_START)
+
+
+def rolling(window, x, length):
+    """Append x to a fixed-length window; returns (window, full) where full
+    means the window holds `length` non-NaN values (pandas min_periods)."""
+    window = (window + (x,))[-length:]
+    full = len(window) == length and all(v == v for v in window)
+    return window, full
+
+
+def _sma(window, x, length):
+    window, full = rolling(window, x, length)
+    return window, (sum(window) / length if full else NAN)
+
+
+def select_columns(columns):
+    """Normalize a column selection to every column of the groups it needs, in
+    COLUMNS order; None when that is all of them"""
+    if columns is None:
+        return None
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown indicator columns: {sorted(unknown)}")
+    groups = groups_for(columns)
+    selected = tuple(c for c in COLUMNS if GROUP_OF[c] in groups)
+    return None if len(selected) == len(COLUMNS) else selected
+
+
+def groups_for(columns):
+    """Indicator groups (with their dependencies) needed for `columns` (None = all)"""
+    if columns is None:
+        return frozenset(GROUPS)
+    groups = {GROUP_OF[c] for c in columns}
+    for group in list(groups):
+        groups.update(DEPENDS.get(group, ()))
+    return frozenset(groups)
+
+
+class StreamingIndicators:
+    """Rolling indicator state for one symbol/interval.
+
+    update() takes one bar. A bar with the same timestamp as the previous
+    one revises it (the forming bar); a later timestamp closes the previous
+    bar and starts a new one. Values match compute_indicators() up to
+    floating-point rounding. `columns` limits the work to what those
+    columns need (None = all).
+    """
+
+    def __init__(self, columns=None):
+        self.columns = select_columns(columns)
+        self._groups = groups_for(self.columns)
+        self._base = self._initial_state()
+        self._head = self._base
+        self.last_ts = None
+        self.latest = dict.fromkeys(COLUMNS, NAN)
+        self.bar = None
+
+    @staticmethod
+    def _initial_state():
+        return {
+            "n": 0,
+            "prev": (NAN, NAN, NAN),  # high, low, close of the last closed bar
+            "ema20": EMA_START, "ema50": EMA_START, "ema200": EMA_START,
+            "atr": EWM_START, "dmp": EWM_START, "dmn": EWM_START, "adx": EWM_START,
+            "ema12": EMA_START, "ema26": EMA_START, "macd_sig": EMA_START,
+            "vwap": (None, 0.0, 0.0),
+            "bb": (), "vol": (),
+            "st_atr": EWM_START, "st": (1, NAN, NAN),
+            "rsi_up": EWM_START, "rsi_dn": EWM_START, "rsi_win": (), "stoch_k": (),
+        }
+
+    def update(self, ts, open_, high, low, close, volume):
+        """Add or revise one bar and return the latest indicator values"""
+        ts = pd.Timestamp(ts)
+        if self.last_ts is not None and ts < self.last_ts:
+            raise ValueError(f"Bar {ts} is older than the last bar {self.last_ts}")
+        if self.last_ts is not None and ts > self.last_ts:
+            self._base = self._head
+        self._head, self.latest = self._step(self._base, ts, float(high), float(low),
+                                             float(close), float(volume), self._groups)
+        self.last_ts = ts
+        self.bar = {"Datetime": ts, "Open": float(open_), "High": float(high),
+                    "Low": float(low), "Close": float(close), "Volume": float(volume)}
+        return self.latest
+
+    def update_frame(self, df):
+        """Feed every bar of df that is at or after the last seen timestamp"""
+        time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+        times = pd.to_datetime(df[time_col])
+        if self.last_ts is not None:
+            keep = (times >= self.last_ts).to_numpy()
+            df, times = df[keep], times[keep]
+        for ts, o, h, l, c, v in zip(times, df['Open'].to_numpy(), df['High'].to_numpy(),
+                                     df['Low'].to_numpy(), df['Close'].to_numpy(),
+                                     df['Volume'].to_numpy()):
+            self.update(ts, o, h, l, c, v)
+        return self.latest
+
+    def snapshot(self, **meta):
+        """Picklable copy of the full state (states are immutable, so no deep copy)"""
+        return {"version": SNAPSHOT_VERSION, "base": self._base, "head": self._head,
+                "last_ts": self.last_ts, "latest": dict(self.latest), "bar": self.bar,
+                "columns": self.columns, **meta}
+
+    @classmethod
+    def restore(cls, snap):
+        ind = cls(snap.get('columns'))
+        ind._base, ind._head = snap['base'], snap['head']
+        ind.last_ts, ind.latest, ind.bar = snap['last_ts'], dict(snap['latest']), snap['bar']
+        return ind
+
+    def save(self, path, **meta):
+        """Write the snapshot atomically (temp file + rename)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(self.snapshot(**meta), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, columns=None, **meta):
+        """Restore from save(); None if missing, unreadable or saved with different
+        meta or a different column selection"""
+        try:
+            with open(path, 'rb') as f:
+                snap = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if snap.get('version') != SNAPSHOT_VERSION or any(snap.get(k) != v for k, v in meta.items()):
+            return None
+        if snap.get('columns') != select_columns(columns):
+            return None
+        return cls.restore(snap)
+
+    def row(self):
+        """Latest bar plus indicators as a dict (check_signal accepts it without a frame)"""
+        return dict(self.bar or {}, **self.latest)
+
+    def frame(self):
+        """Latest bar plus indicators as a one-row DataFrame (check_signal input)"""
+        return pd.DataFrame([dict(self.bar or {}, **self.latest)])
+
+    @staticmethod
+    def _step(s, ts, high, low, close, volume, groups=frozenset(GROUPS)):
+        out = dict.fromkeys(COLUMNS, NAN)
+        prev_high, prev_low, prev_close = s["prev"]
+        ns = dict(s, n=s["n"] + 1, prev=(high, low, close))  # skipped groups keep their state
+
+        if "ema20" in groups:
+            ns["ema20"], out["EMA20"] = ema(s["ema20"], close, 20)
+        if "ema50" in groups:
+            ns["ema50"], out["EMA50"] = ema(s["ema50"], close, 50)
+        if "ema200" in groups:
+            ns["ema200"], out["EMA200"] = ema(s["ema200"], close, 200)
+
+        # True range / ATR (first bar has no previous close)
+        if s["n"] == 0:
+            tr = NAN
+        else:
+            tr = max(high - low, abs(high - prev_close), abs(prev_close - low))
+        if "atr" in groups:
+            ns["atr"], atr = rma(s["atr"], tr, 14)
+            out["ATR"] = atr
+
+        # ADX
+        if "adx" in groups:
+            up = high - prev_high
+            dn = prev_low - low
+            pos = (up if up > dn and up > 0 else 0.0) if up == up else NAN
+            neg = (dn if dn > up and dn > 0 else 0.0) if dn == dn else NAN
+            ns["dmp"], dmp_avg = rma(s["dmp"], pos, 14)
+            ns["dmn"], dmn_avg = rma(s["dmn"], neg, 14)
+            k = 100 / atr if atr == atr and atr != 0 else NAN
+            dmp, dmn = k * dmp_avg, k * dmn_avg
+            dx = 100 * abs(dmp - dmn) / (dmp + dmn) if dmp + dmn != 0 else NAN
+            ns["adx"], out["ADX"] = rma(s["adx"], dx, 14)
+
+        # MACD (12, 26, 9); the signal EMA starts at the first valid MACD value
+        if "macd" in groups:
+            ns["ema12"], fast = ema(s["ema12"], close, 12)
+            ns["ema26"], slow = ema(s["ema26"], close, 26)
+            macd = fast - slow
+            ns["macd_sig"], out["MACD_SIGNAL"] = ema(s["macd_sig"], macd, 9)
+            out["MACD"] = macd
+
+        # VWAP anchored on the session date
+        if "vwap" in groups:
+            day = ts.toordinal()
+            vwap_day, cum_pv, cum_vol = s["vwap"]
+            if vwap_day != day:
+                cum_pv, cum_vol = 0.0, 0.0
+            cum_pv += (high + low + close) / 3 * volume
+            cum_vol += volume
+            ns["vwap"] = (day, cum_pv, cum_vol)
+            out["VWAP"] = cum_pv / cum_vol if cum_vol else NAN
+
+        # Bollinger Bands (20, 2, population std like pandas_ta)
+        if "bb" in groups:
+            ns["bb"], full = rolling(s["bb"], close, 20)
+            if full:
+                mid = sum(ns["bb"]) / 20
+                std = math.sqrt(sum((v - mid) ** 2 for v in ns["bb"]) / 20)
+                out["BB_LOWER"], out["BB_MID"], out["BB_UPPER"] = mid - 2 * std, mid, mid + 2 * std
+
+        # Supertrend (10, 3) with its own ATR length
+        if "supertrend" in groups:
+            ns["st_atr"], st_atr = rma(s["st_atr"], tr, 10)
+            hl2 = (high + low) / 2
+            upper, lower = hl2 + 3 * st_atr, hl2 - 3 * st_atr
+            direction, prev_upper, prev_lower = s["st"]
+            if s["n"] > 0:
+                if close > prev_upper:
+                    direction = 1
+                elif close < prev_lower:
+                    direction = -1
+                else:
+                    if direction > 0 and lower < prev_lower:
+                        lower = prev_lower
+                    if direction < 0 and upper > prev_upper:
+                        upper = prev_upper
+            ns["st"] = (direction, upper, lower)
+            out["Supertrend"] = lower if direction > 0 else upper
+            out["Supertrend_Direction"] = direction
+
+        # RSI (14) and StochRSI (14, 14, 3)
+        if "rsi" in groups:
+            change = close - prev_close if s["n"] > 0 else NAN
+            gain = max(change, 0.0) if change == change else NAN
+            loss = min(change, 0.0) if change == change else NAN
+            ns["rsi_up"], avg_gain = rma(s["rsi_up"], gain, 14)
+            ns["rsi_dn"], avg_loss = rma(s["rsi_dn"], loss, 14)
+            denom = avg_gain + abs(avg_loss)
+            rsi = 100 * avg_gain / denom if denom == denom and denom != 0 else NAN
+            out["RSI"] = rsi
+        if "stoch_rsi" in groups:
+            ns["rsi_win"], full = rolling(s["rsi_win"], rsi, 14)
+            if full:
+                lo, hi = min(ns["rsi_win"]), max(ns["rsi_win"])
+                stoch = 100 * (rsi - lo) / ((hi - lo) or 2.220446049250313e-16)
+            else:
+                stoch = NAN
+            ns["stoch_k"], out["Stoch_RSI"] = _sma(s["stoch_k"], stoch, 3)
+
+        # Volume ratio vs 20-bar average
+        if "volume" in groups:
+            ns["vol"], vol_avg = _sma(s["vol"], volume, 20)
+            out["Volume_Ratio"] = volume / (vol_avg + 1)
+
+        return ns, out
@@ -0,0 +1,152 @@
+"""
+V8.0 LIVE FEED
+One producer task watches the bot's state store, the trade log and the chart
+cache, and fans each change out to every connected dashboard as Server-Sent
+Events. Each event is encoded once; connected clients add no extra file
+reads or data fetches.
+
+Events:
+  state   full bot state
+  trades  {"from": offset, "rows": [...], "cursor": next offset}
+  bars    {"from": offset, "rows": [...]}  chart bars from `from` on
+"""
+
+import asyncio
+import json
+
+POLL_SECONDS = 0.5
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 256
+
+
+def _message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class LiveFeed:
+    """Shared change producer with per-client SSE queues"""
+
+    def __init__(self, state_reader, trade_log, chart_cache, interval=POLL_SECONDS,
+                 queue_size=QUEUE_SIZE):
+        self.state_reader = state_reader
+        self.trade_log = trade_log
+        self.chart_cache = chart_cache
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.state = None
+        self._state_version = None
+        self._trades_version = None
+        self._trades_cursor = 0
+        self._chart_version = None
+        self._chart_times = []
+        self._chart_columns = {}
+        self._polling = asyncio.Lock()
+        self._task = None
+
+    # Producer: file and database reads run in threads; state changes and
+    # publishing stay on the event loop, one poll at a time
+
+    def _read_state(self):
+        return self.state_reader.read(), self.state_reader.version
+
+    async def _poll_state(self):
+        state, version = await asyncio.to_thread(self._read_state)
+        if state is None or version == self._state_version:
+            return
+        self.state = state
+        self._state_version = version
+        self._publish(_message("state", self.state))
+
+    async def _poll_trades(self):
+        start = self._trades_cursor
+        version, rows, cursor = await asyncio.to_thread(self.trade_log.read, start)
+        if version == self._trades_version:
+            return
+        if cursor < start:  # log reset
+            version, rows, cursor = await asyncio.to_thread(self.trade_log.read, 0)
+            start = 0
+        self._trades_version = version
+        if start == cursor == self._trades_cursor:
+            return
+        self._trades_cursor = cursor
+        self._publish(_message("trades", {"from": start, "rows": rows, "cursor": cursor}))
+
+    async def _poll_chart(self):
+        version, columns = await asyncio.to_thread(self.chart_cache.session)
+        if version == self._chart_version:
+            return
+        self._chart_version = version
+        times = columns.get('time', [])
+        previous = self._chart_times
+        # Same session: resend from the previously-forming bar; new session: everything
+        start = len(previous) - 1 if previous and times[:1] == previous[:1] and len(times) >= len(previous) else 0
+        self._chart_times = times
+        self._chart_columns = columns
+        self._publish(_message("bars", {"from": start, "rows": self._chart_rows(start)}))
+
+    def _chart_rows(self, start=0):
+        columns = self._chart_columns
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*(columns[k][start:] for k in keys))]
+
+    async def _poll(self, chart=True):
+        async with self._polling:
+            await self._poll_state()
+            await self._poll_trades()
+            if chart:
+                await self._poll_chart()
+
+    async def _run(self):
+        while self.subscribers:
+            try:
+                await self._poll()
+            except Exception as e:
+                print(f"Live feed error: {e}")
+            await asyncio.sleep(self.interval)
+        self._task = None
+
+    def _publish(self, message):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow to keep up: disconnect; EventSource reconnects and resyncs
+                self.subscribers.discard(queue)
+
+    # Consumers
+
+    def snapshot(self):
+        """Messages that bring a new client up to date"""
+        messages = []
+        if self.state is not None:
+            messages.append(_message("state", self.state))
+        rows = self.trade_log.rows[:self._trades_cursor]
+        messages.append(_message("trades", {"from": 0, "rows": rows, "cursor": len(rows)}))
+        if self._chart_version is not None:
+            messages.append(_message("bars", {"from": 0, "rows": self._chart_rows()}))
+        return messages
+
+    async def subscribe(self):
+        """SSE byte stream for one client"""
+        if self._task is None:
+            await self._poll(chart=False)
+        # Snapshot and registration happen together so no change is missed or sent twice
+        backlog = self.snapshot()
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        try:
+            yield b"retry: 3000\n\n"
+            for message in backlog:
+                yield message
+            while queue in self.subscribers:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield message
+        finally:
+            self.subscribers.discard(queue)
@@ -1,13 +1,30 @@
-import os
 import time
-import json
+_IMPORT_STARTED = time.perf_counter()
+
+import os
+import argparse
+import functools
 import pandas as pd
-import pandas_ta as ta
-import yfinance as yf
 from datetime import datetime
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from ai_scorer import AIScorer
+from bar_store import BarStore
+import fill_sim
+from indicators import StreamingIndicators
+from market_feed import FEED_DIR, FeedReader, feed_path
+from multi_timeframe import MultiTimeframe
+import signal_rules
+import strategies
+from metrics import REGISTRY
+from profiler import SamplingProfiler
+from state_store import StateStore, state_db_path
+from trade_ledger import TradeLedger, ledger_path, trade_record
+
+# pandas_ta and openai are imported where they are used: the live loop needs
+# neither in simulated-AI mode, and together they dominate start-up time
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
 # Load environment variables
 load_dotenv()
 
@@ -15,302 +32,418 @@ load_dotenv()
 SYMBOL = "^NSEI"
 INTERVAL = "5m"
 CAPITAL = 30000
+# Multi-timeframe confluence: resample one BASE_INTERVAL feed into INTERVAL plus
+# HTF_INTERVALS (e.g. "1m" and ("15m", "60m")); off by default
+BASE_INTERVAL = None
+HTF_INTERVALS = ()
 
-# V8.0 ULTRA PARAMETERS
-MIN_AI_SCORE = 8.0
-MIN_CONFLUENCE = 4
-MIN_ADX = 25
-MIN_VOLUME_RATIO = 1.3
+# V8.0 ULTRA PARAMETERS: the "v8" strategy in strategies.py (override or add
+# variants in STRATEGY_CONFIG; the bot reloads them without a restart)
+STRATEGY = os.getenv("STRATEGY", strategies.DEFAULT_STRATEGY)
+_V8 = strategies.BUILTIN["v8"]
+MIN_AI_SCORE = _V8.min_ai_score
+MIN_CONFLUENCE = _V8.min_confluence
+MIN_ADX = _V8.min_adx
+MIN_VOLUME_RATIO = _V8.min_volume_ratio
 MAX_DAILY_TRADES = 12
 MAX_DAILY_LOSS_PCT = 0.10
+SL_ATR_MULT = _V8.sl_atr_mult
+TP1_R_MULT = _V8.tp1_r_mult
+TP2_R_MULT = _V8.tp2_r_mult
+
+# Fill simulation (fill_sim.py): intrabar order of TP1 / SL / TP2, slippage and costs
+FILL_RULE = "legacy"  # legacy | worst | best | nearest
+SLIPPAGE_BPS = 0.0    # paid on entries and stop exits (market orders)
+COST_BPS = 0.0        # taxes / exchange charges per fill, in bps of notional
+FEE_PER_ORDER = 0.0   # flat brokerage per fill
+
+def compute_indicators(df):
+    """Add the V8.0 indicator stack to an OHLCV frame (one row per bar)"""
+    import pandas_ta as ta
+
+    df['EMA20'] = ta.ema(df['Close'], length=20)
+    df['EMA50'] = ta.ema(df['Close'], length=50)
+    df['EMA200'] = ta.ema(df['Close'], length=200)
+    df['ATR'] = ta.atr(df['High'], df['Low'], df['Close'], length=14)
+
+    # ADX
+    adx = ta.adx(df['High'], df['Low'], df['Close'], length=14)
+    if adx is not None:
+        df['ADX'] = adx['ADX_14']
+
+    # MACD
+    macd = ta.macd(df['Close'])
+    if macd is not None:
+        df = pd.concat([df, macd], axis=1)
+        macd_col = [c for c in df.columns if 'MACD_' in c and 'h' not in c and 's' not in c][0]
+        signal_col = [c for c in df.columns if 'MACDs_' in c][0]
+        df['MACD'] = df[macd_col]
+        df['MACD_SIGNAL'] = df[signal_col]
+
+    # VWAP anchors on the session date, so it needs a DatetimeIndex
+    time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+    if time_col in df.columns:
+        bars = df.set_index(time_col)
+        vwap = ta.vwap(bars['High'], bars['Low'], bars['Close'], bars['Volume'])
+        df['VWAP'] = vwap.values if vwap is not None else float('nan')
+    else:
+        df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])
+
+    # Bollinger Bands
+    bb = ta.bbands(df['Close'], length=20, std=2)
+    if bb is not None:
+        df = pd.concat([df, bb], axis=1)
+        bb_cols = [c for c in df.columns if 'BBL' in c]
+        if bb_cols:
+            df['BB_LOWER'] = df[bb_cols[0]]
+            df['BB_MID'] = df[[c for c in df.columns if 'BBM' in c][0]]
+            df['BB_UPPER'] = df[[c for c in df.columns if 'BBU' in c][0]]
+
+    # Supertrend
+    st = ta.supertrend(df['High'], df['Low'], df['Close'], length=10, multiplier=3)
+    if st is not None:
+        df = pd.concat([df, st], axis=1)
+        st_dir_col = [c for c in df.columns if 'SUPERTd' in c][0]
+        df['Supertrend_Direction'] = df[st_dir_col]
+        df['Supertrend'] = df[[c for c in st.columns if c.startswith('SUPERT_')][0]]
+
+    df['RSI'] = ta.rsi(df['Close'], length=14)
+    stoch = ta.stochrsi(df['Close'], length=14, rsi_length=14, k=3, d=3)
+    if stoch is not None:
+        df['Stoch_RSI'] = stoch['STOCHRSIk_14_14_3_3']
+
+    df['Volume_Ratio'] = df['Volume'] / (df['Volume'].rolling(20).mean() + 1)
+
+    return df
+
+
+def init_llm_client():
+    """Initialize Cerebras LLM client (None without an API key)"""
+    api_key = os.getenv("CEREBRAS_API_KEY")
+    if not api_key:
+        print("⚠️ CEREBRAS_API_KEY not found. AI scoring will be simulated.")
+        return None
+    from openai import OpenAI
+    return OpenAI(
+        base_url=os.getenv("CEREBRAS_BASE_URL", "https://api.cerebras.ai/v1"),
+        api_key=api_key
+    )
+
+
+_UNSET = object()
+
+CLOSE, ATR, ADX, VOLUME_RATIO = (signal_rules.FIELD_INDEX[f] for f in ("Close", "ATR", "ADX", "Volume_Ratio"))
+
+# Trading-loop stages timed into bot_stage_seconds{symbol, stage}
+STAGES = ("fetch", "indicators", "signal", "ai", "manage", "state_write", "ledger_write", "cycle")
+
+
+def _timed(stage):
+    """Method decorator: observe the call's duration as `stage`"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def timed(self, *args, **kwargs):
+            with self.timers[stage].time():
+                return fn(self, *args, **kwargs)
+        return timed
+    return wrap
+
 
 class LiveBotV8:
-    def __init__(self):
-        self.state_file = "live_state.json"
-        self.trades_file = "live_trades.csv"
-        self.client = self._init_llm_client()
+    def __init__(self, symbol=SYMBOL, interval=INTERVAL, state_file="live_state.json",
+                 trades_file="live_trades.csv", capital=CAPITAL, store=None,
+                 daily_stats=None, client=_UNSET, scorer=None, ledger=None, profile_cycles=0,
+                 base_interval=BASE_INTERVAL, htf=HTF_INTERVALS, market_feed=None, clock=None, risk=None,
+                 strategy=STRATEGY):
+        self.symbol = symbol
+        self.strategy_name = strategy
+        self.strategy = strategies.get(strategy)  # re-read every cycle (hot reload)
+        self.interval = interval
+        # Bars are fetched at feed_interval; with a base interval or higher
+        # timeframes they are resampled in memory (multi_timeframe.py)
+        self.feed_interval = base_interval or interval
+        self.timeframes = (interval, *htf)
+        self.multi = self.feed_interval != interval or bool(htf)
+        self.capital = capital
+        self.state_file = state_file
+        self.trades_file = trades_file
+        self.now = clock or datetime.now  # session_recorder swaps in a recorded clock
+        self.risk = risk  # shared risk_engine.RiskEngine (portfolio limits), optional
+        self._risk_qty = 0
+        self.startup = {"imports": IMPORT_SECONDS}
+        t = time.perf_counter()
+        self.timers = {stage: REGISTRY.histogram("bot_stage_seconds", "Trading loop stage latency",
+                                                 symbol=symbol, stage=stage)
+                       for stage in STAGES}
+        self.metrics_file = os.path.splitext(state_file)[0] + ".prom"
+        # Optional sampling profile of the first `profile_cycles` loop cycles
+        self.profile_cycles = profile_cycles
+        self.profiler = SamplingProfiler() if profile_cycles else None
+        # A shared client / daily_stats dict lets several bots share one LLM
+        # connection and one set of daily circuit breakers
+        self.client = self._init_llm_client() if client is _UNSET else client
+        self.scorer = scorer or AIScorer(self.client)
+        t = self._mark("llm_client", t)
+        self.state_store = StateStore(state_db_path(state_file), export_path=state_file)
         self.state = self._load_state()
-        self.daily_stats = self._reset_daily_stats()
+        t = self._mark("state", t)
+        self.ledger = ledger or TradeLedger(ledger_path(trades_file), import_csv=trades_file)
+        self.daily_stats = daily_stats if daily_stats is not None else self._reset_daily_stats()
+        t = self._mark("ledger", t)
+        self.store = store or BarStore()
+        # Warm start: resume the indicators from the last saved bar instead of
+        # recomputing the whole history (EMA200 needs hundreds of bars)
+        self.indicator_file = os.path.splitext(state_file)[0] + "_indicators.pkl"
+        self.feed = self._load_feed() or self._new_feed()
+        self.warm = self.feed.last_ts is not None
+        self._synced = False
+        # Shared market feed (market_feed.py): read bars + indicators instead of
+        # fetching; multi-timeframe mode keeps its own base feed. With
+        # MARKET_FEED_DIR a symbol the producer does not publish (no feed file)
+        # falls back to the bar store; an explicit market_feed is required.
+        self.feed_optional = market_feed is None
+        if market_feed is None and FEED_DIR and not self.multi:
+            market_feed = feed_path(symbol, interval)
+        self.market_feed = market_feed
+        self.market = None
+        self._feed_missing = False
+        self._sync_risk()
+        self._mark("indicators", t)
+
+    def _new_feed(self):
+        # Only the indicator groups the strategy reads are computed
+        if self.multi:
+            return MultiTimeframe(self.feed_interval, self.timeframes, columns=self.strategy.indicators)
+        return StreamingIndicators(self.strategy.indicators)
+
+    def _load_feed(self):
+        if self.multi:
+            return MultiTimeframe.load(self.indicator_file, self.feed_interval, self.timeframes,
+                                       columns=self.strategy.indicators, symbol=self.symbol)
+        return StreamingIndicators.load(self.indicator_file, columns=self.strategy.indicators,
+                                        symbol=self.symbol, interval=self.interval)
+
+    def reload_strategy(self):
+        """Pick up changed strategy parameters; daily stats and the open trade carry over"""
+        strategy = strategies.get(self.strategy_name)
+        if strategy is self.strategy:
+            return False
+        old, self.strategy = self.strategy, strategy
+        if strategy.indicators != old.indicators and self.market is None:
+            # Different indicator set: recompute it from the stored bars on the next fetch
+            self.feed = self._new_feed()
+            self.warm = False
+            self._synced = False
+        print(f"🔁 {self.symbol}: strategy {strategy.name} reloaded")
+        return True
+
+    @property
+    def indicators(self):
+        """Indicators of the traded interval"""
+        return self.feed.primary if self.multi else self.feed
+
+    def _mark(self, phase, started):
+        """Record a start-up phase duration; returns the new phase start"""
+        now = time.perf_counter()
+        self.startup[phase] = self.startup.get(phase, 0.0) + now - started
+        return now
+
+    def _count_error(self, stage):
+        """Count a handled (printed) error in bot_errors_total"""
+        REGISTRY.counter("bot_errors_total", "Handled errors by stage", symbol=self.symbol, stage=stage).inc()
+
+    def startup_report(self):
+        phases = " | ".join(f"{k} {v * 1000:.0f}ms" for k, v in self.startup.items())
+        total = sum(self.startup.values())
+        start = "warm" if self.warm else "cold"
+        return f"⏱️ Startup ({start}): {phases} | total {total:.2f}s"
 
     def _init_llm_client(self):
-        """Initialize Cerebras LLM client"""
-        api_key = os.getenv("CEREBRAS_API_KEY")
-        if not api_key:
-            print("⚠️ CEREBRAS_API_KEY not found. AI scoring will be simulated.")
-            return None
-        return OpenAI(
-            base_url="https://api.cerebras.ai/v1",
-            api_key=api_key
-        )
+        return init_llm_client()
 
     def _load_state(self):
-        """Load or initialize bot state"""
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        
+        """Recover state from the journal (importing live_state.json on first run)"""
+        state = self.state_store.load()
+        if state is not None:
+            return state
+
         return {
-            "balance": CAPITAL,
+            "balance": self.capital,
             "active_trade": None,
             "consecutive_wins": 0,
             "consecutive_losses": 0,
-            "last_update": str(datetime.now())
+            "last_update": str(self.now())
         }
 
     def _reset_daily_stats(self):
         return {
             "trades_count": 0,
             "pnl": 0,
-            "date": datetime.now().date()
+            "date": self.now().date()
         }
 
+    @_timed("state_write")
     def save_state(self):
-        """Save current state to file"""
-        self.state['last_update'] = str(datetime.now())
-        with open(self.state_file, 'w') as f:
-            json.dump(self.state, f, indent=4)
+        """Journal the changed state (live_state.json is refreshed on snapshot / shutdown)"""
+        self.state['last_update'] = str(self.now())
+        self.state_store.save(self.state)
+        self._sync_risk()
 
-    def log_trade(self, trade_data):
-        """Log completed trade to CSV"""
+    def _sync_risk(self):
+        """Tell the shared risk engine about this bot's position (its share of the
+        symbol's position when several strategies trade the symbol)"""
+        if self.risk:
+            trade = self.state['active_trade']
+            qty = (trade['qty'] if trade['type'] == 'BUY' else -trade['qty']) if trade else 0
+            total = self.risk.position(self.symbol) - self._risk_qty + qty
+            self.risk.set_position(self.symbol, total, trade['entry'] if trade else None)
+            self._risk_qty = qty
+
+    def log_trade(self, trade_data, trade=None, exit_price=None):
+        """Log completed trade to CSV and the trade ledger"""
         df = pd.DataFrame([trade_data])
         if not os.path.exists(self.trades_file):
             df.to_csv(self.trades_file, index=False)
         else:
             df.to_csv(self.trades_file, mode='a', header=False, index=False)
+        try:
+            with self.timers['ledger_write'].time():
+                self.ledger.record(trade_record(self.symbol, trade or {}, exit_price, trade_data))
+        except Exception as e:
+            print(f"⚠️ Ledger write failed: {e}")
+            self._count_error("ledger_write")
 
-    def fetch_data(self):
-        """Fetch latest market data"""
+    def fetch_data(self, refresh=True):
+        """Fetch latest market data. refresh=False reads the bars another bot on the
+        same store has just fetched (several strategies trading one symbol)."""
         try:
-            df = yf.download(SYMBOL, period="5d", interval=INTERVAL, progress=False)
-            if df.empty:
+            if self._use_market_feed():
+                with self.timers['fetch'].time():
+                    if self.market is None:
+                        self.market = FeedReader(self.market_feed)
+                    row = self.market.latest()
+                return None if row is None else pd.DataFrame([row])
+
+            # Delta fetch: only bars at/after the last stored one come back
+            with self.timers['fetch'].time():
+                if refresh:
+                    df = self.store.refresh(self.symbol, self.feed_interval)
+                else:
+                    df = self.store.bars(self.symbol, self.feed_interval)
+            if not self._synced:
+                # First fetch: catch up on stored bars (all of them on a cold start,
+                # only those after the saved bar on a warm one)
+                stored = self.store.bars(self.symbol, self.feed_interval)
+                if self.warm and (stored.empty or stored['Datetime'].iloc[0] > self.feed.last_ts):
+                    print("⚠️ Indicator snapshot does not overlap the stored bars; recomputing")
+                    self.feed = self._new_feed()
+                    self.warm = False
+                df = stored
+                self._synced = True
+            if df.empty and self.feed.last_ts is None:
                 return None
             
-            # Clean columns
-            df.columns = [c[0] if isinstance(c, tuple) else c for c in df.columns]
-            df.reset_index(inplace=True)
-            
-            # Calculate Indicators
-            df['EMA20'] = ta.ema(df['Close'], length=20)
-            df['EMA50'] = ta.ema(df['Close'], length=50)
-            df['EMA200'] = ta.ema(df['Close'], length=200)
-            df['ATR'] = ta.atr(df['High'], df['Low'], df['Close'], length=14)
-            
-            # ADX
-            adx = ta.adx(df['High'], df['Low'], df['Close'], length=14)
-            if adx is not None:
-                df['ADX'] = adx['ADX_14']
-            
-            # MACD
-            macd = ta.macd(df['Close'])
-            if macd is not None:
-                df = pd.concat([df, macd], axis=1)
-                macd_col = [c for c in df.columns if 'MACD_' in c and 'h' not in c and 's' not in c][0]
-                signal_col = [c for c in df.columns if 'MACDs_' in c][0]
-                df['MACD'] = df[macd_col]
-                df['MACD_SIGNAL'] = df[signal_col]
-            
-            df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])
-            
-            # Bollinger Bands
-            bb = ta.bbands(df['Close'], length=20, std=2)
-            if bb is not None:
-                df = pd.concat([df, bb], axis=1)
-                bb_cols = [c for c in df.columns if 'BBL' in c]
-                if bb_cols:
-                    df['BB_LOWER'] = df[bb_cols[0]]
-                    df['BB_MID'] = df[[c for c in df.columns if 'BBM' in c][0]]
-                    df['BB_UPPER'] = df[[c for c in df.columns if 'BBU' in c][0]]
-            
-            # Supertrend
-            st = ta.supertrend(df['High'], df['Low'], df['Close'], length=10, multiplier=3)
-            if st is not None:
-                df = pd.concat([df, st], axis=1)
-                st_dir_col = [c for c in df.columns if 'SUPERTd' in c][0]
-                df['Supertrend_Direction'] = df[st_dir_col]
-            
-            df['RSI'] = ta.rsi(df['Close'], length=14)
-            stoch = ta.stochrsi(df['Close'], length=14, rsi_length=14, k=3, d=3)
-            if stoch is not None:
-                df['Stoch_RSI'] = stoch['STOCHRSIk_14_14_3_3']
-            
-            df['Volume_Ratio'] = df['Volume'] / (df['Volume'].rolling(20).mean() + 1)
-            
-            return df
+            # Only the new / forming bars go through the streaming indicators
+            last_ts = self.feed.last_ts
+            with self.timers['indicators'].time():
+                self.feed.update_frame(df)
+            if self.feed.last_ts != last_ts:
+                self.save_indicators()
+            return self.feed.frame()
             
         except Exception as e:
-            print(f"Error fetching data: {e}")
+            print(f"Error fetching data for {self.symbol}: {e}")
+            self._count_error("fetch")
             return None
 
-    def get_ai_score(self, signal):
-        """Get AI confidence score from Cerebras"""
-        if not self.client:
-            # Simulation fallback
-            score = 6.0 + (signal['confluence'] * 0.6)
-            if signal.get('adx', 0) > 30: score += 1.0
-            if 'MACD' in signal['reasons']: score += 1.0
-            return min(10.0, score), "Simulated Score"
-
-        prompt = f"""
-        Analyze this Nifty 50 trade setup (V8.0 Ultra Strategy):
-        Type: {signal['type']} @ {signal['entry']:.2f}
-        Confluence: {signal['confluence']}/9 factors
-        Reasons: {', '.join(signal['reasons'])}
-        ADX: {signal.get('adx', 0):.1f} (Trend Strength)
-        
-        Rate confidence 0-10. Be strict. >9.0 requires perfect setup.
-        Return JSON: {{"score": float, "reasoning": "short explanation"}}
-        """
+    def _use_market_feed(self):
+        """Read the shared feed if there is one for this symbol (checked until it appears)"""
+        if not self.market_feed or self.market is not None:
+            return bool(self.market_feed)
+        if not self.feed_optional or os.path.exists(self.market_feed):
+            if self._feed_missing:
+                print(f"📡 {self.symbol}: market feed available, reading {self.market_feed}")
+            return True
+        if not self._feed_missing:
+            print(f"📦 {self.symbol}: no market feed at {self.market_feed}; fetching through the bar store")
+            self._feed_missing = True
+        return False
 
+    def save_indicators(self):
+        """Persist the indicator state so a restart resumes from the last bar"""
         try:
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1,
-                max_tokens=100,
-                response_format={"type": "json_object"}
-            )
-            content = json.loads(response.choices[0].message.content)
-            return content.get('score', 5.0), content.get('reasoning', 'No reasoning')
-        except Exception as e:
-            print(f"AI Error: {e}")
-            return 8.0, "AI Error - Default Score"
+            if self.multi:
+                self.feed.save(self.indicator_file, symbol=self.symbol)
+            else:
+                self.feed.save(self.indicator_file, symbol=self.symbol, interval=self.interval)
+        except OSError as e:
+            print(f"⚠️ Indicator snapshot failed: {e}")
+            self._count_error("indicators")
 
+    def warmup(self):
+        """Pre-market: pull the latest bars and save the indicator snapshot, then return"""
+        t = time.perf_counter()
+        df = self.fetch_data()
+        if df is None:
+            print(f"❌ Warmup: no bars for {self.symbol}")
+            return False
+        print(f"🔥 Warmed up {self.symbol} {self.interval} to {self.feed.last_ts} "
+              f"in {time.perf_counter() - t:.2f}s")
+        return True
+
+    @_timed("ai")
+    def get_ai_score(self, signal):
+        """Get AI confidence score from Cerebras (cached, deadline-bounded)"""
+        return self.scorer.score(signal, self.symbol)
+
+    @_timed("signal")
     def check_signal(self, df):
-        """V8.0 Signal Detection Logic"""
-        current = df.iloc[-1]
-        
-        if pd.isna(current['ATR']) or current['ATR'] <= 0:
+        """V8.0 Signal Detection Logic (rule table in signal_rules).
+        `df` is the indicator frame (last row is evaluated) or one bar as a mapping."""
+        current = df.iloc[-1] if isinstance(df, pd.DataFrame) else df
+        x = signal_rules.row_vector(current)
+        strategy = self.strategy
+        direction, confluence, mask = signal_rules.evaluate_row(x, strategy.rules, strategy.min_confluence)
+        if not direction:
             return None
-            
-        price = current['Close']
-        
-        # BULLISH
-        if not pd.isna(current['EMA20']) and price > current['EMA20']:
-            confluence = 0
-            reasons = []
-            
-            if not pd.isna(current['EMA50']) and current['EMA20'] > current['EMA50']:
-                confluence += 1; reasons.append("EMA")
-            else: return None
-            
-            if not pd.isna(current['EMA200']) and not pd.isna(current['EMA50']) and current['EMA50'] > current['EMA200']:
-                confluence += 1; reasons.append("EMA200")
-            
-            if not pd.isna(current['Supertrend_Direction']) and current['Supertrend_Direction'] == 1:
-                confluence += 1; reasons.append("Supertrend")
-            else: return None
-            
-            if pd.isna(current['ADX']) or current['ADX'] < MIN_ADX: return None
-            confluence += 1; reasons.append("ADX")
-            
-            if not pd.isna(current['MACD']) and not pd.isna(current['MACD_SIGNAL']) and current['MACD'] > current['MACD_SIGNAL']:
-                confluence += 1; reasons.append("MACD")
-            
-            if not pd.isna(current['Volume_Ratio']) and current['Volume_Ratio'] > MIN_VOLUME_RATIO:
-                confluence += 1; reasons.append("Volume")
-                
-            if not pd.isna(current['VWAP']) and price > current['VWAP']:
-                confluence += 1; reasons.append("VWAP")
-                
-            if not pd.isna(current['BB_LOWER']) and not pd.isna(current['BB_MID']) and current['BB_LOWER'] < price < current['BB_MID']:
-                confluence += 1; reasons.append("BB")
-                
-            if not pd.isna(current['Stoch_RSI']) and 20 < current['Stoch_RSI'] < 80:
-                confluence += 1; reasons.append("StochRSI")
-            
-            if confluence >= MIN_CONFLUENCE:
-                entry = price
-                sl = entry - current['ATR'] * 1.2
-                risk = entry - sl
-                return {
-                    'type': 'BUY',
-                    'entry': entry,
-                    'sl': sl,
-                    'tp1': entry + risk * 2.0,
-                    'tp2': entry + risk * 4.0,  # Extended
-                    'risk': risk,
-                    'confluence': confluence,
-                    'reasons': reasons,
-                    'adx': current['ADX'],
-                    'volume_ratio': current['Volume_Ratio']
-                }
-
-        # BEARISH
-        elif not pd.isna(current['EMA20']) and price < current['EMA20']:
-            confluence = 0
-            reasons = []
-            
-            if not pd.isna(current['EMA50']) and current['EMA20'] < current['EMA50']:
-                confluence += 1; reasons.append("EMA")
-            else: return None
-            
-            if not pd.isna(current['EMA200']) and not pd.isna(current['EMA50']) and current['EMA50'] < current['EMA200']:
-                confluence += 1; reasons.append("EMA200")
-            
-            if not pd.isna(current['Supertrend_Direction']) and current['Supertrend_Direction'] == -1:
-                confluence += 1; reasons.append("Supertrend")
-            else: return None
-            
-            if pd.isna(current['ADX']) or current['ADX'] < MIN_ADX: return None
-            confluence += 1; reasons.append("ADX")
-            
-            if not pd.isna(current['MACD']) and not pd.isna(current['MACD_SIGNAL']) and current['MACD'] < current['MACD_SIGNAL']:
-                confluence += 1; reasons.append("MACD")
-            
-            if not pd.isna(current['Volume_Ratio']) and current['Volume_Ratio'] > MIN_VOLUME_RATIO:
-                confluence += 1; reasons.append("Volume")
-                
-            if not pd.isna(current['VWAP']) and price < current['VWAP']:
-                confluence += 1; reasons.append("VWAP")
-                
-            if not pd.isna(current['BB_UPPER']) and not pd.isna(current['BB_MID']) and current['BB_UPPER'] > price > current['BB_MID']:
-                confluence += 1; reasons.append("BB")
-                
-            if not pd.isna(current['Stoch_RSI']) and 20 < current['Stoch_RSI'] < 80:
-                confluence += 1; reasons.append("StochRSI")
-            
-            if confluence >= MIN_CONFLUENCE:
-                entry = price
-                sl = entry + current['ATR'] * 1.2
-                risk = sl - entry
-                return {
-                    'type': 'SELL',
-                    'entry': entry,
-                    'sl': sl,
-                    'tp1': entry - risk * 2.0,
-                    'tp2': entry - risk * 4.0,
-                    'risk': risk,
-                    'confluence': confluence,
-                    'reasons': reasons,
-                    'adx': current['ADX'],
-                    'volume_ratio': current['Volume_Ratio']
-                }
-        
-        return None
+
+        entry = x[CLOSE]
+        if direction > 0:
+            sl = entry - x[ATR] * strategy.sl_atr_mult
+            risk = entry - sl
+        else:
+            sl = entry + x[ATR] * strategy.sl_atr_mult
+            risk = sl - entry
+        return {
+            'type': 'BUY' if direction > 0 else 'SELL',
+            'entry': entry,
+            'sl': sl,
+            'tp1': entry + direction * risk * strategy.tp1_r_mult,
+            'tp2': entry + direction * risk * strategy.tp2_r_mult,  # Extended
+            'risk': risk,
+            'confluence': int(confluence),
+            'reasons': signal_rules.reason_names(mask),
+            'adx': x[ADX],
+            'volume_ratio': x[VOLUME_RATIO],
+            'bar_time': current.get('Datetime')
+        }
 
     def calculate_qty(self, signal, ai_score):
-        """V8.0 Ultra Aggressive Position Sizing"""
-        if ai_score >= 9.0: risk_pct = 10.0
-        elif ai_score >= 8.5: risk_pct = 8.0
-        elif ai_score >= 8.0: risk_pct = 6.0
-        else: return 0
-        
-        # Streak adjustments
-        if self.state['consecutive_losses'] >= 2: risk_pct = 4.0
-        if self.state['consecutive_wins'] >= 3: risk_pct = min(risk_pct + 2.0, 12.0)
-        
+        """Position size from the strategy's AI-score table and streak adjustments"""
+        risk_pct = self.strategy.risk_pct(ai_score, self.state['consecutive_wins'],
+                                          self.state['consecutive_losses'])
+        if not risk_pct:
+            return 0
+
         risk_amt = self.state['balance'] * (risk_pct / 100)
         return int(risk_amt / signal['risk'])
 
     def execute_trade(self, signal, qty, ai_score, reasoning):
         """Execute and record trade"""
         self.state['active_trade'] = {
-            "entry_time": str(datetime.now()),
+            "entry_time": str(self.now()),
             "type": signal['type'],
-            "entry": signal['entry'],
+            "entry": fill_sim.slip(signal['entry'], 1 if signal['type'] == 'BUY' else -1, SLIPPAGE_BPS),
             "sl": signal['sl'],
             "tp1": signal['tp1'],
             "tp2": signal['tp2'],
@@ -318,55 +451,58 @@ class LiveBotV8:
             "original_qty": qty,
             "tp1_hit": False,
             "ai_score": ai_score,
-            "ai_reasoning": reasoning
+            "ai_reasoning": reasoning,
+            "initial_sl": signal['sl'],
+            "risk": signal['risk'],
+            "confluence": signal['confluence'],
+            "signals": signal['reasons'],
+            "partial_pnl": 0.0,
+            "costs": 0.0,
+            "strategy": self.strategy.name
         }
         self.save_state()
         print(f"🚀 TRADE EXECUTED: {signal['type']} {qty} Qty @ {signal['entry']:.2f}")
 
-    def manage_trade(self, current_price, high, low):
-        """Manage active trade with TP1 and TP2"""
+    @_timed("manage")
+    def manage_trade(self, current_price, high, low, open_=None):
+        """Manage active trade with TP1 and TP2 (intrabar order, slippage and costs per fill_sim)"""
         trade = self.state['active_trade']
         if not trade: return
 
         exit_reason = None
         pnl = 0
-        
-        if trade['type'] == 'BUY':
-            if not trade['tp1_hit'] and high >= trade['tp1']:
-                half_qty = trade['original_qty'] // 2
-                partial_pnl = (trade['tp1'] - trade['entry']) * half_qty
-                
-                self.state['balance'] += partial_pnl
-                self.daily_stats['pnl'] += partial_pnl
-                
-                trade['tp1_hit'] = True
-                trade['qty'] -= half_qty
-                trade['sl'] = trade['entry']
-                self.save_state()
-                print(f"💰 TP1 HIT! Secured ₹{partial_pnl:.2f}, SL moved to BE")
-                
-            if low <= trade['sl']: exit_reason = "SL"; exit_price = trade['sl']
-            elif high >= trade['tp2']: exit_reason = "TP2"; exit_price = trade['tp2']
-                
-        elif trade['type'] == 'SELL':
-            if not trade['tp1_hit'] and low <= trade['tp1']:
-                half_qty = trade['original_qty'] // 2
-                partial_pnl = (trade['entry'] - trade['tp1']) * half_qty
-                
-                self.state['balance'] += partial_pnl
-                self.daily_stats['pnl'] += partial_pnl
-                
-                trade['tp1_hit'] = True
-                trade['qty'] -= half_qty
-                trade['sl'] = trade['entry']
-                self.save_state()
-                print(f"💰 TP1 HIT! Secured ₹{partial_pnl:.2f}, SL moved to BE")
-                
-            if high >= trade['sl']: exit_reason = "SL"; exit_price = trade['sl']
-            elif low <= trade['tp2']: exit_reason = "TP2"; exit_price = trade['tp2']
+        side = 1 if trade['type'] == 'BUY' else -1
+        tp1_filled, exit_code, exit_price = fill_sim.walk_bar(
+            side, trade['entry'], trade['sl'], trade['tp1'], trade['tp2'], trade['tp1_hit'],
+            current_price if open_ is None else open_, high, low, current_price, fill_sim.RULES[FILL_RULE])
+
+        if tp1_filled:
+            half_qty = trade['original_qty'] // 2
+            cost = fill_sim.order_cost(trade['tp1'], half_qty, COST_BPS, FEE_PER_ORDER)
+            partial_pnl = side * (trade['tp1'] - trade['entry']) * half_qty - cost
+            
+            self.state['balance'] += partial_pnl
+            self.daily_stats['pnl'] += partial_pnl
+            
+            trade['tp1_hit'] = True
+            trade['partial_pnl'] = partial_pnl
+            trade['costs'] = trade.get('costs', 0.0) + cost
+            trade['qty'] -= half_qty
+            trade['sl'] = trade['entry']
+            self.save_state()
+            print(f"💰 TP1 HIT! Secured ₹{partial_pnl:.2f}, SL moved to BE")
+
+        if exit_code == fill_sim.EXIT_SL:
+            exit_reason = "SL"; exit_price = fill_sim.slip(exit_price, -side, SLIPPAGE_BPS)
+        elif exit_code == fill_sim.EXIT_TP2:
+            exit_reason = "TP2"
 
         if exit_reason:
-            pnl = (exit_price - trade['entry']) * trade['qty'] if trade['type'] == 'BUY' else (trade['entry'] - exit_price) * trade['qty']
+            # Entry charges are booked with the final leg
+            cost = (fill_sim.order_cost(exit_price, trade['qty'], COST_BPS, FEE_PER_ORDER)
+                    + fill_sim.order_cost(trade['entry'], trade['original_qty'], COST_BPS, FEE_PER_ORDER))
+            trade['costs'] = trade.get('costs', 0.0) + cost
+            pnl = side * (exit_price - trade['entry']) * trade['qty'] - cost
             
             self.state['balance'] += pnl
             self.daily_stats['pnl'] += pnl
@@ -381,66 +517,142 @@ class LiveBotV8:
                 self.state['consecutive_wins'] = 0
             
             self.log_trade({
-                "exit_time": str(datetime.now()),
+                "exit_time": str(self.now()),
                 "type": trade['type'],
                 "pnl": total_trade_pnl,
                 "reason": exit_reason,
                 "balance": self.state['balance']
-            })
+            }, trade, exit_price)
             
             self.state['active_trade'] = None
             self.save_state()
             print(f"🏁 TRADE CLOSED ({exit_reason}): PnL ₹{pnl:.2f}")
 
+    def limits_hit(self, today=None):
+        """Daily circuit breakers; returns the reason if trading must pause"""
+        today = today or self.now().date()
+        if self.daily_stats['date'] != today:
+            self.daily_stats.update(self._reset_daily_stats())
+            self.daily_stats['date'] = today
+
+        if self.daily_stats['trades_count'] >= MAX_DAILY_TRADES:
+            return "Max daily trades reached"
+        if self.daily_stats['pnl'] < -(self.state['balance'] * MAX_DAILY_LOSS_PCT):
+            return "Max daily loss reached"
+        return None
+
+    def enter_trade(self, signal, ai_score, reasoning):
+        """Apply the AI filter and position sizing to a scored signal"""
+        print(f"🔎 Signal Found: {self.symbol} {signal['type']} | AI: {ai_score}/10")
+        
+        if ai_score >= self.strategy.min_ai_score:
+            qty = self.calculate_qty(signal, ai_score)
+            side = 1 if signal['type'] == 'BUY' else -1
+            reason = self.risk.check(self.symbol, side * qty, signal['entry']) if self.risk and qty > 0 else None
+            if reason:
+                print(f"🛡️ Blocked by risk engine: {reason}")
+            elif qty > 0:
+                self.execute_trade(signal, qty, ai_score, reasoning)
+            else:
+                print("⚠️ Qty 0 - Risk too high or balance too low")
+        else:
+            print(f"⚠️ Rejected by AI (<{self.strategy.min_ai_score})")
+
+    def advance(self, df):
+        """Manage the open trade, or look for a new one, on fresh data (frame or bar mapping).
+        Returns the signal still to be scored and passed to enter_trade, if any."""
+        current = df.iloc[-1] if isinstance(df, pd.DataFrame) else df
+        if self.risk and current.get('Datetime') is not None:
+            self.risk.observe(self.symbol, current['Datetime'], current['Close'])
+
+        if self.state['active_trade']:
+            self.manage_trade(current['Close'], current['High'], current['Low'], current['Open'])
+            return None
+        return self.check_signal(current)
+
+    def process(self, df):
+        """advance(), then score and enter any signal"""
+        signal = self.advance(df)
+        if signal:
+            ai_score, reasoning = self.get_ai_score(signal)
+            self.enter_trade(signal, ai_score, reasoning)
+
+    def cycle(self):
+        """One poll of the trading loop; returns the seconds to sleep before the next"""
+        reason = self.limits_hit()
+        if reason:
+            print(f"🛑 {reason}. Sleeping...")
+            return 300
+
+        t = time.perf_counter()
+        self.reload_strategy()
+        df = self.fetch_data()
+        if df is None:
+            return 60
+        
+        self.process(df)
+        if "first_decision" not in self.startup:
+            self._mark("first_decision", t)
+            print(self.startup_report())
+        return 60
+
+    def _profiled_cycle_done(self):
+        """Count down the profiled cycles and write the profile after the last one"""
+        self.profiler.stop()
+        self.profile_cycles -= 1
+        if self.profile_cycles <= 0:
+            path = self.profiler.dump(f"profile_{datetime.now():%Y%m%d_%H%M%S}.folded")
+            print(f"🔬 Profile written to {path} ({self.profiler.samples} samples)")
+            self.profiler = None
+
     def run(self):
         print("🤖 V8.0 ULTRA LIVE BOT STARTED")
         print(f"💰 Balance: ₹{self.state['balance']:.2f}")
         
-        while True:
-            try:
-                if self.daily_stats['date'] != datetime.now().date():
-                    self.daily_stats = self._reset_daily_stats()
-                
-                if self.daily_stats['trades_count'] >= MAX_DAILY_TRADES:
-                    print("🛑 Max daily trades reached. Sleeping...")
-                    time.sleep(300)
-                    continue
-                    
-                if self.daily_stats['pnl'] < -(self.state['balance'] * MAX_DAILY_LOSS_PCT):
-                    print("🛑 Max daily loss reached. Sleeping...")
-                    time.sleep(300)
-                    continue
-
-                df = self.fetch_data()
-                if df is None:
-                    time.sleep(60)
-                    continue
-                
-                current_price = df['Close'].iloc[-1]
-                
-                if self.state['active_trade']:
-                    self.manage_trade(current_price, df['High'].iloc[-1], df['Low'].iloc[-1])
-                else:
-                    signal = self.check_signal(df)
-                    if signal:
-                        ai_score, reasoning = self.get_ai_score(signal)
-                        print(f"🔎 Signal Found: {signal['type']} | AI: {ai_score}/10")
-                        
-                        if ai_score >= MIN_AI_SCORE:
-                            qty = self.calculate_qty(signal, ai_score)
-                            if qty > 0:
-                                self.execute_trade(signal, qty, ai_score, reasoning)
-                            else:
-                                print("⚠️ Qty 0 - Risk too high or balance too low")
-                        else:
-                            print(f"⚠️ Rejected by AI (<{MIN_AI_SCORE})")
-                
-                time.sleep(60)
-                
-            except Exception as e:
-                print(f"❌ Error in main loop: {e}")
-                time.sleep(60)
+        try:
+            while True:
+                if self.profiler:
+                    self.profiler.start()
+                try:
+                    with self.timers['cycle'].time():
+                        delay = self.cycle()
+                except Exception as e:
+                    print(f"❌ Error in main loop: {e}")
+                    self._count_error("loop")
+                    delay = 60
+                if self.profiler:
+                    self._profiled_cycle_done()
+                try:
+                    REGISTRY.write(self.metrics_file)
+                except OSError as e:
+                    print(f"⚠️ Metrics write failed: {e}")
+                time.sleep(delay)
+        finally:
+            # Final live_state.json export
+            self.state_store.close()
 
 if __name__ == "__main__":
-    bot = LiveBotV8()
-    bot.run()
+    parser = argparse.ArgumentParser(description="V8.0 live paper-trading bot")
+    parser.add_argument("--warmup", action="store_true",
+                        help="Pre-market: refresh bars and save the indicator snapshot, then exit")
+    parser.add_argument("--profile", type=int, default=int(os.getenv("PROFILE_CYCLES", "0")), metavar="N",
+                        help="Sample the first N loop cycles and write a collapsed-stack profile")
+    parser.add_argument("--base", default=os.getenv("BASE_INTERVAL", BASE_INTERVAL),
+                        help="Fetch this interval (e.g. 1m) and resample it into the traded one")
+    parser.add_argument("--htf", default=os.getenv("HTF_INTERVALS", ",".join(HTF_INTERVALS)),
+                        help="Higher timeframes counted as confluence, e.g. 15m,60m")
+    parser.add_argument("--record", default=os.getenv("SESSION_RECORD"), metavar="FILE",
+                        help="Log the session for offline replay (session_recorder.py)")
+    parser.add_argument("--strategy", default=STRATEGY,
+                        help="Strategy from strategies.py / STRATEGY_CONFIG (default v8)")
+    args = parser.parse_args()
+
+    bot = LiveBotV8(profile_cycles=args.profile, base_interval=args.base or None,
+                    htf=tuple(tf for tf in args.htf.split(",") if tf), strategy=args.strategy)
+    if args.record:
+        from session_recorder import SessionRecorder
+        SessionRecorder(args.record).attach(bot)
+    if args.warmup:
+        bot.warmup()
+    else:
+        bot.run()
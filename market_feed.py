@@ -0,0 +1,299 @@
+"""
+V8.0 SHARED MARKET FEED
+One producer process fetches the bars, runs the streaming indicators (the
+bot's own implementation) and publishes bars plus indicator columns into a
+memory-mapped ring buffer file. The bot and every API worker map the same
+file, so there is one Yahoo poll and one set of indicator values however
+many readers there are.
+
+File layout (little-endian):
+  header  magic, layout version, column count, capacity, seq, count,
+          updated (epoch seconds), timezone, column names
+  ts      int64[2 * capacity]               bar open time, ns UTC
+  data    float64[columns][2 * capacity]
+Row i is written to slots i % capacity and i % capacity + capacity, so the
+latest `capacity` rows are always one contiguous slice (zero-copy views).
+
+The writer follows a seqlock: seq is odd while a write is in progress, and
+readers retry when seq was odd or changed while they copied.
+
+Run: MARKET_FEED_DIR=/dev/shm python market_feed.py ^NSEI ^NSEBANK --interval 5m
+     MARKET_FEED_DIR=/dev/shm python live_paper_trade_v8.py   # reads instead of fetching
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, DEFAULT_TZ, OHLCV, _safe_name
+from indicators import COLUMNS as INDICATOR_COLUMNS, StreamingIndicators
+
+MAGIC = b"V8FEED\0\0"
+LAYOUT_VERSION = 1
+CAPACITY = 4096      # rows kept (~54 sessions of 5m bars)
+POLL_SECONDS = 30
+FEED_DIR = os.getenv("MARKET_FEED_DIR")  # unset: bot and API fetch for themselves
+FEED_COLUMNS = OHLCV + INDICATOR_COLUMNS
+
+# magic, version, ncols, capacity, seq, count, updated, tz
+_HEADER = struct.Struct("<8sIIQQQd32s")
+_SEQ_OFFSET = 24     # seq and count are consecutive aligned uint64s
+_UPDATED_OFFSET = 40
+_NAME_BYTES = 24
+
+
+def feed_path(symbol, interval, root=None):
+    return os.path.join(root or FEED_DIR, f"{_safe_name(symbol)}_{interval}.feed")
+
+
+def _header_size(ncols):
+    size = _HEADER.size + ncols * _NAME_BYTES
+    return (size + 63) // 64 * 64
+
+
+def _file_size(ncols, capacity):
+    return _header_size(ncols) + 2 * capacity * 8 * (1 + ncols)
+
+
+def _map(buf, ncols, capacity):
+    """(seq/count, updated, ts, data) views over a mapped feed file"""
+    header = _header_size(ncols)
+    counters = np.ndarray((2,), dtype='<u8', buffer=buf, offset=_SEQ_OFFSET)
+    updated = np.ndarray((1,), dtype='<f8', buffer=buf, offset=_UPDATED_OFFSET)
+    ts = np.ndarray((2 * capacity,), dtype='<i8', buffer=buf, offset=header)
+    data = np.ndarray((ncols, 2 * capacity), dtype='<f8', buffer=buf, offset=header + 16 * capacity)
+    return counters, updated, ts, data
+
+
+class FeedWriter:
+    """Producer side of one feed file (single writer)"""
+
+    def __init__(self, path, columns=FEED_COLUMNS, capacity=CAPACITY, tz=DEFAULT_TZ):
+        self.path = path
+        self.columns = list(columns)
+        self.capacity = capacity
+        size = _file_size(len(self.columns), capacity)
+        header = _HEADER.pack(MAGIC, LAYOUT_VERSION, len(self.columns), capacity, 0, 0, 0.0, tz.encode())
+        names = b"".join(name.encode().ljust(_NAME_BYTES, b"\0") for name in self.columns)
+        # Build the file beside the old one and swap it in; readers of the old
+        # file notice the new inode and re-map
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(header + names)
+            f.truncate(size)
+        os.replace(tmp, path)
+        self._file = open(path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._counters, self._updated, self.ts, self.data = _map(self._mm, len(self.columns), capacity)
+
+    @property
+    def count(self):
+        return int(self._counters[1])
+
+    def write(self, start, ts, data):
+        """Overwrite rows from `start` on (revised forming bar) and append the rest.
+        ts: int64 ns UTC, data: float64[len(columns), len(ts)]"""
+        count, capacity = self.count, self.capacity
+        if start > count or start < count - capacity:
+            raise ValueError(f"Row {start} is outside the buffer (count {count})")
+        if len(ts) > capacity:  # only the newest `capacity` rows survive anyway
+            skip = len(ts) - capacity
+            start, ts, data = start + skip, ts[skip:], data[:, skip:]
+        slots = (start + np.arange(len(ts))) % capacity
+        self._counters[0] += 1  # odd: readers back off
+        self.ts[slots] = ts
+        self.ts[slots + capacity] = ts
+        self.data[:, slots] = data
+        self.data[:, slots + capacity] = data
+        self._counters[1] = max(count, start + len(ts))
+        self._updated[0] = time.time()
+        self._counters[0] += 1
+
+    def close(self):
+        self._counters = self._updated = self.ts = self.data = None
+        self._mm.close()
+        self._file.close()
+
+
+class FeedReader:
+    """Reader side: maps the file read-only; any number of processes"""
+
+    def __init__(self, path, retries=1000):
+        self.path = path
+        self.retries = retries
+        self._mm = None
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, ncols, capacity, _, _, _, tz = _HEADER.unpack_from(mm)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            mm.close()
+            raise ValueError(f"{self.path} is not a v{LAYOUT_VERSION} market feed")
+        names = mm[_HEADER.size:_HEADER.size + ncols * _NAME_BYTES]
+        self.columns = [names[i:i + _NAME_BYTES].rstrip(b"\0").decode()
+                        for i in range(0, len(names), _NAME_BYTES)]
+        self.capacity = capacity
+        self.tz = tz.rstrip(b"\0").decode()
+        self._counters, self._updated, self._ts, self._data = _map(mm, ncols, capacity)
+        self._mm = mm
+
+    def _reopen_if_replaced(self):
+        """The producer restarted (new file): re-map it"""
+        try:
+            replaced = os.stat(self.path).st_ino != self._inode
+        except OSError:
+            return
+        if replaced:
+            old = self._mm
+            self._open()
+            try:
+                old.close()
+            except BufferError:
+                pass  # a caller still holds views() of the old file; unmapped when they go
+
+    @property
+    def seq(self):
+        """Changes on every publish (also when the producer restarts)"""
+        self._reopen_if_replaced()
+        return (self._inode, int(self._counters[0]))
+
+    def age(self):
+        """Seconds since the last publish"""
+        return time.time() - float(self._updated[0])
+
+    def views(self, lookback=None):
+        """Zero-copy views of the latest rows: {'Datetime': int64 ns UTC, column: float64}.
+        Only consistent while seq is unchanged; read() returns a checked copy."""
+        count = int(self._counters[1])
+        n = min(count, self.capacity, lookback or self.capacity)
+        start = (count - n) % self.capacity
+        arrays = {"Datetime": self._ts[start:start + n]}
+        arrays.update({name: self._data[i, start:start + n] for i, name in enumerate(self.columns)})
+        return arrays
+
+    def read(self, lookback=None):
+        """Consistent copy of the latest `lookback` rows (all buffered rows by default)"""
+        self._reopen_if_replaced()
+        for _ in range(self.retries):
+            before = int(self._counters[0])
+            if before % 2 == 0:
+                arrays = {k: v.copy() for k, v in self.views(lookback).items()}
+                if int(self._counters[0]) == before:
+                    return arrays
+            time.sleep(0)
+        raise TimeoutError(f"{self.path}: writer kept the buffer busy")
+
+    def frame(self, lookback=None):
+        """Latest rows as a DataFrame (Datetime in the feed's timezone)"""
+        arrays = self.read(lookback)
+        times = pd.DatetimeIndex(arrays.pop("Datetime").view('datetime64[ns]'))
+        data = {"Datetime": times.tz_localize("UTC").tz_convert(self.tz)}
+        data.update(arrays)
+        return pd.DataFrame(data, copy=False)
+
+    def latest(self):
+        """Forming bar plus indicators as a mapping (check_signal input), None if empty"""
+        arrays = self.read(1)
+        if not len(arrays["Datetime"]):
+            return None
+        ts = pd.Timestamp(int(arrays.pop("Datetime")[0]), tz="UTC").tz_convert(self.tz)
+        return dict({name: float(v[0]) for name, v in arrays.items()}, Datetime=ts)
+
+    def close(self):
+        self._counters = self._updated = self._ts = self._data = None
+        self._mm.close()
+
+
+def with_indicators(bars):
+    """OHLCV frame -> the same frame plus every StreamingIndicators column"""
+    ind = StreamingIndicators()
+    values = np.empty((len(bars), len(INDICATOR_COLUMNS)), dtype=np.float64)
+    for j, (ts, o, h, l, c, v) in enumerate(zip(
+            bars['Datetime'], bars['Open'].to_numpy(), bars['High'].to_numpy(),
+            bars['Low'].to_numpy(), bars['Close'].to_numpy(), bars['Volume'].to_numpy())):
+        latest = ind.update(ts, o, h, l, c, v)
+        values[j] = [latest[name] for name in INDICATOR_COLUMNS]
+    out = bars.reset_index(drop=True)
+    return pd.concat([out, pd.DataFrame(values, columns=INDICATOR_COLUMNS)], axis=1)
+
+
+class FeedProducer:
+    """Polls the bar store and publishes bars + indicators for one symbol/interval"""
+
+    def __init__(self, store, symbol, interval, path, capacity=CAPACITY):
+        self.store = store
+        self.symbol = symbol
+        self.interval = interval
+        self.capacity = capacity
+        self.path = path
+        self.writer = None
+        self.indicators = StreamingIndicators()
+        self.rows = 0
+
+    def step(self):
+        """One poll; returns the number of rows written"""
+        if self.writer is None:
+            # Start-up: publish everything already stored
+            self.store.refresh(self.symbol, self.interval)
+            bars = self.store.bars(self.symbol, self.interval)
+            tz = str(bars['Datetime'].dt.tz) if not bars.empty else DEFAULT_TZ
+            self.writer = FeedWriter(self.path, FEED_COLUMNS, self.capacity, tz)
+        else:
+            bars = self.store.refresh(self.symbol, self.interval)
+        ind = self.indicators
+        if ind.last_ts is not None:
+            bars = bars[bars['Datetime'] >= ind.last_ts]
+        if bars.empty:
+            return 0
+
+        # A bar with the last published timestamp revises that row
+        start = self.rows - 1 if bars['Datetime'].iloc[0] == ind.last_ts else self.rows
+        data = np.empty((len(FEED_COLUMNS), len(bars)), dtype=np.float64)
+        ohlcv = [bars[c].to_numpy(dtype=np.float64) for c in OHLCV]
+        for j, ts in enumerate(bars['Datetime']):
+            o, h, l, c, v = (col[j] for col in ohlcv)
+            latest = ind.update(ts, o, h, l, c, v)
+            data[:len(OHLCV), j] = (o, h, l, c, v)
+            data[len(OHLCV):, j] = [latest[name] for name in INDICATOR_COLUMNS]
+        ts = bars['Datetime'].dt.tz_convert("UTC").dt.as_unit('ns').astype('int64').to_numpy()
+        self.writer.write(start, ts, data)
+        self.rows = start + len(bars)
+        return len(bars)
+
+
+def run(producers, poll=POLL_SECONDS):
+    for p in producers:
+        print(f"📡 Publishing {p.symbol} {p.interval} to {p.path} every {poll}s")
+    while True:
+        for p in producers:
+            try:
+                p.step()
+            except Exception as e:
+                print(f"❌ Market feed error for {p.symbol}: {e}")
+        time.sleep(poll)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 shared market-data producer")
+    parser.add_argument("symbols", nargs="*", default=["^NSEI"])
+    parser.add_argument("--interval", default="5m")
+    parser.add_argument("--dir", default=FEED_DIR or ("/dev/shm" if os.path.isdir("/dev/shm") else "."),
+                        help="Where the feed file lives (readers use MARKET_FEED_DIR)")
+    parser.add_argument("--capacity", type=int, default=CAPACITY)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS)
+    args = parser.parse_args()
+
+    store = BarStore()
+    run([FeedProducer(store, symbol, args.interval, feed_path(symbol, args.interval, args.dir), args.capacity)
+         for symbol in args.symbols], args.poll)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+V8.0 METRICS
+Lightweight in-process instrumentation primitives: counters, histograms and
+timers, collected in a registry that renders the Prometheus text format.
+The bot writes its registry to a .prom file after every cycle; api_server
+serves that file plus its own metrics on /metrics.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+# Seconds; spans tick-handling microseconds up to slow network calls
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels, extra=None):
+    """((k, v), ...) -> '{k="v",...}' (empty string without labels)"""
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter"""
+
+    kind = "counter"
+
+    def __init__(self, name, help="", labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def samples(self):
+        return [f"{self.name}{_labels(self.labels)} {_number(self.value)}"]
+
+
+class Timer:
+    """Context manager that observes its elapsed seconds in a histogram"""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative buckets, Prometheus-style)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self):
+        """with histogram.time(): ..."""
+        return Timer(self)
+
+    def quantile(self, q):
+        """Bucket-interpolated quantile estimate"""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+    def summary(self, scale=1000.0, unit="ms"):
+        """count / mean / p50 / p95 / p99 in the given unit"""
+        mean = self.sum / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            f"mean_{unit}": round(mean * scale, 3),
+            f"p50_{unit}": round(self.quantile(0.50) * scale, 3),
+            f"p95_{unit}": round(self.quantile(0.95) * scale, 3),
+            f"p99_{unit}": round(self.quantile(0.99) * scale, 3),
+        }
+
+    def samples(self):
+        with self._lock:
+            counts, total, sum_ = list(self.counts), self.count, self.sum
+        lines = []
+        cumulative = 0
+        for bound, c in zip(self.buckets + (float('inf'),), counts):
+            cumulative += c
+            le = "+Inf" if bound == float('inf') else repr(bound)
+            lines.append(f"{self.name}_bucket{_labels(self.labels, ('le', le))} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labels)} {_number(sum_)}")
+        lines.append(f"{self.name}_count{_labels(self.labels)} {total}")
+        return lines
+
+
+class Registry:
+    """Named metrics (one instance per name + label set) and their text exposition"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = cls(name, help, labels=key[1], **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help="", **labels):
+        return self._get(Counter, name, help, labels)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.items(), key=lambda item: item[0])
+        lines = []
+        current = None
+        for (name, _), metric in metrics:
+            if name != current:
+                lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+                current = name
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, path):
+        """Write render() to `path` via temp file + rename (read by api_server)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+# Process-wide default registry
+REGISTRY = Registry()
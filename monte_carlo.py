@@ -0,0 +1,286 @@
+"""
+V8.0 MONTE CARLO RISK SIMULATOR
+Bootstraps closed trades (from a backtest or the live trade ledger) and runs
+them through the live sizing rules on many equity paths at once:
+  - calculate_qty: the strategy's risk % by AI score and streak rules (v8:
+    10/8/6%, 4% after 2 losses, +2% after 3 wins, max 12%), integer quantity
+    from the trade's stop distance
+  - TP1 half-exit, streaks judged on the final leg (as in manage_trade)
+  - daily breakers: MAX_DAILY_TRADES and MAX_DAILY_LOSS_PCT
+Trades per day are resampled from the source's empirical distribution.
+Each step is one NumPy operation across all paths of a chunk; chunks can be
+spread over processes.
+Run: python monte_carlo.py --csv nifty_5m.csv --paths 1000000 --days 250
+     python monte_carlo.py --ledger live_trades.db --days 60
+     python monte_carlo.py --csv nifty_5m.csv --strategy v8_lean
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import live_paper_trade_v8 as v8
+import strategies
+
+CHUNK_PATHS = 50_000
+RUIN_FRACTION = 0.5      # a path counts as ruined once equity touches 50% of capital
+
+DEFAULT_RULES = {
+    "capital": v8.CAPITAL,
+    "max_daily_trades": v8.MAX_DAILY_TRADES,
+    "max_daily_loss_pct": v8.MAX_DAILY_LOSS_PCT,
+    "ruin_fraction": RUIN_FRACTION,
+}
+
+# Per-trade sample columns (all in price points per unit of quantity)
+SAMPLE_FIELDS = ["risk", "partial_points", "final_points", "tp1_hit", "ai_score", "base_risk_pct"]
+
+
+def get_strategy(strategy=None):
+    """Strategy object from a name (None = the live bot's STRATEGY) or as given"""
+    if isinstance(strategy, strategies.Strategy):
+        return strategy
+    return strategies.get(strategy or v8.STRATEGY)
+
+
+def base_risk_pct(ai_score, strategy=None):
+    """calculate_qty's risk % by AI score before the streak rules
+    (NaN below the strategy's sizing table: never traded)"""
+    score = np.asarray(ai_score, dtype=np.float64)
+    pct = np.full(len(score), np.nan)
+    # The table is best first: assign from the lowest row up so higher rows win
+    for min_score, row_pct in reversed(get_strategy(strategy).sizing):
+        pct = np.where(score >= min_score, row_pct, pct)
+    return pct
+
+
+def _samples(side, entry, sl, tp1, exit_price, tp1_hit, ai_score, days, strategy=None):
+    side = np.where(np.asarray(side) == 'SELL', -1.0, 1.0)
+    entry = np.asarray(entry, dtype=np.float64)
+    samples = {
+        "risk": np.abs(entry - np.asarray(sl, dtype=np.float64)),
+        "partial_points": (np.asarray(tp1, dtype=np.float64) - entry) * side,
+        "final_points": (np.asarray(exit_price, dtype=np.float64) - entry) * side,
+        "tp1_hit": np.asarray(tp1_hit, dtype=bool),
+        "ai_score": np.asarray(ai_score, dtype=np.float64),
+    }
+    samples['base_risk_pct'] = base_risk_pct(samples['ai_score'], strategy)
+    keep = np.isfinite(samples['risk']) & (samples['risk'] > 0) & np.isfinite(samples['final_points'])
+    keep &= np.isfinite(samples['base_risk_pct'])
+    samples = {k: v[keep] for k, v in samples.items()}
+    per_day = pd.Series(np.asarray(days)[keep]).value_counts().to_numpy()
+    return samples, per_day
+
+
+def samples_from_backtest(result, strategy=None):
+    """Trade samples and trades-per-day counts from backtest_v8.run_backtest"""
+    trades = result['trades']
+    days = pd.to_datetime(trades['exit_time']).dt.date if 'exit_time' in trades else np.zeros(len(trades))
+    samples, per_day = _samples(trades['type'], trades['entry'], trades['sl'], trades['tp1'],
+                                trades['exit_price'], trades['tp1_hit'], trades['ai_score'], days, strategy)
+    n_days = result['summary'].get('trading_days', 0)
+    if n_days > len(per_day):
+        # Sessions without a trade count too
+        per_day = np.concatenate([per_day, np.zeros(n_days - len(per_day), dtype=per_day.dtype)])
+    return samples, per_day
+
+
+def samples_from_ledger(path, symbol=None, strategy=None):
+    """Trade samples and trades-per-day counts from a trade_ledger database (rows with
+    full trade records only), sized by `strategy`"""
+    query = ("SELECT type, entry_price, sl, tp1, exit_price, tp1_hit, ai_score, substr(exit_time, 1, 10) "
+             "FROM trades WHERE entry_price IS NOT NULL AND sl IS NOT NULL AND exit_price IS NOT NULL")
+    args = ()
+    if symbol:
+        query += " AND symbol = ?"
+        args = (symbol,)
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute(query, args).fetchall()
+    if not rows:
+        return {k: np.empty(0) for k in SAMPLE_FIELDS}, np.empty(0, dtype=np.int64)
+    cols = list(zip(*rows))
+    samples, per_day = _samples(*cols, strategy=strategy)
+    # Sessions without a trade count too: weekdays over the ledger's span
+    days = pd.DatetimeIndex(pd.to_datetime(pd.Series(cols[-1]).unique()))
+    n_days = len(pd.bdate_range(days.min(), days.max()).union(days))
+    if n_days > len(per_day):
+        per_day = np.concatenate([per_day, np.zeros(n_days - len(per_day), dtype=per_day.dtype)])
+    return samples, per_day
+
+
+def simulate_paths(samples, per_day, n_paths, n_days, rules=None, seed=None, strategy=None):
+    """Run n_paths equity paths of n_days sessions with `strategy`'s streak rules
+    (samples carry its base risk %); returns per-path result arrays"""
+    r = dict(DEFAULT_RULES, **(rules or {}))
+    strategy = get_strategy(strategy)
+    loss_count, loss_pct = strategy.losing_streak
+    win_count, win_bonus, win_cap = strategy.winning_streak
+    rng = np.random.default_rng(seed)
+    n_samples = len(samples['risk'])
+    capital = float(r['capital'])
+    ruin_level = capital * r['ruin_fraction']
+
+    risk, partial_pts, final_pts = samples['risk'], samples['partial_points'], samples['final_points']
+    tp1_hit, base_pct = samples['tp1_hit'], samples['base_risk_pct']
+
+    balance = np.full(n_paths, capital)
+    peak = balance.copy()
+    peak_day = np.zeros(n_paths, dtype=np.int64)
+    max_dd = np.zeros(n_paths)
+    longest_recovery = np.zeros(n_paths, dtype=np.int64)
+    ruined = np.zeros(n_paths, dtype=bool)
+    wins = np.zeros(n_paths, dtype=np.int64)
+    losses = np.zeros(n_paths, dtype=np.int64)
+    day = np.zeros(n_paths, dtype=np.int64)
+    remaining = np.zeros(n_paths, dtype=np.int64)
+    d_trades = np.zeros(n_paths, dtype=np.int64)
+    d_pnl = np.zeros(n_paths)
+    n_trades = np.zeros(n_paths, dtype=np.int64)
+
+    while True:
+        # Start a new session where the previous one has no trades left
+        new_day = remaining == 0
+        day += new_day
+        alive = day <= n_days
+        if not alive.any():
+            break
+        remaining[new_day] = per_day[rng.integers(0, len(per_day), int(new_day.sum()))]
+        d_trades[new_day] = 0
+        d_pnl[new_day] = 0.0
+        has_trade = remaining > 0
+        remaining -= has_trade
+
+        # Circuit breakers (LiveBotV8.limits_hit)
+        allowed = alive & has_trade
+        allowed &= d_trades < r['max_daily_trades']
+        allowed &= d_pnl >= -(balance * r['max_daily_loss_pct'])
+
+        # calculate_qty
+        j = rng.integers(0, n_samples, n_paths)
+        risk_pct = np.where(losses >= loss_count, loss_pct, base_pct[j])
+        risk_pct = np.where(wins >= win_count, np.minimum(risk_pct + win_bonus, win_cap), risk_pct)
+        qty = np.floor(balance * (risk_pct / 100) / risk[j])
+        take = allowed & (qty > 0)
+
+        # manage_trade: half off at TP1, the rest at the final exit
+        half = np.where(tp1_hit[j], qty // 2, 0.0)
+        final = (qty - half) * final_pts[j]
+        pnl = np.where(take, half * partial_pts[j] + final, 0.0)
+
+        was_underwater = balance < peak
+        balance += pnl
+        d_pnl += pnl
+        d_trades += take
+        n_trades += take
+        won = final > 0
+        wins = np.where(take, np.where(won, wins + 1, 0), wins)
+        losses = np.where(take, np.where(won, 0, losses + 1), losses)
+
+        # Drawdown and recovery (in sessions)
+        at_peak = take & (balance >= peak)
+        recovered = at_peak & was_underwater
+        longest_recovery = np.where(recovered, np.maximum(longest_recovery, day - peak_day), longest_recovery)
+        peak_day = np.where(at_peak, day, peak_day)
+        peak = np.maximum(peak, balance)
+        max_dd = np.maximum(max_dd, (peak - balance) / peak)
+        ruined |= balance <= ruin_level
+
+    underwater_days = np.minimum(day, n_days) - peak_day
+    underwater = balance < peak
+    return {
+        "final_balance": balance,
+        "max_drawdown": max_dd,
+        "ruined": ruined,
+        "longest_recovery_days": np.maximum(longest_recovery, np.where(underwater, underwater_days, 0)),
+        "underwater_at_end": underwater,
+        "trades": n_trades,
+    }
+
+
+def _chunk(args):
+    samples, per_day, n_paths, n_days, rules, seed, strategy = args
+    return simulate_paths(samples, per_day, n_paths, n_days, rules, seed, strategy)
+
+
+def run(samples, per_day, n_paths=100_000, n_days=250, rules=None, workers=1, seed=None,
+        chunk_paths=CHUNK_PATHS, strategy=None):
+    """Simulate n_paths in chunks (optionally on a process pool) and merge the results"""
+    sizes = [chunk_paths] * (n_paths // chunk_paths)
+    if n_paths % chunk_paths:
+        sizes.append(n_paths % chunk_paths)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    strategy = get_strategy(strategy)
+    jobs = [(samples, per_day, size, n_days, rules, s, strategy) for size, s in zip(sizes, seeds)]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_chunk, jobs))
+    else:
+        parts = [_chunk(job) for job in jobs]
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def report(paths, capital=v8.CAPITAL):
+    """Risk of ruin, drawdown / final-balance / recovery distributions"""
+    q = [5, 25, 50, 75, 95, 99]
+    dd = np.percentile(paths['max_drawdown'] * 100, q)
+    final = np.percentile(paths['final_balance'], q)
+    recovery = np.percentile(paths['longest_recovery_days'], [50, 95, 99])
+    return {
+        "paths": len(paths['final_balance']),
+        "risk_of_ruin_pct": round(float(paths['ruined'].mean()) * 100, 3),
+        "p_loss_pct": round(float((paths['final_balance'] < capital).mean()) * 100, 2),
+        "max_drawdown_pct": {f"p{p}": round(float(v), 2) for p, v in zip(q, dd)},
+        "p_drawdown_over_50_pct": round(float((paths['max_drawdown'] > 0.5).mean()) * 100, 2),
+        "final_balance": {f"p{p}": round(float(v), 2) for p, v in zip(q, final)},
+        "longest_recovery_days": {f"p{p}": float(v) for p, v in zip([50, 95, 99], recovery)},
+        "underwater_at_end_pct": round(float(paths['underwater_at_end'].mean()) * 100, 2),
+        "avg_trades": round(float(paths['trades'].mean()), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 Monte Carlo risk simulator")
+    parser.add_argument("--csv", help="OHLCV CSV to backtest for trade samples")
+    parser.add_argument("--period", default="60d")
+    parser.add_argument("--interval", default=v8.INTERVAL)
+    parser.add_argument("--symbol", default=v8.SYMBOL)
+    parser.add_argument("--strategy", default=v8.STRATEGY,
+                        help="Strategy whose sizing rules are simulated (strategies.py / STRATEGY_CONFIG)")
+    parser.add_argument("--ledger", help="Sample from a trade ledger database instead")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=250, help="Sessions per path")
+    parser.add_argument("--ruin", type=float, default=RUIN_FRACTION, help="Ruin level as a fraction of capital")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.ledger:
+        samples, per_day = samples_from_ledger(args.ledger, symbol=args.symbol, strategy=args.strategy)
+        source = f"{args.ledger} {args.symbol}"
+    else:
+        import backtest_v8 as bt
+        df = bt.load_history(args.csv, args.period, args.interval, args.symbol)
+        if df.empty:
+            print("❌ No data")
+            return
+        samples, per_day = samples_from_backtest(bt.run_backtest(df, strategy=args.strategy), args.strategy)
+        source = args.csv or f"{args.symbol} {args.period} backtest"
+    if len(samples['risk']) == 0:
+        print("❌ No usable trades to resample")
+        return
+
+    print(f"🎲 {args.paths} paths x {args.days} sessions from {len(samples['risk'])} trades ({source})")
+    started = time.perf_counter()
+    paths = run(samples, per_day, args.paths, args.days, {"ruin_fraction": args.ruin},
+                workers=args.workers, seed=args.seed, strategy=args.strategy)
+    for key, value in report(paths).items():
+        print(f"   {key}: {value}")
+    print(f"⏱️ Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+V8.0 MULTI-SYMBOL ASYNC RUNNER
+Runs LiveBotV8 on many symbols in one process. Each symbol keeps its own
+trade state file; data fetches and AI calls run concurrently (bounded by
+semaphores, AI calls batched across symbols) and the daily circuit breakers
+apply to the whole portfolio. A shared RiskEngine (risk_engine.py) checks
+every entry against correlated exposure / VaR limits across the symbols
+(SECTORS_FILE = NSE constituents CSV for sector limits).
+SYMBOL@strategy runs a strategies.py strategy on a symbol; several strategies
+on one symbol (A/B runs) share a single fetch of its bars per cycle.
+Run: python multi_symbol_bot.py ^NSEI ^NSEBANK NIFTY_FIN_SERVICE.NS
+     SYMBOLS="^NSEI,^NSEBANK" python multi_symbol_bot.py
+     python multi_symbol_bot.py ^NSEI@v8 ^NSEI@v8_lean
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+import live_paper_trade_v8 as v8
+from ai_scorer import AIScorer
+from bar_store import BarStore
+from metrics import REGISTRY
+from risk_engine import RiskEngine, load_sectors
+from trade_ledger import TradeLedger
+
+DEFAULT_SYMBOLS = ["^NSEI", "^NSEBANK", "NIFTY_FIN_SERVICE.NS"]
+MAX_CONCURRENT_FETCHES = 8
+MAX_CONCURRENT_AI_CALLS = 4
+CYCLE_SECONDS = 60
+
+
+def _file_name(symbol):
+    return symbol.replace('^', '').replace('/', '_').replace('=', '_').replace('.', '_')
+
+
+def parse_spec(spec):
+    """"SYMBOL" or "SYMBOL@strategy" -> (symbol, strategy)"""
+    symbol, _, strategy = spec.partition("@")
+    return symbol, strategy or v8.STRATEGY
+
+
+class PortfolioRunner:
+    """One LiveBotV8 per symbol (or symbol@strategy) sharing a bar store, LLM client,
+    trade ledger and daily stats"""
+
+    def __init__(self, symbols, interval=v8.INTERVAL, capital=v8.CAPITAL,
+                 state_dir="portfolio_state", max_fetches=MAX_CONCURRENT_FETCHES,
+                 max_ai_calls=MAX_CONCURRENT_AI_CALLS, risk_limits=None):
+        os.makedirs(state_dir, exist_ok=True)
+        self.metrics_file = os.path.join(state_dir, "metrics.prom")
+        self.daily_stats = {"trades_count": 0, "pnl": 0, "date": datetime.now().date()}
+        store = BarStore()
+        self.store, self.interval = store, interval
+        specs = [parse_spec(s) for s in symbols]
+        self.groups = {}  # symbol -> its bots, one per strategy
+        for symbol, _ in specs:
+            self.groups.setdefault(symbol, [])
+        sectors = load_sectors(os.environ["SECTORS_FILE"]) if os.getenv("SECTORS_FILE") else None
+        # Strategies sharing a symbol may each hold a position in it
+        limits = dict({"max_pyramid": max(sum(1 for s, _ in specs if s == symbol) for symbol in self.groups)},
+                      **(risk_limits or {}))
+        self.risk = RiskEngine(list(self.groups), capital, sectors=sectors, benchmark=v8.SYMBOL, limits=limits)
+        self._risk_warm = False
+        ledger = TradeLedger(os.path.join(state_dir, "trades.db"))
+        client, scorer = v8._UNSET, None
+        self.bots = []
+        for symbol, strategy in specs:
+            name = _file_name(symbol) if strategy == v8.STRATEGY else f"{_file_name(symbol)}_{strategy}"
+            bot = v8.LiveBotV8(
+                symbol=symbol,
+                interval=interval,
+                state_file=os.path.join(state_dir, f"{name}_state.json"),
+                trades_file=os.path.join(state_dir, f"{name}_trades.csv"),
+                capital=capital / len(specs),
+                store=store,
+                daily_stats=self.daily_stats,
+                client=client,
+                scorer=scorer,
+                ledger=ledger,
+                risk=self.risk,
+                strategy=strategy,
+            )
+            if scorer is None:
+                # One client and one scorer, so setups from all symbols batch together
+                client = bot.client
+                scorer = bot.scorer = AIScorer(bot.client, max_concurrent=max_ai_calls)
+            self.bots.append(bot)
+            self.groups[symbol].append(bot)
+        self.scorer = scorer
+        self.fetch_slots = asyncio.Semaphore(max_fetches)
+        self.book = asyncio.Lock()
+
+    @property
+    def balance(self):
+        return sum(bot.state['balance'] for bot in self.bots)
+
+    def limits_hit(self):
+        """Portfolio-wide version of LiveBotV8.limits_hit"""
+        if self.daily_stats['date'] != datetime.now().date():
+            self.daily_stats.update({"trades_count": 0, "pnl": 0, "date": datetime.now().date()})
+
+        if self.daily_stats['trades_count'] >= v8.MAX_DAILY_TRADES:
+            return "Max daily trades reached"
+        if self.daily_stats['pnl'] < -(self.balance * v8.MAX_DAILY_LOSS_PCT):
+            return "Max daily loss reached"
+        return None
+
+    async def _symbol_cycle(self, bots):
+        """Fetch a symbol once; every strategy trading it reads the same new bars"""
+        for bot in bots:
+            bot.reload_strategy()
+        async with self.fetch_slots:
+            frames = [await asyncio.to_thread(bots[0].fetch_data)]
+            for bot in bots[1:]:
+                frames.append(await asyncio.to_thread(bot.fetch_data, False))
+        await asyncio.gather(*(self._trade(bot, df) for bot, df in zip(bots, frames) if df is not None))
+
+    async def _trade(self, bot, df):
+        """LiveBotV8.process with the AI call batched across symbols. The bot's work
+        (state and ledger writes) runs in a thread, one bot at a time, as bots share
+        the risk engine and daily stats."""
+        async with self.book:
+            signal = await asyncio.to_thread(bot.advance, df)
+        if not signal:
+            return
+        ai_score, reasoning = await self.scorer.score_async(signal, bot.symbol)
+        async with self.book:
+            # Re-check: another symbol may have tripped a breaker while we waited
+            if self.limits_hit() is None:
+                await asyncio.to_thread(bot.enter_trade, signal, ai_score, reasoning)
+
+    async def cycle(self):
+        """One poll of every symbol; returns the wall time in seconds"""
+        started = time.perf_counter()
+        self.risk.capital = self.balance
+        results = await asyncio.gather(*(self._symbol_cycle(bots) for bots in self.groups.values()),
+                                       return_exceptions=True)
+        for (symbol, bots), result in zip(self.groups.items(), results):
+            if isinstance(result, Exception):
+                print(f"❌ {symbol}: {result}")
+                bots[0]._count_error("loop")
+        if not self._risk_warm:
+            # Covariance from the stored history once the first fetch has filled the store
+            bars = {symbol: self.store.bars(symbol, self.interval) for symbol in self.groups}
+            self._risk_warm = self.risk.warm(bars) > 0
+        return time.perf_counter() - started
+
+    async def run(self):
+        print(f"🤖 V8.0 ULTRA PORTFOLIO BOT STARTED ({len(self.groups)} symbols, {len(self.bots)} bots)")
+        print(f"💰 Balance: ₹{self.balance:.2f}")
+
+        try:
+            while True:
+                reason = self.limits_hit()
+                if reason:
+                    print(f"🛑 {reason}. Sleeping...")
+                    await asyncio.sleep(300)
+                    continue
+
+                elapsed = await self.cycle()
+                open_trades = sum(1 for bot in self.bots if bot.state['active_trade'])
+                print(f"⏱️ Cycle {elapsed:.2f}s | Open trades: {open_trades} | Balance: ₹{self.balance:.2f} | "
+                      f"VaR: ₹{self.risk.var():.0f}")
+                try:
+                    REGISTRY.write(self.metrics_file)
+                except OSError as e:
+                    print(f"⚠️ Metrics write failed: {e}")
+                await asyncio.sleep(max(0.0, CYCLE_SECONDS - elapsed))
+        finally:
+            # Final state exports
+            for bot in self.bots:
+                bot.state_store.close()
+
+
+if __name__ == "__main__":
+    symbols = sys.argv[1:] or [s for s in os.getenv("SYMBOLS", "").split(",") if s] or DEFAULT_SYMBOLS
+    asyncio.run(PortfolioRunner(symbols).run())
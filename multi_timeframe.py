@@ -0,0 +1,181 @@
+"""
+V8.0 MULTI-TIMEFRAME BARS
+One base bar stream (e.g. 1m) is resampled in memory into every configured
+timeframe as the bars arrive; each timeframe keeps its own
+StreamingIndicators. Buckets are anchored on the NSE session open (09:15),
+so 60m bars run 09:15-10:15 like Yahoo's. A revised (still-forming) base
+bar revises each timeframe's forming bar, exactly as the single-timeframe
+engine handles a revised bar.
+
+Higher-timeframe trends are exposed as Trend_<tf> fields (+1 up, -1 down,
+0 mixed, NaN until warmed up); signal_rules counts agreement with them as
+extra confluence factors. No extra fetches and no full recomputation.
+"""
+
+import math
+import os
+import pickle
+import pandas as pd
+
+from indicators import SNAPSHOT_VERSION as INDICATORS_VERSION, StreamingIndicators, select_columns
+
+INTERVAL_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "1h": 60}
+SESSION_OPEN = "09:15"
+SNAPSHOT_VERSION = 1
+TREND_COLUMNS = ("EMA20", "EMA50", "Supertrend_Direction")  # all trend() reads of a higher timeframe
+
+
+def trend_field(tf):
+    return f"Trend_{tf}"
+
+
+def trend(latest):
+    """+1 when EMA20 > EMA50 and Supertrend is up, -1 for the mirror, 0 if mixed, NaN before warm-up"""
+    fast, slow, direction = latest['EMA20'], latest['EMA50'], latest['Supertrend_Direction']
+    if fast != fast or slow != slow or direction != direction:
+        return math.nan
+    if fast > slow and direction == 1:
+        return 1.0
+    if fast < slow and direction == -1:
+        return -1.0
+    return 0.0
+
+
+def _merge(a, b):
+    """Combine consecutive (open, high, low, close, volume) bars"""
+    if a is None:
+        return b
+    return (a[0], max(a[1], b[1]), min(a[2], b[2]), b[3], a[4] + b[4])
+
+
+class _Bucket:
+    """Forming bar of one timeframe: closed base bars folded together plus the forming base bar"""
+
+    def __init__(self, minutes, session_open):
+        self.freq = pd.Timedelta(minutes=minutes)
+        self.session_open = session_open
+        self.start = None
+        self.closed = None
+        self.last_ts = None
+        self.forming = None
+
+    def start_of(self, ts):
+        anchor = ts.normalize() + self.session_open
+        return anchor + ((ts - anchor) // self.freq) * self.freq
+
+    def update(self, ts, bar):
+        start = self.start_of(ts)
+        if start != self.start:
+            self.start, self.closed = start, None
+        elif ts != self.last_ts:
+            self.closed = _merge(self.closed, self.forming)  # the previous base bar has closed
+        self.last_ts, self.forming = ts, bar
+        return start, _merge(self.closed, bar)
+
+
+class MultiTimeframe:
+    """Base bars -> bars and indicators for each of `timeframes` (the first one is traded).
+    `columns` selects the traded timeframe's indicators; higher ones only compute the trend."""
+
+    def __init__(self, base="1m", timeframes=("5m", "15m", "60m"), session_open=SESSION_OPEN, columns=None):
+        base_minutes = INTERVAL_MINUTES[base]
+        for tf in timeframes:
+            if INTERVAL_MINUTES[tf] % base_minutes:
+                raise ValueError(f"{tf} is not a multiple of the {base} base interval")
+        self.base = base
+        self.timeframes = tuple(timeframes)
+        self.columns = select_columns(columns)
+        open_ = pd.Timedelta(hours=int(session_open[:2]), minutes=int(session_open[3:]))
+        self.indicators = {tf: StreamingIndicators(columns if i == 0 else TREND_COLUMNS)
+                           for i, tf in enumerate(self.timeframes)}
+        self._buckets = {tf: _Bucket(INTERVAL_MINUTES[tf], open_) for tf in self.timeframes}
+        self.last_ts = None
+
+    @property
+    def primary(self):
+        """Indicators of the traded timeframe"""
+        return self.indicators[self.timeframes[0]]
+
+    def update(self, ts, open_, high, low, close, volume):
+        """Add or revise one base bar; returns the traded timeframe's latest values"""
+        ts = pd.Timestamp(ts)
+        if self.last_ts is not None and ts < self.last_ts:
+            raise ValueError(f"Bar {ts} is older than the last bar {self.last_ts}")
+        bar = (float(open_), float(high), float(low), float(close), float(volume))
+        for tf, bucket in self._buckets.items():
+            start, (o, h, l, c, v) = bucket.update(ts, bar)
+            self.indicators[tf].update(start, o, h, l, c, v)
+        self.last_ts = ts
+        return self.primary.latest
+
+    def update_frame(self, df):
+        """Feed every base bar of df that is at or after the last seen timestamp"""
+        time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+        times = pd.to_datetime(df[time_col])
+        if self.last_ts is not None:
+            keep = (times >= self.last_ts).to_numpy()
+            df, times = df[keep], times[keep]
+        for ts, o, h, l, c, v in zip(times, df['Open'].to_numpy(), df['High'].to_numpy(),
+                                     df['Low'].to_numpy(), df['Close'].to_numpy(),
+                                     df['Volume'].to_numpy()):
+            self.update(ts, o, h, l, c, v)
+        return self.primary.latest
+
+    def trends(self):
+        """Trend_<tf> for every timeframe above the traded one"""
+        return {trend_field(tf): trend(self.indicators[tf].latest) for tf in self.timeframes[1:]}
+
+    def row(self):
+        """Traded-timeframe bar, its indicators and the higher-timeframe trends"""
+        return dict(self.primary.row(), **self.trends())
+
+    def frame(self):
+        return pd.DataFrame([self.row()])
+
+    # Persistence (same contract as StreamingIndicators.save / load)
+
+    def save(self, path, **meta):
+        snap = {
+            "version": SNAPSHOT_VERSION, "indicators_version": INDICATORS_VERSION,
+            "base": self.base, "timeframes": self.timeframes, "columns": self.columns,
+            "last_ts": self.last_ts, "buckets": self._buckets,
+            "indicators": {tf: ind.snapshot() for tf, ind in self.indicators.items()}, **meta,
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, base, timeframes, columns=None, **meta):
+        """Restore from save(); None if missing, unreadable or saved with a different setup"""
+        try:
+            with open(path, 'rb') as f:
+                snap = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        expected = dict(meta, version=SNAPSHOT_VERSION, indicators_version=INDICATORS_VERSION,
+                        base=base, timeframes=tuple(timeframes), columns=select_columns(columns))
+        if not isinstance(snap, dict) or any(snap.get(k) != v for k, v in expected.items()):
+            return None
+        mtf = cls(base, timeframes, columns=columns)
+        mtf.last_ts, mtf._buckets = snap['last_ts'], snap['buckets']
+        mtf.indicators = {tf: StreamingIndicators.restore(s) for tf, s in snap['indicators'].items()}
+        return mtf
+
+
+def trend_history(df, base, htf, session_open=SESSION_OPEN):
+    """Trend_<tf> columns for every bar of a base-interval history, as the live
+    engine would have seen them at that bar (forming higher-timeframe bars)"""
+    mtf = MultiTimeframe(base, (base, *htf), session_open, columns=TREND_COLUMNS)
+    time_col = 'Datetime' if 'Datetime' in df.columns else 'Date'
+    timeframes = mtf.timeframes[1:]
+    fields = [trend_field(tf) for tf in timeframes]
+    out = {f: [] for f in fields}
+    for ts, o, h, l, c, v in zip(pd.to_datetime(df[time_col]), df['Open'].to_numpy(),
+                                 df['High'].to_numpy(), df['Low'].to_numpy(),
+                                 df['Close'].to_numpy(), df['Volume'].to_numpy()):
+        mtf.update(ts, o, h, l, c, v)
+        for tf, f in zip(timeframes, fields):
+            out[f].append(trend(mtf.indicators[tf].latest))
+    return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,267 @@
+"""
+V8.0 PARAMETER SWEEP / WALK-FORWARD OPTIMIZER
+Runs the vectorized backtest over a grid of V8 thresholds on a process pool.
+Indicators are computed once and shared with the workers through
+multiprocessing.shared_memory, so only parameter dicts cross the process boundary.
+Run: python optimizer_v8.py --period 60d --workers 16 --out sweep.csv
+     python optimizer_v8.py --csv nifty_5m.csv --walk-forward 20 5
+     python optimizer_v8.py --csv nifty_5m.csv --strategy v8_lean
+Grid values override the strategy's parameters (strategies.py / STRATEGY_CONFIG).
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import backtest_v8 as bt
+import live_paper_trade_v8 as v8
+
+DEFAULT_GRID = {
+    "min_ai_score": [7.5, 8.0, 8.5, 9.0],
+    "min_confluence": [4, 5, 6],
+    "min_adx": [20, 25, 30, 35],
+    "min_volume_ratio": [1.0, 1.2, 1.3, 1.5],
+    "sl_atr_mult": [1.0, 1.2, 1.5],
+    "tp1_r_mult": [1.5, 2.0, 2.5],
+    "tp2_r_mult": [3.0, 4.0, 5.0],
+}
+
+# Changing any of these changes the signal arrays; the rest only affect the kernel
+SIGNAL_PARAMS = ("min_confluence", "min_adx", "min_volume_ratio",
+                 "sl_atr_mult", "tp1_r_mult", "tp2_r_mult")
+
+METRICS = ("return_pct", "calmar", "profit_factor", "win_rate", "total_trades")
+
+# Worker-side views onto the shared bar matrix (set by _attach)
+_ARRAYS = None
+_SHM = None
+
+
+class SharedBars:
+    """Bar arrays packed into one shared-memory block (one row per column)"""
+
+    def __init__(self, arrays):
+        self.columns = list(arrays.keys())
+        self.length = len(arrays[self.columns[0]])
+        nbytes = max(len(self.columns) * self.length * 8, 1)
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        matrix = np.ndarray((len(self.columns), self.length), dtype=np.float64, buffer=self.shm.buf)
+        for i, name in enumerate(self.columns):
+            matrix[i] = arrays[name]
+
+    @property
+    def spec(self):
+        return self.shm.name, self.columns, self.length
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _views(shm, columns, length):
+    matrix = np.ndarray((len(columns), length), dtype=np.float64, buffer=shm.buf)
+    arrays = {name: matrix[i] for i, name in enumerate(columns)}
+    arrays['Day'] = arrays['Day'].astype(np.int64)
+    return arrays
+
+
+def _attach(shm_name, columns, length):
+    """Pool initializer: map the shared bar matrix without copying it"""
+    global _ARRAYS, _SHM
+    _SHM = shared_memory.SharedMemory(name=shm_name)
+    _ARRAYS = _views(_SHM, columns, length)
+
+
+def _slice(arrays, start, end):
+    return {name: values[start:end] for name, values in arrays.items()}
+
+
+def _score(rows, capital, balance):
+    """Sweep metrics straight from the kernel output (no DataFrame per combo)"""
+    n = len(rows)
+    if n == 0:
+        return {"total_trades": 0, "return_pct": 0.0, "win_rate": 0.0,
+                "max_drawdown_pct": 0.0, "profit_factor": 0.0, "calmar": 0.0}
+
+    total = rows[:, 12] + rows[:, 13]
+    equity = np.concatenate([[capital], rows[:, 14]])
+    peak = np.maximum.accumulate(equity)
+    max_dd = float(((peak - equity) / peak).max()) * 100
+    gains = total[total > 0].sum()
+    losses = -total[total <= 0].sum()
+    ret = (balance / capital - 1) * 100
+    return {
+        "total_trades": n,
+        "return_pct": round(float(ret), 2),
+        "win_rate": round(float((total > 0).mean()) * 100, 1),
+        "max_drawdown_pct": round(max_dd, 2),
+        "profit_factor": round(float(gains / losses), 3) if losses > 0 else float('inf'),
+        "calmar": round(float(ret / max(max_dd, 1.0)), 3),
+    }
+
+
+def _run_chunk(task):
+    """Worker: backtest every combo in the chunk over bars [start, end)"""
+    combos, start, end, strategy = task
+    arrays = _slice(_ARRAYS, start, end)
+    results = []
+    last_key, signals = None, None
+    for combo in combos:
+        params = bt.params_for(strategy, combo)
+        key = tuple(params[k] for k in SIGNAL_PARAMS)
+        if key != last_key:
+            signals = bt.signal_arrays(arrays, params, strategy)
+            last_key = key
+        rows, balance, _ = bt.simulate(arrays, signals, params, strategy=strategy)
+        results.append(dict(combo, **_score(rows, params['capital'], balance)))
+    return results
+
+
+def expand_grid(grid, strategy=None):
+    """Cartesian product of the grid, ordered so signal arrays can be reused"""
+    names = list(grid.keys())
+    combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    defaults = bt.params_for(strategy)
+    combos.sort(key=lambda c: tuple(c.get(k, defaults[k]) for k in SIGNAL_PARAMS))
+    return combos
+
+
+def _chunks(combos, n_chunks):
+    size = max(1, -(-len(combos) // n_chunks))
+    return [combos[i:i + size] for i in range(0, len(combos), size)]
+
+
+def _sweep(pool, combos, start, end, workers, strategy):
+    tasks = [(chunk, start, end, strategy) for chunk in _chunks(combos, workers * 8)]
+    results = []
+    for part in pool.map(_run_chunk, tasks):
+        results.extend(part)
+    return results
+
+
+def rank(results, metric="calmar", min_trades=10):
+    """Ranked results table, best first"""
+    table = pd.DataFrame(results)
+    if table.empty:
+        return table
+    table = table[table['total_trades'] >= min_trades]
+    return table.sort_values(metric, ascending=False).reset_index(drop=True)
+
+
+def sweep(df, grid=None, workers=None, metric="calmar", min_trades=10, strategy=None):
+    """Backtest every grid combination of `strategy` over the whole history"""
+    workers = workers or os.cpu_count()
+    strategy = bt.get_strategy(strategy)
+    arrays = bt.bar_arrays(df)
+    combos = expand_grid(grid or DEFAULT_GRID, strategy)
+    shared = SharedBars(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=shared.spec) as pool:
+            results = _sweep(pool, combos, 0, shared.length, workers, strategy)
+    finally:
+        shared.close()
+    return rank(results, metric, min_trades)
+
+
+def walk_forward(df, train_days, test_days, grid=None, workers=None, metric="calmar", min_trades=5,
+                 strategy=None):
+    """Optimize on a rolling train window, then score the winner out of sample.
+
+    Returns (folds, oos) where folds has one row per window with the chosen
+    parameters and their in-sample / out-of-sample metrics.
+    """
+    workers = workers or os.cpu_count()
+    strategy = bt.get_strategy(strategy)
+    arrays = bt.bar_arrays(df)
+    combos = expand_grid(grid or DEFAULT_GRID, strategy)
+    days = np.unique(arrays['Day'])
+    shared = SharedBars(arrays)
+    folds = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=shared.spec) as pool:
+            for first in range(0, len(days) - train_days - test_days + 1, test_days):
+                train_start, train_end, test_end = np.searchsorted(
+                    arrays['Day'],
+                    [days[first], days[first + train_days], days[first + train_days + test_days - 1] + 1],
+                )
+                ranked = rank(_sweep(pool, combos, train_start, train_end, workers, strategy), metric, min_trades)
+                if ranked.empty:
+                    continue
+                best = {k: ranked.iloc[0][k] for k in combos[0].keys()}
+                oos = pool.submit(_run_chunk, ([best], train_end, test_end, strategy)).result()[0]
+                folds.append(dict(
+                    best,
+                    train_from=str(np.datetime64(int(days[first]), 'D')),
+                    test_from=str(np.datetime64(int(days[first + train_days]), 'D')),
+                    **{f"is_{k}": ranked.iloc[0][k] for k in METRICS},
+                    **{f"oos_{k}": oos[k] for k in METRICS},
+                ))
+    finally:
+        shared.close()
+
+    folds = pd.DataFrame(folds)
+    oos = {}
+    if not folds.empty:
+        oos = {
+            "folds": len(folds),
+            "compounded_return_pct": round(float((np.prod(1 + folds['oos_return_pct'] / 100) - 1) * 100), 2),
+            "oos_trades": int(folds['oos_total_trades'].sum()),
+        }
+    return folds, oos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 parameter sweep / walk-forward")
+    parser.add_argument("--csv", help="OHLCV CSV with a Datetime column")
+    parser.add_argument("--period", default="60d")
+    parser.add_argument("--interval", default=v8.INTERVAL)
+    parser.add_argument("--symbol", default=v8.SYMBOL)
+    parser.add_argument("--strategy", default=v8.STRATEGY,
+                        help="Strategy from strategies.py / STRATEGY_CONFIG (default v8)")
+    parser.add_argument("--grid", help="JSON file mapping parameter -> list of values")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--metric", default="calmar", choices=METRICS)
+    parser.add_argument("--min-trades", type=int, default=10)
+    parser.add_argument("--walk-forward", nargs=2, type=int, metavar=("TRAIN_DAYS", "TEST_DAYS"))
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="Write the full ranked table to this CSV")
+    args = parser.parse_args()
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid, 'r') as f:
+            grid = json.load(f)
+
+    df = bt.load_history(args.csv, args.period, args.interval, args.symbol)
+    if df.empty:
+        print("❌ No data")
+        return
+    df = v8.compute_indicators(df)
+
+    n_combos = int(np.prod([len(v) for v in grid.values()]))
+    print(f"🔧 {n_combos} combinations x {len(df)} bars on {args.workers} workers")
+    started = time.perf_counter()
+
+    if args.walk_forward:
+        table, oos = walk_forward(df, *args.walk_forward, grid=grid, workers=args.workers,
+                                  metric=args.metric, min_trades=args.min_trades, strategy=args.strategy)
+        print(table.to_string(index=False))
+        print(f"📊 Out-of-sample: {oos}")
+    else:
+        table = sweep(df, grid, args.workers, args.metric, args.min_trades, args.strategy)
+        print(table.head(args.top).to_string(index=False))
+
+    print(f"⏱️ Done in {time.perf_counter() - started:.1f}s")
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"💾 Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
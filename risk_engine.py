@@ -0,0 +1,311 @@
+"""
+V8.0 PORTFOLIO RISK ENGINE
+Cross-symbol limits on top of the per-bot circuit breakers:
+  - an exponentially weighted (RiskMetrics) covariance of bar log returns,
+    updated incrementally once per closed bar
+  - net / gross / per-sector / beta-weighted exposure, pyramiding and
+    parametric VaR limits, checked before every order
+
+Everything an order check needs is kept precomputed: the exposure vector e,
+the product cov @ e and the portfolio variance e'.cov.e. Adding d rupees of
+symbol i changes the variance to  V + 2 d (cov e)_i + d^2 cov_ii,  so a
+check is O(1) however many symbols there are. A fill costs O(n) and a bar
+close O(n^2); nothing is recomputed per order.
+
+check_batch() and portfolio_var() are the vectorized forms for backtests.
+Exposure is signed notional in rupees (qty * price, negative = short).
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+EWMA_LAMBDA = 0.97        # decay per bar
+MIN_OBSERVATIONS = 20     # bars before VaR is enforced (a cold covariance would allow anything)
+VAR_Z = 2.326             # one-sided 99%
+VAR_HORIZON_BARS = 1      # VaR over the next bar (the bot acts once per bar)
+
+# Limits as multiples of capital (None disables one)
+DEFAULT_LIMITS = {
+    "var_pct": 0.20,           # 99% VaR over VAR_HORIZON_BARS
+    "net_leverage": None,      # |sum of exposure|
+    "gross_leverage": None,    # sum of |exposure|
+    "sector_leverage": None,   # |exposure| of any one sector
+    "beta_leverage": None,     # |beta-weighted exposure| against the benchmark
+    "max_pyramid": 1,          # entries per symbol in the same direction
+}
+
+# check_batch() codes; REASONS[code] is the text check() returns
+OK, UNKNOWN, PYRAMID, NET, GROSS, SECTOR, BETA, VAR = range(8)
+REASONS = [None, "Symbol outside the risk universe", "Pyramiding limit", "Net exposure limit",
+           "Gross exposure limit", "Sector exposure limit", "Beta exposure limit", "VaR limit"]
+
+
+def load_sectors(path):
+    """{Yahoo ticker: sector} from NSE's index constituents CSV (Symbol, Industry columns)"""
+    df = pd.read_csv(path)
+    cols = {c.strip().lower(): c for c in df.columns}
+    symbols = df[cols['symbol']].astype(str).str.strip()
+    tickers = [s if "." in s or s.startswith("^") else f"{s}.NS" for s in symbols]
+    return dict(zip(tickers, df[cols['industry']].astype(str).str.strip()))
+
+
+def ewma_covariance(returns, lam=EWMA_LAMBDA):
+    """Covariance after feeding every row of `returns` (bars x symbols, NaN = no
+    move) through RiskEngine.update_returns, in one weighted matmul"""
+    r = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+    weights = (1.0 - lam) * lam ** np.arange(len(r) - 1, -1, -1)
+    return r.T @ (r * weights[:, None])
+
+
+def portfolio_var(returns, exposure, lam=EWMA_LAMBDA, z=VAR_Z, horizon=VAR_HORIZON_BARS):
+    """Pre-trade VaR of an exposure path: bar t is valued with the covariance
+    known before it (bars x symbols arrays in; VaR per bar out)"""
+    r = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+    e = np.asarray(exposure, dtype=np.float64)
+    cov = np.zeros((r.shape[1], r.shape[1]))
+    var = np.empty(len(r))
+    for t in range(len(r)):
+        var[t] = e[t] @ cov @ e[t]
+        cov = lam * cov + (1.0 - lam) * np.outer(r[t], r[t])
+    return z * np.sqrt(np.maximum(var, 0.0) * horizon)
+
+
+class RiskEngine:
+    """Portfolio exposure, covariance and pre-trade limits for a fixed symbol universe"""
+
+    def __init__(self, symbols, capital, sectors=None, benchmark=None, lam=EWMA_LAMBDA,
+                 limits=None, min_observations=MIN_OBSERVATIONS):
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.capital = capital
+        self.lam = lam
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.min_observations = min_observations
+        sectors = sectors or {}
+        names = sorted({sectors.get(s, s) for s in self.symbols})
+        self.sector_names = names
+        self.sector = np.array([names.index(sectors.get(s, s)) for s in self.symbols], dtype=np.int64)
+        self.benchmark = self.index.get(benchmark)
+
+        self.cov = np.zeros((n, n))
+        self.observations = 0
+        self.beta = np.ones(n)
+        self.qty = np.zeros(n)
+        self.price = np.full(n, np.nan)   # mark price per symbol
+        self.entries = np.zeros(n, dtype=np.int64)
+        self._last_close = np.full(n, np.nan)
+        self._bar_ts = None
+        self._refresh()
+
+    # Precomputed aggregates
+
+    def _refresh(self):
+        """Recompute every aggregate from qty, price and cov (fills and bar closes)"""
+        price = np.nan_to_num(self.price)
+        self.exposure = self.qty * price
+        self.cov_e = self.cov @ self.exposure
+        self.variance = float(self.exposure @ self.cov_e)
+        self.net = float(self.exposure.sum())
+        self.gross = float(np.abs(self.exposure).sum())
+        self.sector_exposure = np.bincount(self.sector, weights=self.exposure, minlength=len(self.sector_names))
+        self.beta_exposure = float(self.beta @ self.exposure)
+
+    def _update_betas(self):
+        b = self.benchmark
+        if b is not None and self.cov[b, b] > 0:
+            self.beta = self.cov[:, b] / self.cov[b, b]
+
+    # Market data
+
+    def update_returns(self, returns):
+        """One closed bar of log returns (NaN = the symbol did not trade)"""
+        r = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+        self.cov *= self.lam
+        self.cov += (1.0 - self.lam) * np.outer(r, r)
+        self.observations += 1
+        self._update_betas()
+        self._refresh()
+
+    def observe(self, symbol, ts, close):
+        """Latest close of one symbol's forming bar. A later bar timestamp closes
+        the previous bar: its returns go into the covariance and positions are
+        marked to the new closes."""
+        i = self.index.get(symbol)
+        if i is None:
+            return
+        ts = pd.Timestamp(ts)
+        if self._bar_ts is not None and ts > self._bar_ts:
+            self._close_bar()
+        if self._bar_ts is None or ts > self._bar_ts:
+            self._bar_ts = ts
+        self.price[i] = close
+
+    def _close_bar(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = np.log(self.price / self._last_close)
+        first = np.isnan(self._last_close).all()
+        self._last_close = self.price.copy()
+        if first:
+            self._refresh()  # first closed bar: nothing to compare with yet
+        else:
+            self.update_returns(returns)
+
+    def warm(self, frames):
+        """Seed the covariance from stored bars: {symbol: frame with Datetime, Close}.
+        The last bar is taken as still forming; observe() closes it."""
+        closes = pd.DataFrame({s: df.set_index('Datetime')['Close'] for s, df in frames.items()
+                               if s in self.index and not df.empty})
+        if len(closes) < 2:
+            return 0
+        closes = closes.sort_index().ffill().reindex(columns=self.symbols)
+        returns = np.log(closes / closes.shift(1)).iloc[1:-1].to_numpy()
+        self.cov = ewma_covariance(returns, self.lam)
+        self.observations = len(returns)
+        self._last_close = closes.iloc[-2].to_numpy(dtype=np.float64)
+        last = closes.iloc[-1].to_numpy(dtype=np.float64)
+        self.price = np.where(np.isnan(self.price), last, self.price)
+        self._bar_ts = closes.index[-1]
+        self._update_betas()
+        self._refresh()
+        return len(returns)
+
+    # Positions
+
+    def position(self, symbol):
+        """Signed quantity held in `symbol` (0 outside the universe)"""
+        i = self.index.get(symbol)
+        return 0 if i is None else float(self.qty[i])
+
+    def set_position(self, symbol, qty, price=None):
+        """Signed position after a fill (0 when flat)"""
+        i = self.index.get(symbol)
+        if i is None:
+            return
+        old = self.qty[i]
+        if qty == 0:
+            self.entries[i] = 0
+        elif old == 0 or np.sign(qty) != np.sign(old):
+            self.entries[i] = 1
+        elif abs(qty) > abs(old):
+            self.entries[i] += 1  # added to the position
+        if price is not None and self.price[i] != self.price[i]:
+            self.price[i] = price  # not marked yet: value at the fill price
+        old_exposure = self.exposure[i]
+        self.qty[i] = qty
+        d = float(qty * np.nan_to_num(self.price[i]) - old_exposure)
+        # O(n) update of the aggregates instead of a full _refresh
+        self.exposure[i] += d
+        self.variance += 2 * d * self.cov_e[i] + d * d * self.cov[i, i]
+        self.cov_e += d * self.cov[:, i]
+        self.net += d
+        self.gross += abs(self.exposure[i]) - abs(old_exposure)
+        self.sector_exposure[self.sector[i]] += d
+        self.beta_exposure += self.beta[i] * d
+
+    # Checks
+
+    def var(self, variance=None):
+        """Parametric VaR in rupees of the current (or a given) variance"""
+        v = self.variance if variance is None else variance
+        return VAR_Z * math.sqrt(max(v, 0.0) * VAR_HORIZON_BARS)
+
+    def check(self, symbol, qty, price):
+        """Pre-trade check of adding `qty` (signed) at `price`: None if allowed, else the reason.
+        Orders that reduce a limit's usage are never blocked by that limit."""
+        i = self.index.get(symbol)
+        if i is None:
+            return REASONS[UNKNOWN]
+        limits, capital = self.limits, self.capital
+        d = qty * price
+        e = self.exposure[i]
+
+        if limits['max_pyramid'] is not None and e * d > 0 and self.entries[i] >= limits['max_pyramid']:
+            return REASONS[PYRAMID]
+        if limits['net_leverage'] is not None:
+            net = abs(self.net + d)
+            if net > limits['net_leverage'] * capital and net > abs(self.net):
+                return REASONS[NET]
+        if limits['gross_leverage'] is not None:
+            gross = self.gross + abs(e + d) - abs(e)
+            if gross > limits['gross_leverage'] * capital and gross > self.gross:
+                return REASONS[GROSS]
+        if limits['sector_leverage'] is not None:
+            old = self.sector_exposure[self.sector[i]]
+            if abs(old + d) > limits['sector_leverage'] * capital and abs(old + d) > abs(old):
+                return REASONS[SECTOR]
+        if limits['beta_leverage'] is not None:
+            old = self.beta_exposure
+            new = old + self.beta[i] * d
+            if abs(new) > limits['beta_leverage'] * capital and abs(new) > abs(old):
+                return REASONS[BETA]
+        if limits['var_pct'] is not None and self.observations >= self.min_observations:
+            variance = self.variance + 2 * d * self.cov_e[i] + d * d * self.cov[i, i]
+            if variance > self.variance and self.var(variance) > limits['var_pct'] * capital:
+                return REASONS[VAR]
+        return None
+
+    def max_qty(self, symbol, side, price):
+        """Largest quantity in direction `side` (+1 / -1) that passes the VaR limit
+        (inf when VaR is not enforced yet or the symbol has no variance)"""
+        i = self.index.get(symbol)
+        limit = self.limits['var_pct']
+        if i is None or price <= 0:
+            return 0
+        if limit is None or self.observations < self.min_observations or self.cov[i, i] <= 0:
+            return math.inf
+        # Solve V + 2 d g + d^2 s = L^2 for the largest d in the order's direction
+        target = (limit * self.capital / VAR_Z) ** 2 / VAR_HORIZON_BARS
+        g, s = side * self.cov_e[i], self.cov[i, i]
+        disc = g * g - s * (self.variance - target)
+        if disc < 0:
+            return 0
+        return max(0, int((-g + math.sqrt(disc)) / s / price))
+
+    def check_batch(self, symbols, qty, price):
+        """check() for many independent orders against the current book (backtests,
+        screener candidates); returns an int array of codes, REASONS[code]"""
+        n = len(qty)
+        idx = np.array([self.index.get(s, -1) for s in symbols], dtype=np.int64)
+        known = idx >= 0
+        i = np.where(known, idx, 0)
+        d = np.asarray(qty, dtype=np.float64) * np.asarray(price, dtype=np.float64)
+        e = self.exposure[i]
+        limits, capital = self.limits, self.capital
+        codes = np.where(known, OK, UNKNOWN).astype(np.int64)
+
+        def flag(code, hit):
+            codes[(codes == OK) & hit] = code
+
+        if limits['max_pyramid'] is not None:
+            flag(PYRAMID, (e * d > 0) & (self.entries[i] >= limits['max_pyramid']))
+        if limits['net_leverage'] is not None:
+            net = np.abs(self.net + d)
+            flag(NET, (net > limits['net_leverage'] * capital) & (net > abs(self.net)))
+        if limits['gross_leverage'] is not None:
+            gross = self.gross + np.abs(e + d) - np.abs(e)
+            flag(GROSS, (gross > limits['gross_leverage'] * capital) & (gross > self.gross))
+        if limits['sector_leverage'] is not None:
+            old = self.sector_exposure[self.sector[i]]
+            flag(SECTOR, (np.abs(old + d) > limits['sector_leverage'] * capital) & (np.abs(old + d) > np.abs(old)))
+        if limits['beta_leverage'] is not None:
+            new = self.beta_exposure + self.beta[i] * d
+            flag(BETA, (np.abs(new) > limits['beta_leverage'] * capital) & (np.abs(new) > abs(self.beta_exposure)))
+        if limits['var_pct'] is not None and self.observations >= self.min_observations and n:
+            variance = self.variance + 2 * d * self.cov_e[i] + d * d * self.cov[i, i]
+            var = VAR_Z * np.sqrt(np.maximum(variance, 0.0) * VAR_HORIZON_BARS)
+            flag(VAR, (variance > self.variance) & (var > limits['var_pct'] * capital))
+        return codes
+
+    def summary(self):
+        """Current book for logs and /state"""
+        return {
+            "net": round(float(self.net), 2),
+            "gross": round(float(self.gross), 2),
+            "beta_exposure": round(float(self.beta_exposure), 2),
+            "var": round(self.var(), 2),
+            "var_limit": None if self.limits['var_pct'] is None else round(self.limits['var_pct'] * self.capital, 2),
+            "observations": self.observations,
+            "sectors": {name: round(float(v), 2) for name, v in zip(self.sector_names, self.sector_exposure) if v},
+        }
@@ -0,0 +1,388 @@
+"""
+V8.0 SIGNAL SCREENER
+Runs the V8 confluence rules over a whole universe (e.g. the NIFTY 500) in
+one pass instead of one bot per symbol:
+  1. bars come from batched multi-ticker downloads (fixtures or the local
+     bar store when offline)
+  2. they are packed into a symbol x bar panel and the indicators are
+     computed for every symbol at once: the StreamingIndicators recurrences,
+     vectorized across symbols, so values match the live bot
+  3. signal_rules evaluates the latest bar of every symbol
+  4. candidates are ranked and only the top K go to the AI scorer
+--workers splits the universe across a process pool (each worker fetches
+and screens its own share).
+Run: python screener.py --universe ind_nifty500list.csv --top 10
+     python screener.py --universe nifty500.txt --workers 4 --out candidates.csv
+     OFFLINE_DATA_DIR=fixtures python screener.py ^NSEI ^NSEBANK NIFTY_FIN_SERVICE.NS
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+import backtest_v8 as bt
+import live_paper_trade_v8 as v8
+from ai_scorer import AIScorer
+from bar_store import BarStore, OHLCV, make_source
+from indicators import COLUMNS as INDICATOR_COLUMNS
+from signal_rules import reason_names
+
+LOOKBACK = 400       # bars per symbol; EMA200 needs 200 to warm up
+BATCH_SIZE = 100     # tickers per Yahoo download
+TOP_K = 10
+NAN = float('nan')
+EPS = 2.220446049250313e-16
+
+CANDIDATE_COLUMNS = ["symbol", "type", "bar_time", "entry", "sl", "tp1", "tp2", "risk",
+                     "confluence", "reasons", "adx", "volume_ratio", "pre_score"]
+
+
+def load_universe(path):
+    """Symbols from NSE's index constituent CSV (Symbol column, .NS added) or a
+    text file with one Yahoo ticker per line"""
+    if path.endswith(".csv"):
+        df = pd.read_csv(path)
+        col = next(c for c in df.columns if c.strip().lower() == "symbol")
+        symbols = df[col].astype(str).str.strip()
+        return [s if "." in s or s.startswith("^") else f"{s}.NS" for s in symbols]
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def load_bars(symbols, interval, store=None, batch_size=BATCH_SIZE):
+    """{symbol: OHLCV frame}; from the bar store when given, else batched downloads
+    (or OFFLINE_DATA_DIR fixtures). Symbols without bars are left out."""
+    if store is None:
+        return make_source().fetch_many(symbols, interval, batch_size)
+    frames = {}
+    for symbol in symbols:
+        df = store.bars(symbol, interval)
+        if not df.empty:
+            frames[symbol] = df
+    return frames
+
+
+def build_panel(frames, lookback=LOOKBACK):
+    """{symbol: frame} -> symbols plus (symbols x bars) float64 OHLCV arrays.
+    Each row holds that symbol's latest `lookback` bars, right-aligned: column
+    -1 is every symbol's last bar and shorter histories are NaN-padded on the left."""
+    symbols = list(frames)
+    width = min(lookback, max((len(df) for df in frames.values()), default=0))
+    panel = {c: np.full((len(symbols), width), np.nan) for c in OHLCV}
+    day = np.zeros((len(symbols), width), dtype=np.int64)
+    last = []
+    for i, symbol in enumerate(symbols):
+        df = frames[symbol].iloc[-width:]
+        n = len(df)
+        for c in OHLCV:
+            panel[c][i, width - n:] = df[c].to_numpy(dtype=np.float64)
+        # Local session date, the VWAP anchor (like Timestamp.toordinal())
+        wall = df['Datetime'].dt.tz_localize(None) if df['Datetime'].dt.tz is not None else df['Datetime']
+        day[i, width - n:] = wall.to_numpy().astype('datetime64[D]').astype(np.int64)
+        last.append(df['Datetime'].iloc[-1])
+    panel['Day'] = day
+    return symbols, last, panel
+
+
+# Vectorized twins of the indicators.py helpers (one lane per symbol)
+
+def _ewm(state, x, alpha, adjust, min_periods):
+    nobs, weighted, old_wt = state
+    observed = x == x
+    fresh = weighted != weighted
+    old_wt = np.where(fresh, old_wt, old_wt * (1.0 - alpha))
+    new_wt = 1.0 if adjust else alpha
+    blended = np.where(weighted != x, (old_wt * weighted + new_wt * x) / (old_wt + new_wt), weighted)
+    weighted = np.where(observed, np.where(fresh, x, blended), weighted)
+    old_wt = np.where(observed, np.where(fresh, 1.0, old_wt + new_wt if adjust else 1.0), old_wt)
+    nobs = nobs + observed
+    return (nobs, weighted, old_wt), np.where(nobs >= min_periods, weighted, NAN)
+
+
+def _ewm_start(n):
+    return np.zeros(n, dtype=np.int64), np.full(n, NAN), np.ones(n)
+
+
+def _rma(state, x, length):
+    return _ewm(state, x, 1.0 / length, True, length)
+
+
+def _ema(state, x, length):
+    count, total, ewm_state = state
+    counted = (x == x) | (count > 0)
+    count = count + counted
+    seeding = counted & (count < length)
+    total = np.where(seeding, total + x, total)
+    x = np.where(count == length, (total + x) / length, x)
+    stepped, value = _ewm(ewm_state, x, 2.0 / (length + 1), False, 0)
+    ready = count >= length
+    ewm_state = tuple(np.where(ready, new, old) for new, old in zip(stepped, ewm_state))
+    return (count, total, ewm_state), np.where(ready, value, NAN)
+
+
+def _ema_start(n):
+    return np.zeros(n, dtype=np.int64), np.zeros(n), _ewm_start(n)
+
+
+def _window_sum(window):
+    """Left-to-right sum over the last axis (the same rounding as sum() of a tuple)"""
+    total = window[:, 0].copy()
+    for j in range(1, window.shape[1]):
+        total += window[:, j]
+    return total
+
+
+def _sma(series, end, length):
+    """Streaming _sma at column `end`: NaN unless the window holds `length` values"""
+    window = series[:, end - length + 1:end + 1]
+    if window.shape[1] < length:
+        return np.full(len(series), NAN)
+    return np.where((window == window).all(axis=1), _window_sum(window) / length, NAN)
+
+
+def panel_indicators(panel):
+    """Latest StreamingIndicators values for every symbol of a panel -> {column: float64[symbols]}.
+    Same recurrences as StreamingIndicators._step, one bar column at a time."""
+    high, low, close, volume, day = (panel[c] for c in ("High", "Low", "Close", "Volume", "Day"))
+    n, width = close.shape
+    ema20, ema50, ema200, ema12, ema26, macd_sig = (_ema_start(n) for _ in range(6))
+    atr_s, dmp_s, dmn_s, adx_s, st_atr_s, up_s, dn_s = (_ewm_start(n) for _ in range(7))
+    prev_high, prev_low, prev_close = np.full(n, NAN), np.full(n, NAN), np.full(n, NAN)
+    direction, prev_upper, prev_lower = np.ones(n), np.full(n, NAN), np.full(n, NAN)
+    vwap_day, cum_pv, cum_vol = np.full(n, -1, dtype=np.int64), np.zeros(n), np.zeros(n)
+    rsi = np.full((n, width), NAN)
+    out = {}
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for t in range(width):
+            h, l, c, v = high[:, t], low[:, t], close[:, t], volume[:, t]
+            active = c == c  # NaN padding before a symbol's first bar
+
+            ema20, e20 = _ema(ema20, c, 20)
+            ema50, e50 = _ema(ema50, c, 50)
+            ema200, e200 = _ema(ema200, c, 200)
+
+            # The first bar has no previous close, so NaN propagates into TR
+            tr = np.maximum(np.maximum(h - l, np.abs(h - prev_close)), np.abs(prev_close - l))
+            atr_s, atr = _rma(atr_s, tr, 14)
+
+            up, dn = h - prev_high, prev_low - l
+            pos = np.where(up == up, np.where((up > dn) & (up > 0), up, 0.0), NAN)
+            neg = np.where(dn == dn, np.where((dn > up) & (dn > 0), dn, 0.0), NAN)
+            dmp_s, dmp_avg = _rma(dmp_s, pos, 14)
+            dmn_s, dmn_avg = _rma(dmn_s, neg, 14)
+            k = np.where((atr == atr) & (atr != 0), 100 / atr, NAN)
+            dmp, dmn = k * dmp_avg, k * dmn_avg
+            dx = np.where(dmp + dmn != 0, 100 * np.abs(dmp - dmn) / (dmp + dmn), NAN)
+            adx_s, adx = _rma(adx_s, dx, 14)
+
+            ema12, fast = _ema(ema12, c, 12)
+            ema26, slow = _ema(ema26, c, 26)
+            macd = fast - slow
+            macd_sig, signal = _ema(macd_sig, macd, 9)
+
+            new_day = active & (vwap_day != day[:, t])
+            cum_pv = np.where(new_day, 0.0, cum_pv)
+            cum_vol = np.where(new_day, 0.0, cum_vol)
+            cum_pv = np.where(active, cum_pv + (h + l + c) / 3 * v, cum_pv)
+            cum_vol = np.where(active, cum_vol + v, cum_vol)
+            vwap_day = np.where(active, day[:, t], vwap_day)
+
+            # Supertrend: comparisons with the NaN bands of a first bar are false,
+            # which is the streaming engine's "no previous bar" case
+            st_atr_s, st_atr = _rma(st_atr_s, tr, 10)
+            hl2 = (h + l) / 2
+            upper, lower = hl2 + 3 * st_atr, hl2 - 3 * st_atr
+            broke_up = c > prev_upper
+            broke_dn = ~broke_up & (c < prev_lower)
+            inside = ~broke_up & ~broke_dn
+            direction = np.where(broke_up, 1.0, np.where(broke_dn, -1.0, direction))
+            lower = np.where(inside & (direction > 0) & (lower < prev_lower), prev_lower, lower)
+            upper = np.where(inside & (direction < 0) & (upper > prev_upper), prev_upper, upper)
+            prev_upper = np.where(active, upper, prev_upper)
+            prev_lower = np.where(active, lower, prev_lower)
+
+            change = c - prev_close
+            gain = np.where(change == change, np.maximum(change, 0.0), NAN)
+            loss = np.where(change == change, np.minimum(change, 0.0), NAN)
+            up_s, avg_gain = _rma(up_s, gain, 14)
+            dn_s, avg_loss = _rma(dn_s, loss, 14)
+            denom = avg_gain + np.abs(avg_loss)
+            rsi[:, t] = np.where((denom == denom) & (denom != 0), 100 * avg_gain / denom, NAN)
+
+            prev_high = np.where(active, h, prev_high)
+            prev_low = np.where(active, l, prev_low)
+            prev_close = np.where(active, c, prev_close)
+
+        last = width - 1
+        out["EMA20"], out["EMA50"], out["EMA200"] = e20, e50, e200
+        out["ATR"], out["ADX"] = atr, adx
+        out["MACD"], out["MACD_SIGNAL"] = macd, signal
+        out["VWAP"] = np.where(cum_vol != 0, cum_pv / cum_vol, NAN)
+
+        # Bollinger Bands (20, 2, population std)
+        window = close[:, max(0, last - 19):]
+        if window.shape[1] == 20:
+            full = (window == window).all(axis=1)
+            mid = _window_sum(window) / 20
+            std = np.sqrt(_window_sum((window - mid[:, None]) ** 2) / 20)
+            out["BB_LOWER"] = np.where(full, mid - 2 * std, NAN)
+            out["BB_MID"] = np.where(full, mid, NAN)
+            out["BB_UPPER"] = np.where(full, mid + 2 * std, NAN)
+        else:
+            out["BB_LOWER"] = out["BB_MID"] = out["BB_UPPER"] = np.full(n, NAN)
+
+        out["Supertrend"] = np.where(direction > 0, prev_lower, prev_upper)
+        out["Supertrend_Direction"] = direction
+        out["RSI"] = rsi[:, last]
+
+        # StochRSI (14, 14, 3): %K of the last three bars, then its 3-bar mean
+        stoch = np.full((n, 3), NAN)
+        for j, end in enumerate(range(last - 2, last + 1)):
+            if end < 13:
+                continue
+            win = rsi[:, end - 13:end + 1]
+            lo, hi = win.min(axis=1), win.max(axis=1)
+            span = np.where(hi - lo != 0, hi - lo, EPS)
+            stoch[:, j] = np.where((win == win).all(axis=1), 100 * (rsi[:, end] - lo) / span, NAN)
+        out["Stoch_RSI"] = _sma(stoch, 2, 3)
+
+        out["Volume_Ratio"] = volume[:, last] / (_sma(volume, last, 20) + 1)
+    return {name: out[name] for name in INDICATOR_COLUMNS}
+
+
+def scan(symbols, interval=v8.INTERVAL, params=None, lookback=LOOKBACK, store=None,
+         batch_size=BATCH_SIZE):
+    """Fetch, compute and evaluate one share of the universe.
+    Returns (candidates frame, {stage: seconds}, symbols loaded)."""
+    timings = {}
+    t = time.perf_counter()
+    frames = load_bars(symbols, interval, store, batch_size)
+    timings["fetch"] = time.perf_counter() - t
+    if not frames:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS), timings, 0
+
+    t = time.perf_counter()
+    names, last, panel = build_panel(frames, lookback)
+    latest = panel_indicators(panel)
+    timings["indicators"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    arrays = {name: np.full(len(names), NAN) for name in bt.BAR_COLUMNS}
+    arrays.update({c: panel[c][:, -1] for c in OHLCV})
+    arrays.update({k: v for k, v in latest.items() if k in arrays})
+    signals = bt.signal_arrays(arrays, params)
+    hits = np.flatnonzero(signals['direction'])
+    candidates = pd.DataFrame({
+        "symbol": [names[i] for i in hits],
+        "type": np.where(signals['direction'][hits] > 0, "BUY", "SELL"),
+        "bar_time": [last[i] for i in hits],
+        "entry": signals['entry'][hits],
+        "sl": signals['sl'][hits],
+        "tp1": signals['tp1'][hits],
+        "tp2": signals['tp2'][hits],
+        "risk": signals['risk'][hits],
+        "confluence": signals['confluence'][hits],
+        "reasons": [reason_names(int(m)) for m in signals['reasons'][hits]],
+        "adx": arrays['ADX'][hits],
+        "volume_ratio": arrays['Volume_Ratio'][hits],
+        "pre_score": signals['ai_score'][hits],  # simulated_score, the ranking key
+    }, columns=CANDIDATE_COLUMNS)
+    timings["rules"] = time.perf_counter() - t
+    return candidates, timings, len(names)
+
+
+def _scan_chunk(task):
+    symbols, interval, params, lookback, store_root = task
+    store = BarStore(store_root) if store_root else None
+    return scan(symbols, interval, params, lookback, store)
+
+
+def rank(candidates):
+    """Current-bar candidates, best first (pre-score, then confluence, then ADX).
+    Symbols whose last bar is older than the newest one (halted, not yet
+    updated) are dropped."""
+    if candidates.empty:
+        return candidates
+    newest = max(candidates['bar_time'])
+    fresh = candidates[candidates['bar_time'] == newest]
+    return fresh.sort_values(["pre_score", "confluence", "adx"], ascending=False).reset_index(drop=True)
+
+
+def score_top(candidates, scorer, top_k=TOP_K):
+    """AI score the first `top_k` candidates (one batched request per MAX_BATCH)"""
+    top = candidates.head(top_k).copy()
+    if top.empty:
+        return top.assign(ai_score=[], ai_reasoning=[])
+    items = [(row._asdict(), row.symbol) for row in top.itertuples(index=False)]
+    scored = scorer.score_batch(items)
+    top['ai_score'] = [s for s, _ in scored]
+    top['ai_reasoning'] = [r for _, r in scored]
+    return top.sort_values(["ai_score", "pre_score"], ascending=False).reset_index(drop=True)
+
+
+def screen(symbols, interval=v8.INTERVAL, params=None, workers=1, lookback=LOOKBACK,
+           store_root=None):
+    """Ranked candidates across the universe; returns (candidates, stats)"""
+    started = time.perf_counter()
+    if workers > 1 and len(symbols) > 1:
+        chunks = [list(c) for c in np.array_split(symbols, min(workers, len(symbols)))]
+        tasks = [(chunk, interval, params, lookback, store_root) for chunk in chunks]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            results = list(pool.map(_scan_chunk, tasks))
+    else:
+        results = [_scan_chunk((list(symbols), interval, params, lookback, store_root))]
+
+    frames = [c for c, _, _ in results if not c.empty]
+    candidates = rank(pd.concat(frames, ignore_index=True) if frames
+                      else pd.DataFrame(columns=CANDIDATE_COLUMNS))
+    stats = {"symbols": len(symbols), "loaded": sum(n for _, _, n in results),
+             "candidates": len(candidates), "seconds": time.perf_counter() - started}
+    for _, timings, _ in results:
+        for stage, seconds in timings.items():
+            stats[stage] = max(stats.get(stage, 0.0), seconds)  # workers overlap: slowest share
+    return candidates, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 signal screener")
+    parser.add_argument("symbols", nargs="*", help="Yahoo tickers (default: --universe or SYMBOLS)")
+    parser.add_argument("--universe", help="NSE constituents CSV (Symbol column) or one ticker per line")
+    parser.add_argument("--interval", default=v8.INTERVAL)
+    parser.add_argument("--top", type=int, default=TOP_K, help="Candidates sent to the AI scorer")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--lookback", type=int, default=LOOKBACK)
+    parser.add_argument("--store", help="Read bars from this bar store directory instead of fetching")
+    parser.add_argument("--every", type=float, default=0, help="Re-screen every N seconds")
+    parser.add_argument("--out", help="Write the ranked candidates to this CSV")
+    args = parser.parse_args()
+
+    symbols = (args.symbols or (load_universe(args.universe) if args.universe else None)
+               or [s for s in os.getenv("SYMBOLS", "").split(",") if s] or [v8.SYMBOL])
+    scorer = AIScorer(v8.init_llm_client()) if args.top > 0 else None
+
+    while True:
+        candidates, stats = screen(symbols, args.interval, workers=args.workers,
+                                   lookback=args.lookback, store_root=args.store)
+        print(f"🔎 Screened {stats['loaded']}/{stats['symbols']} symbols in {stats['seconds']:.2f}s "
+              f"(fetch {stats.get('fetch', 0):.2f}s, indicators {stats.get('indicators', 0):.2f}s, "
+              f"rules {stats.get('rules', 0):.3f}s) | {stats['candidates']} candidates")
+        top = score_top(candidates, scorer, args.top) if scorer else candidates.head(0)
+        for row in top.itertuples(index=False):
+            print(f"   {row.ai_score:4.1f} {row.type:4} {row.symbol:<16} @ {row.entry:.2f} | "
+                  f"conf {row.confluence} | ADX {row.adx:.1f} | {', '.join(row.reasons)}")
+        if args.out:
+            out = candidates.merge(top[['symbol', 'ai_score', 'ai_reasoning']], on='symbol', how='left') \
+                if len(top) else candidates
+            out.to_csv(args.out, index=False)
+            print(f"💾 Candidates saved to {args.out}")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+"""
+V8.0 SESSION RECORDER / REPLAY
+Records everything non-deterministic that enters a LiveBotV8 session, so a
+bad trade can be reproduced offline after yfinance has revised its data:
+  - every bar delta the bar store returned (or market-feed row)
+  - every AI request (the setup) and response (score, reasoning)
+  - every clock read (trade timestamps, daily rollover)
+  - every state transition the bot journaled (replay checks against these)
+plus the starting state and indicator snapshot.
+
+Log format: b"V8REC" + version byte, then records of
+  uint32 payload length | uint8 kind | float64 wall clock | payload
+Bar frames are Arrow IPC streams; everything else is JSON (the indicator
+snapshot is a pickle, like the snapshot file it mirrors).
+
+The replay driver feeds the log back through a fresh LiveBotV8 (temporary
+state files, no network, no LLM) one recorded cycle at a time, as fast as
+it can, and reports the first state that differs from the recording.
+Run: python live_paper_trade_v8.py --record sessions/2024-01-08.v8rec
+     python session_recorder.py sessions/2024-01-08.v8rec
+     python session_recorder.py sessions/2024-01-08.v8rec --verbose --profile replay.folded
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+
+from ai_scorer import setup_key, simulated_score
+from strategies import Strategy
+
+MAGIC = b"V8REC"
+FORMAT_VERSION = 1
+_RECORD = struct.Struct("<IBd")
+
+# Record kinds
+META, SNAPSHOT, CYCLE, CLOCK, BARS, REFRESH, FEED, AI, STATE, ERROR = range(10)
+KIND_NAMES = ["meta", "snapshot", "cycle", "clock", "bars", "refresh", "feed", "ai", "state", "error"]
+
+
+def _encode_frame(df):
+    if df is None:
+        return b""
+    sink = pa.BufferOutputStream()
+    # Column types carry the timezone; the pandas metadata would triple a 1-bar delta
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _decode_frame(payload):
+    if not payload:
+        return None
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _json(obj):
+    return json.dumps(obj, default=str).encode()
+
+
+class SessionLog:
+    """Append-only writer for one session log"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab')
+        if fresh:
+            self._file.write(MAGIC + bytes([FORMAT_VERSION]))
+        self.path = path
+        self.records = 0
+
+    def write(self, kind, payload=b""):
+        self._file.write(_RECORD.pack(len(payload), kind, time.time()) + payload)
+        self._file.flush()  # a crash keeps everything up to the last record
+        self.records += 1
+
+    def close(self):
+        self._file.close()
+
+
+def read_log(path):
+    """[(kind, wall_clock, payload bytes), ...]"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a v{FORMAT_VERSION} session log")
+    records = []
+    pos = len(MAGIC) + 1
+    while pos + _RECORD.size <= len(data):
+        length, kind, wall = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        if pos + length > len(data):
+            break  # torn last record (crash mid-write)
+        records.append((kind, wall, data[pos:pos + length]))
+        pos += length
+    return records
+
+
+# Recording side: proxies around the bot's collaborators
+
+class _Proxy:
+    def __init__(self, inner, log):
+        self._inner = inner
+        self._log = log
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def _call(self, kind, op, fn, *args):
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self._log.write(ERROR, _json({"op": op, "error": str(e)}))
+            raise
+        self._log.write(kind, _encode_frame(result))
+        return result
+
+
+class RecordingStore(_Proxy):
+    def refresh(self, symbol, interval):
+        return self._call(REFRESH, "refresh", self._inner.refresh, symbol, interval)
+
+    def bars(self, symbol, interval, lookback=None):
+        return self._call(BARS, "bars", self._inner.bars, symbol, interval, lookback)
+
+
+class RecordingFeed:
+    """Market-feed reader that logs every latest() row (opened on first use)"""
+
+    def __init__(self, path, log):
+        self.path = path
+        self._log = log
+        self._reader = None
+
+    def latest(self):
+        from market_feed import FeedReader
+        try:
+            if self._reader is None:
+                self._reader = FeedReader(self.path)
+            row = self._reader.latest()
+        except Exception as e:
+            self._log.write(ERROR, _json({"op": "feed", "error": str(e)}))
+            raise
+        self._log.write(FEED, _encode_frame(None if row is None else pd.DataFrame([row])))
+        return row
+
+
+class RecordingScorer(_Proxy):
+    def score(self, signal, symbol=None):
+        score, reasoning = self._inner.score(signal, symbol)
+        self._log.write(AI, _json({"key": setup_key(signal, symbol), "signal": signal,
+                                   "score": score, "reasoning": reasoning}))
+        return score, reasoning
+
+
+class RecordingStateStore(_Proxy):
+    def save(self, state):
+        self._inner.save(state)
+        self._log.write(STATE, _json(state))
+
+
+class SessionRecorder:
+    """Attach to a LiveBotV8 before run(); everything it reads or decides is logged"""
+
+    def __init__(self, path):
+        self.log = SessionLog(path)
+
+    def attach(self, bot):
+        log = self.log
+        if bot.market_feed and not bot._use_market_feed():
+            # No feed file for this symbol: the recorded session reads the bar store throughout
+            bot.market_feed = None
+        log.write(META, _json({
+            "symbol": bot.symbol, "interval": bot.interval, "feed_interval": bot.feed_interval,
+            "timeframes": bot.timeframes, "market_feed": bot.market_feed, "capital": bot.capital,
+            "state": bot.state, "daily_stats": bot.daily_stats, "warm": bot.warm,
+            "strategy": bot.strategy.spec(),
+            "recorded_at": str(datetime.now()),
+        }))
+        log.write(SNAPSHOT, pickle.dumps(bot.feed, protocol=pickle.HIGHEST_PROTOCOL))
+        bot.store = RecordingStore(bot.store, log)
+        if bot.market_feed:
+            bot.market = RecordingFeed(bot.market_feed, log)
+        bot.scorer = RecordingScorer(bot.scorer, log)
+        bot.state_store = RecordingStateStore(bot.state_store, log)
+
+        now, cycle = bot.now, bot.cycle
+
+        def recorded_now():
+            value = now()
+            log.write(CLOCK, value.isoformat().encode())
+            return value
+
+        def recorded_cycle():
+            log.write(CYCLE)
+            return cycle()
+
+        bot.now, bot.cycle = recorded_now, recorded_cycle
+        print(f"🎙️ Recording session to {log.path}")
+        return bot
+
+
+# Replay side
+
+class Divergence(Exception):
+    """The replayed bot asked for something the recording does not have"""
+
+
+class _Queue:
+    """Recorded results of one kind of call, consumed in order"""
+
+    def __init__(self, name, report):
+        self.name = name
+        self.report = report
+        self.items = deque()
+
+    def pop(self):
+        if not self.items:
+            # The bot's own error handling takes it from here, as for a failed fetch
+            self.report.diverge(f"more {self.name} calls than were recorded")
+            raise Divergence(f"no recorded {self.name} result left")
+        kind, value = self.items.popleft()
+        if kind == ERROR:
+            raise RuntimeError(value['error'])  # the recorded failure, raised again
+        return value
+
+
+class ReplayStore:
+    def __init__(self, refreshes, bars):
+        self._refreshes, self._bars = refreshes, bars
+
+    def refresh(self, symbol, interval):
+        return self._refreshes.pop()
+
+    def bars(self, symbol, interval, lookback=None):
+        return self._bars.pop()
+
+
+class ReplayFeed:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def latest(self):
+        df = self._rows.pop()
+        return None if df is None else df.iloc[0].to_dict()
+
+
+class ReplayScorer:
+    def __init__(self, responses, report):
+        self._responses = responses
+        self._report = report
+
+    def score(self, signal, symbol=None):
+        key = json.loads(_json(setup_key(signal, symbol)))
+        try:
+            recorded = self._responses.pop()
+        except Divergence:
+            return simulated_score(signal), "Replay - no recorded response"
+        if recorded['key'] != key:
+            self._report.diverge(f"AI request {recorded['key']} recorded, {key} replayed")
+            return simulated_score(signal), "Replay - setup differs from the recording"
+        return recorded['score'], recorded['reasoning']
+
+    def metrics(self):
+        return {}
+
+
+class ReplayStateStore(_Proxy):
+    def __init__(self, inner, expected, report):
+        super().__init__(inner, None)
+        self._expected = expected
+        self._report = report
+
+    def save(self, state):
+        self._inner.save(state)
+        self._report.states += 1
+        replayed = json.loads(_json(state))
+        if not self._expected:
+            self._report.diverge(f"extra state transition #{self._report.states}")
+        elif self._expected.popleft() != replayed:
+            self._report.diverge(f"state transition #{self._report.states} differs from the recording")
+
+
+class ReplayClock:
+    """Returns the recorded clock reads in order (the last one once they run out)"""
+
+    def __init__(self, values):
+        self._values = values
+        self._last = values[0] if values else datetime.now()
+
+    def __call__(self):
+        if self._values:
+            self._last = self._values.popleft()
+        return self._last
+
+
+class ReplayReport:
+    def __init__(self):
+        self.cycles = 0
+        self.states = 0
+        self.divergences = []
+        self.seconds = 0.0
+        self.bot = None
+
+    def diverge(self, message):
+        if not self.divergences:
+            print(f"⚠️ Replay diverged at cycle {self.cycles}: {message}", file=sys.stderr)
+        self.divergences.append((self.cycles, message))
+
+    @property
+    def ok(self):
+        return not self.divergences
+
+
+def _decode(kind, payload):
+    if kind in (BARS, REFRESH, FEED):
+        return _decode_frame(payload)
+    if kind == CLOCK:
+        return datetime.fromisoformat(payload.decode())
+    if kind == SNAPSHOT:
+        return pickle.loads(payload)
+    if kind == CYCLE:
+        return None
+    return json.loads(payload)
+
+
+def replay(path, workdir=None, verbose=False):
+    """Run a recorded session back through LiveBotV8; returns a ReplayReport"""
+    import live_paper_trade_v8 as v8
+
+    records = [(kind, _decode(kind, payload)) for kind, _, payload in read_log(path)]
+    if not records or records[0][0] != META:
+        raise ValueError(f"{path} has no session header")
+    meta = records[0][1]
+    snapshot = next((value for kind, value in records if kind == SNAPSHOT), None)
+
+    report = ReplayReport()
+    refreshes, bars, rows, responses = (_Queue(name, report) for name in ("refresh", "bars", "feed", "AI"))
+    errors = {"refresh": refreshes, "bars": bars, "feed": rows}
+    queues = {REFRESH: refreshes, BARS: bars, FEED: rows, AI: responses}
+    clock, states, cycles = deque(), deque(), 0
+    for kind, value in records:
+        if kind in queues:
+            queues[kind].items.append((kind, value))
+        elif kind == ERROR and value['op'] in errors:
+            errors[value['op']].items.append((kind, value))
+        elif kind == CLOCK:
+            clock.append(value)
+        elif kind == STATE:
+            states.append(value)
+        elif kind == CYCLE:
+            cycles += 1
+
+    daily_stats = dict(meta['daily_stats'], date=date.fromisoformat(str(meta['daily_stats']['date'])))
+    tmp = tempfile.TemporaryDirectory() if workdir is None else None
+    root = workdir or tmp.name
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            bot = v8.LiveBotV8(
+                symbol=meta['symbol'], interval=meta['interval'],
+                state_file=os.path.join(root, "replay_state.json"),
+                trades_file=os.path.join(root, "replay_trades.csv"),
+                capital=meta['capital'], store=ReplayStore(refreshes, bars), daily_stats=daily_stats,
+                client=None, scorer=ReplayScorer(responses, report),
+                base_interval=meta['feed_interval'] if meta['feed_interval'] != meta['interval'] else None,
+                htf=tuple(meta['timeframes'][1:]), market_feed=meta['market_feed'] or "")
+            bot.now = ReplayClock(clock)  # after __init__, whose clock reads were not recorded
+            bot.state = meta['state']
+            if meta.get('strategy'):
+                # The recorded parameters, whatever the local strategy config says
+                bot.strategy = Strategy(**meta['strategy'])
+                bot.reload_strategy = lambda: False
+                bot.feed = bot._new_feed()
+            if snapshot is not None:
+                bot.feed = snapshot
+            bot.warm = meta['warm']
+            bot.save_indicators = lambda: None  # the recording already covers the snapshots
+            if meta['market_feed']:
+                bot.market = ReplayFeed(rows)
+            bot.state_store = ReplayStateStore(bot.state_store, states, report)
+
+            started = time.perf_counter()
+            for _ in range(cycles):
+                bot.cycle()
+                report.cycles += 1
+            report.seconds = time.perf_counter() - started
+        for queue in (refreshes, bars, rows, responses):
+            if queue.items:
+                report.diverge(f"{len(queue.items)} recorded {queue.name} calls were not replayed")
+        if states:
+            report.diverge(f"{len(states)} recorded state transitions never happened")
+        report.bot = bot
+        return report
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+
+def summarize(path):
+    """Record counts per kind, for a quick look at a log"""
+    counts = {}
+    for kind, _, payload in read_log(path):
+        name = KIND_NAMES[kind] if kind < len(KIND_NAMES) else str(kind)
+        n, size = counts.get(name, (0, 0))
+        counts[name] = (n + 1, size + len(payload) + _RECORD.size)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 session replay")
+    parser.add_argument("log", help="Session log written with live_paper_trade_v8.py --record")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's output")
+    parser.add_argument("--profile", metavar="FILE", help="Write a collapsed-stack profile of the replay")
+    parser.add_argument("--stats", action="store_true", help="Only print record counts")
+    args = parser.parse_args()
+
+    if args.stats:
+        for name, (n, size) in summarize(args.log).items():
+            print(f"   {name:<9} {n:>7} records {size / 1024:>9.1f} KiB")
+        return
+
+    profiler = None
+    if args.profile:
+        from profiler import SamplingProfiler
+        profiler = SamplingProfiler()
+        profiler.start()
+    report = replay(args.log, verbose=args.verbose)
+    if profiler:
+        profiler.stop()
+        print(f"🔬 Profile written to {profiler.dump(args.profile)} ({profiler.samples} samples)")
+
+    state = report.bot.state
+    print(f"⏩ Replayed {report.cycles} cycles in {report.seconds:.3f}s | "
+          f"{report.states} state transitions | Balance: ₹{state['balance']:.2f}")
+    if report.ok:
+        print("✅ Replay matches the recording")
+    else:
+        for cycle, message in report.divergences[:10]:
+            print(f"❌ Cycle {cycle}: {message}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
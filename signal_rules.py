@@ -0,0 +1,238 @@
+"""
+V8.0 SIGNAL RULES
+The check_signal confluence logic as data. Each side (BUY / SELL) is a list
+of comparisons over named bar fields; a rule can be a hard requirement (the
+setup is void without it), a confluence factor (counted and reported as a
+reason), or both. The table is compiled once into flat arrays and evaluated
+by:
+  - evaluate_row: one bar as a float64 vector (live path; @njit with numba)
+  - evaluate: every bar of a history at once (NumPy; backtest / optimizer)
+NaN operands make every comparison false, like the pd.isna guards they replace.
+
+HTF15m / HTF60m count agreement with the 15m / 60m trend (multi_timeframe.py).
+Without multi-timeframe bars those fields are NaN and add no confluence.
+
+A strategy (strategies.py) may use a subset of the factors: the rules of the
+other factors, gates included, are dropped from its compiled table.
+"""
+
+import math
+from functools import lru_cache
+import numpy as np
+
+from accel import HAVE_NUMBA, njit
+
+# Bar vector layout
+FIELDS = ["Close", "ATR", "EMA20", "EMA50", "EMA200", "Supertrend_Direction", "ADX", "MACD",
+          "MACD_SIGNAL", "Volume_Ratio", "VWAP", "BB_LOWER", "BB_MID", "BB_UPPER", "Stoch_RSI",
+          "Trend_15m", "Trend_60m"]
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+# Confluence factors; bit i of a reasons mask -> REASONS[i]
+REASONS = ["EMA", "EMA200", "Supertrend", "ADX", "MACD", "Volume", "VWAP", "BB", "StochRSI",
+           "HTF15m", "HTF60m"]
+
+# Comparisons: GT a > b, GE a >= b, EQ a == b, BETWEEN b < a < c
+GT, GE, EQ, BETWEEN = 1, 2, 3, 4
+
+# (reason or None for a pure gate, op, operands, required)
+# Operands are field names, parameter names or numbers.
+SIDES = {
+    1: [  # BUY
+        (None, GT, ("ATR", 0.0), True),
+        (None, GT, ("Close", "EMA20"), True),
+        ("EMA", GT, ("EMA20", "EMA50"), True),
+        ("EMA200", GT, ("EMA50", "EMA200"), False),
+        ("Supertrend", EQ, ("Supertrend_Direction", 1.0), True),
+        ("ADX", GE, ("ADX", "min_adx"), True),
+        ("MACD", GT, ("MACD", "MACD_SIGNAL"), False),
+        ("Volume", GT, ("Volume_Ratio", "min_volume_ratio"), False),
+        ("VWAP", GT, ("Close", "VWAP"), False),
+        ("BB", BETWEEN, ("Close", "BB_LOWER", "BB_MID"), False),
+        ("StochRSI", BETWEEN, ("Stoch_RSI", 20.0, 80.0), False),
+        ("HTF15m", EQ, ("Trend_15m", 1.0), False),
+        ("HTF60m", EQ, ("Trend_60m", 1.0), False),
+    ],
+    -1: [  # SELL
+        (None, GT, ("ATR", 0.0), True),
+        (None, GT, ("EMA20", "Close"), True),
+        ("EMA", GT, ("EMA50", "EMA20"), True),
+        ("EMA200", GT, ("EMA200", "EMA50"), False),
+        ("Supertrend", EQ, ("Supertrend_Direction", -1.0), True),
+        ("ADX", GE, ("ADX", "min_adx"), True),
+        ("MACD", GT, ("MACD_SIGNAL", "MACD"), False),
+        ("Volume", GT, ("Volume_Ratio", "min_volume_ratio"), False),
+        ("VWAP", GT, ("VWAP", "Close"), False),
+        ("BB", BETWEEN, ("Close", "BB_MID", "BB_UPPER"), False),
+        ("StochRSI", BETWEEN, ("Stoch_RSI", 20.0, 80.0), False),
+        ("HTF15m", EQ, ("Trend_15m", -1.0), False),
+        ("HTF60m", EQ, ("Trend_60m", -1.0), False),
+    ],
+}
+
+
+def select_sides(factors=None):
+    """SIDES restricted to the rules of `factors` (reason names) plus the pure gates"""
+    if factors is None:
+        return SIDES
+    unknown = set(factors) - set(REASONS)
+    if unknown:
+        raise ValueError(f"Unknown confluence factors: {sorted(unknown)}")
+    return {side: [rule for rule in rules if rule[0] is None or rule[0] in factors]
+            for side, rules in SIDES.items()}
+
+
+def fields_used(factors=None):
+    """Bar fields read by the rules of `factors` (None = all)"""
+    return {operand for rules in select_sides(factors).values() for _, _, operands, _ in rules
+            for operand in operands if isinstance(operand, str) and operand in FIELD_INDEX}
+
+
+class Rules:
+    """SIDES compiled to arrays: operand i < len(FIELDS) is a bar field, else consts[i - len(FIELDS)]"""
+
+    def __init__(self, sides, params):
+        consts = []
+
+        def operand(value):
+            if isinstance(value, str) and value in FIELD_INDEX:
+                return FIELD_INDEX[value]
+            consts.append(float(params[value] if isinstance(value, str) else value))
+            return len(FIELDS) + len(consts) - 1
+
+        width = max(len(rules) for rules in sides.values())
+        shape = (len(sides), width)
+        self.direction = np.array(list(sides), dtype=np.int64)
+        self.op = np.zeros(shape, dtype=np.int64)  # 0 = padding
+        self.a = np.zeros(shape, dtype=np.int64)
+        self.b = np.zeros(shape, dtype=np.int64)
+        self.c = np.zeros(shape, dtype=np.int64)
+        self.bit = np.full(shape, -1, dtype=np.int64)
+        self.required = np.zeros(shape, dtype=np.bool_)
+        for s, rules in enumerate(sides.values()):
+            for r, (reason, op, operands, required) in enumerate(rules):
+                self.op[s, r] = op
+                self.a[s, r] = operand(operands[0])
+                self.b[s, r] = operand(operands[1])
+                if op == BETWEEN:
+                    self.c[s, r] = operand(operands[2])
+                self.bit[s, r] = REASONS.index(reason) if reason else -1
+                self.required[s, r] = required
+        self.consts = np.array(consts, dtype=np.float64)
+        self.arrays = (self.direction, self.op, self.a, self.b, self.c, self.bit, self.required, self.consts)
+        # Without numba the kernel runs as Python, where list indexing beats NumPy scalars
+        self.lists = tuple(v.tolist() for v in self.arrays)
+
+
+@lru_cache(maxsize=64)
+def compile_rules(min_adx, min_volume_ratio, factors=None):
+    """Compiled rule table for one parameter set and factor subset (tuple; cached)"""
+    return Rules(select_sides(factors), {"min_adx": min_adx, "min_volume_ratio": min_volume_ratio})
+
+
+def row_vector(row):
+    """Bar mapping (dict, pd.Series) -> float64 vector in FIELDS order"""
+    get = row.get
+    return np.array([get(name, math.nan) for name in FIELDS], dtype=np.float64)
+
+
+@njit(cache=True)
+def _operand(x, consts, i):
+    n = len(x)
+    return x[i] if i < n else consts[i - n]
+
+
+@njit(cache=True)
+def _evaluate_row(x, direction, op, a, b, c, bit, required, consts, min_confluence):
+    # Indexed as [s][r] / len() so the same code runs on arrays (numba) and lists
+    for s in range(len(op)):
+        ops, bits = op[s], bit[s]
+        confluence = 0
+        mask = 0
+        passed = True
+        for r in range(len(ops)):
+            code = ops[r]
+            if code == 0:
+                continue
+            va = _operand(x, consts, a[s][r])
+            vb = _operand(x, consts, b[s][r])
+            if code == 1:
+                hit = va > vb
+            elif code == 2:
+                hit = va >= vb
+            elif code == 3:
+                hit = va == vb
+            else:
+                hit = vb < va < _operand(x, consts, c[s][r])
+            if hit:
+                if bits[r] >= 0:
+                    confluence += 1
+                    mask |= 1 << bits[r]
+            elif required[s][r]:
+                passed = False
+                break
+        if passed and confluence >= min_confluence:
+            return direction[s], confluence, mask
+    return 0, 0, 0
+
+
+def evaluate_row(x, rules, min_confluence):
+    """One bar vector -> (direction +1/-1/0, confluence, reasons mask)"""
+    if HAVE_NUMBA:
+        return _evaluate_row(x, *rules.arrays, min_confluence)
+    return _evaluate_row(x.tolist(), *rules.lists, min_confluence)
+
+
+def evaluate(arrays, rules, min_confluence):
+    """Every bar at once. `arrays` maps FIELDS to equal-length float arrays.
+    Returns direction (int8), confluence and reasons mask (int64) arrays."""
+    n = len(arrays[FIELDS[0]])
+    tested = {}  # comparisons shared by both sides (ATR, ADX, volume, StochRSI) run once
+
+    def value(i):
+        return arrays[FIELDS[i]] if i < len(FIELDS) else rules.consts[i - len(FIELDS)]
+
+    def test(s, r):
+        code, ia, ib, ic = (int(v[s, r]) for v in (rules.op, rules.a, rules.b, rules.c))
+        key = (code, ia, ib, ic)
+        if key not in tested:
+            va, vb = value(ia), value(ib)
+            if code == GT:
+                hit = va > vb
+            elif code == GE:
+                hit = va >= vb
+            elif code == EQ:
+                hit = va == vb
+            else:
+                hit = (vb < va) & (va < value(ic))
+            tested[key] = hit
+        return tested[key]
+
+    direction = np.zeros(n, dtype=np.int8)
+    confluence = np.zeros(n, dtype=np.int64)
+    reasons = np.zeros(n, dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        # Later sides only fill bars no earlier side matched (BUY / SELL are exclusive anyway)
+        for s in reversed(range(len(rules.direction))):
+            passed = np.ones(n, dtype=bool)
+            count = np.zeros(n, dtype=np.int64)
+            mask = np.zeros(n, dtype=np.int64)
+            for r in range(rules.op.shape[1]):
+                if rules.op[s, r] == 0:
+                    continue
+                hit = test(s, r)
+                bit = int(rules.bit[s, r])
+                if bit >= 0:
+                    count += hit
+                    mask |= hit.astype(np.int64) << bit
+                if rules.required[s, r]:
+                    passed &= hit
+            hit = passed & (count >= min_confluence)
+            direction = np.where(hit, np.int8(rules.direction[s]), direction)
+            confluence = np.where(hit, count, confluence)
+            reasons = np.where(hit, mask, reasons)
+    return direction, confluence, reasons
+
+
+def reason_names(mask):
+    return [name for bit, name in enumerate(REASONS) if mask & (1 << bit)]
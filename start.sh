@@ -9,6 +9,13 @@ if ! python3 -c "import pandas" 2>/dev/null; then
     pip3 install -r requirements.txt
 fi
 
+# One process fetches the market data; the bot and the API read it from shared memory
+export MARKET_FEED_DIR=${MARKET_FEED_DIR:-/dev/shm}
+echo "📡 Starting market feed..."
+python3 market_feed.py &
+FEED_PID=$!
+sleep 2
+
 # Start API Server in background
 echo "🔧 Starting API Server on port 8000..."
 python3 api_server.py &
@@ -37,5 +44,5 @@ echo ""
 echo "Press Ctrl+C to stop all services"
 
 # Wait for Ctrl+C
-trap "kill $API_PID $BOT_PID $DASH_PID 2>/dev/null; exit" INT
+trap "kill $FEED_PID $API_PID $BOT_PID $DASH_PID 2>/dev/null; exit" INT
 wait
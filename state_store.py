@@ -0,0 +1,191 @@
+"""
+V8.0 STATE STORE
+Journaled bot state in a local SQLite database (WAL mode).
+
+  - save() appends only the top-level keys that changed to `journal`
+  - every SNAPSHOT_EVERY entries the state is folded into `snapshot` and the
+    folded journal rows are dropped, in one transaction
+  - load() = snapshot + replay of the journal, so a crash between snapshots
+    loses nothing that was committed
+  - StateReader gives other processes (api_server) a consistent view without
+    re-parsing anything until the writer actually commits (PRAGMA data_version)
+
+live_state.json is kept as an atomically-replaced export for humans and
+older tools, written on the first save, when the journal is folded and on
+close() (not on every save); it is imported once if the database does not
+exist yet.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+SNAPSHOT_EVERY = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    patch TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    seq INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+
+def state_db_path(state_file):
+    """live_state.json -> live_state.db"""
+    return os.path.splitext(state_file)[0] + ".db"
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _replay(conn):
+    """Snapshot + journal -> (state or None, last seq). Caller holds a read transaction."""
+    row = conn.execute("SELECT seq, state FROM snapshot WHERE id = 1").fetchone()
+    state, seq = (json.loads(row[1]), row[0]) if row else (None, 0)
+    for seq, patch in conn.execute("SELECT seq, patch FROM journal WHERE seq > ? ORDER BY seq", (seq,)):
+        patch = json.loads(patch)
+        state = state or {}
+        state.update(patch['set'])
+        for key in patch['del']:
+            state.pop(key, None)
+    return state, seq
+
+
+def export_json(state, path):
+    """Write `state` to `path` via temp file + rename, so readers never see half a file"""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp, path)
+
+
+class StateStore:
+    """Writer side: one per bot"""
+
+    def __init__(self, path, export_path=None, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.export_path = export_path
+        self.snapshot_every = snapshot_every
+        self._conn = _connect(path)
+        self._saved = {}
+        self._pending = 0
+        self._exported = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Recovered state, or None for a fresh bot. Raises if the legacy JSON is unreadable."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                state, _ = _replay(self._conn)
+                self._pending = self._conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+            finally:
+                self._conn.execute("COMMIT")
+
+        if state is None and self.export_path and os.path.exists(self.export_path):
+            try:
+                with open(self.export_path, 'r') as f:
+                    state = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{self.export_path} is corrupt ({e}); fix or remove it to start fresh")
+            print(f"📥 Imported {self.export_path} into {self.path}")
+            self.save(state)
+            self.snapshot()
+        self._saved = json.loads(json.dumps(state)) if state else {}
+        return state
+
+    def save(self, state):
+        """Journal the top-level keys that changed since the last save"""
+        current = json.loads(json.dumps(state))  # deep copy in JSON types
+        changed = {k: v for k, v in current.items() if self._saved.get(k, object()) != v}
+        removed = [k for k in self._saved if k not in current]
+        if not changed and not removed:
+            return
+        with self._lock:
+            self._conn.execute("INSERT INTO journal (ts, patch) VALUES (?, ?)",
+                               (str(datetime.now()), json.dumps({"set": changed, "del": removed})))
+            self._pending += 1
+        self._saved = current
+        if self._pending >= self.snapshot_every:
+            self.snapshot()
+        elif not self._exported:
+            self.export()
+
+    def export(self):
+        """Refresh the JSON export with the last saved state"""
+        if not self.export_path or not self._saved:
+            return
+        try:
+            export_json(self._saved, self.export_path)
+            self._exported = True
+        except OSError as e:
+            print(f"⚠️ State export failed: {e}")
+
+    def snapshot(self):
+        """Fold the journal into the snapshot row atomically (and refresh the export)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                state, seq = _replay(self._conn)
+                if state is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO snapshot (id, seq, ts, state) VALUES (1, ?, ?, ?)",
+                        (seq, str(datetime.now()), json.dumps(state)))
+                    self._conn.execute("DELETE FROM journal WHERE seq <= ?", (seq,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._pending = 0
+        self.export()
+
+    def close(self):
+        self.export()
+        with self._lock:
+            self._conn.close()
+
+
+class StateReader:
+    """Reader side: re-reads only after another connection has committed"""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = None
+        self.version = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def read(self):
+        """Latest committed state (cached between commits), or None if there is none yet"""
+        with self._lock:
+            if self._conn is None:
+                if not os.path.exists(self.path):
+                    return None
+                self._conn = _connect(self.path)
+            version = self._data_version()
+            if version != self.version or self.state is None:
+                self._conn.execute("BEGIN")
+                try:
+                    self.state, _ = _replay(self._conn)
+                finally:
+                    self._conn.execute("COMMIT")
+                self.version = version
+            return self.state
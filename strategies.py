@@ -0,0 +1,202 @@
+"""
+V8.0 STRATEGY REGISTRY
+A strategy is everything check_signal / calculate_qty / enter_trade decide
+with: the confluence factors it counts (signal_rules.REASONS), entry
+thresholds, stop / target multiples and the AI-score sizing table. The
+indicator columns it needs follow from its factors, so a bot only runs those
+indicator groups (indicators.GROUPS) instead of all of them.
+
+Built-in strategies are registered below. STRATEGY_CONFIG (JSON, default
+strategies.json) overrides their parameters or adds variants, and is re-read
+when the file changes: a running bot picks up new thresholds on its next
+cycle, keeping its daily stats and open trade.
+
+    {
+      "v8": {"min_adx": 27},
+      "v8_lean": {"base": "v8", "factors": ["EMA", "Supertrend", "ADX", "MACD", "Volume"],
+                  "min_confluence": 3, "sizing": [[9.0, 6.0], [8.0, 4.0]]}
+    }
+
+Run several strategies side by side on one feed with multi_symbol_bot.py
+(SYMBOL@strategy); the ledger records which strategy took each trade.
+"""
+
+import json
+import os
+import time
+
+import signal_rules
+from indicators import COLUMNS as INDICATOR_COLUMNS, select_columns
+
+CONFIG_FILE = os.getenv("STRATEGY_CONFIG", "strategies.json")
+RELOAD_SECONDS = 5.0          # config file mtime checked at most this often
+DEFAULT_STRATEGY = "v8"
+
+# Read by every strategy regardless of factors: the stop distance and the AI prompt
+BASE_FIELDS = ("ATR", "ADX", "Volume_Ratio")
+
+
+class Strategy:
+    """Entry rules, exits and position sizing of one strategy version"""
+
+    def __init__(self, name, factors=None, indicators=None, min_ai_score=8.0, min_confluence=4,
+                 min_adx=25, min_volume_ratio=1.3, sl_atr_mult=1.2, tp1_r_mult=2.0, tp2_r_mult=4.0,
+                 sizing=((9.0, 10.0), (8.5, 8.0), (8.0, 6.0)), losing_streak=(2, 4.0),
+                 winning_streak=(3, 2.0, 12.0)):
+        self.name = name
+        # Confluence factors (None = all of signal_rules.REASONS), in REASONS order
+        signal_rules.select_sides(factors)  # validates the names
+        self.factors = None if factors is None else tuple(r for r in signal_rules.REASONS if r in set(factors))
+        self.min_ai_score = float(min_ai_score)
+        self.min_confluence = int(min_confluence)
+        self.min_adx = float(min_adx)
+        self.min_volume_ratio = float(min_volume_ratio)
+        self.sl_atr_mult = float(sl_atr_mult)   # stop distance in ATRs
+        self.tp1_r_mult = float(tp1_r_mult)     # TP1 in multiples of risk (R)
+        self.tp2_r_mult = float(tp2_r_mult)     # TP2 in multiples of risk (R)
+        # (min AI score, risk % of balance), best first; below the last row the qty is 0
+        self.sizing = tuple(sorted(((float(s), float(p)) for s, p in sizing), reverse=True))
+        self.losing_streak = (int(losing_streak[0]), float(losing_streak[1]))        # losses, risk %
+        self.winning_streak = (int(winning_streak[0]), float(winning_streak[1]),
+                               float(winning_streak[2]))                              # wins, +risk %, cap
+        self._indicators = None if indicators is None else tuple(indicators)
+        self.indicators = select_columns(self.needed_columns() if indicators is None else indicators)
+        self.rules = signal_rules.compile_rules(self.min_adx, self.min_volume_ratio, self.factors)
+
+    def needed_columns(self):
+        """Indicator columns the factors' rules and the base fields read"""
+        fields = signal_rules.fields_used(self.factors) | set(BASE_FIELDS)
+        return [c for c in INDICATOR_COLUMNS if c in fields]
+
+    def risk_pct(self, ai_score, wins, losses):
+        """Risk per trade in % of balance for an AI score and the current streaks (0 = no trade)"""
+        for min_score, pct in self.sizing:
+            if ai_score >= min_score:
+                break
+        else:
+            return 0.0
+        count, after_losses = self.losing_streak
+        if losses >= count:
+            pct = after_losses
+        count, bonus, cap = self.winning_streak
+        if wins >= count:
+            pct = min(pct + bonus, cap)
+        return pct
+
+    def spec(self):
+        """Constructor arguments (JSON-ready; Strategy(**spec()) rebuilds it)"""
+        return {
+            "name": self.name, "factors": self.factors, "indicators": self._indicators,
+            "min_ai_score": self.min_ai_score, "min_confluence": self.min_confluence,
+            "min_adx": self.min_adx, "min_volume_ratio": self.min_volume_ratio,
+            "sl_atr_mult": self.sl_atr_mult, "tp1_r_mult": self.tp1_r_mult, "tp2_r_mult": self.tp2_r_mult,
+            "sizing": self.sizing, "losing_streak": self.losing_streak, "winning_streak": self.winning_streak,
+        }
+
+    def replace(self, **changes):
+        """Copy with some parameters changed"""
+        return Strategy(**dict(self.spec(), **changes))
+
+    def __eq__(self, other):
+        return isinstance(other, Strategy) and self.spec() == other.spec()
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"Strategy({self.name!r})"
+
+
+BUILTIN = {}
+
+
+def register(strategy):
+    """Add a built-in strategy (config entries can override or extend it)"""
+    BUILTIN[strategy.name] = strategy
+    return strategy
+
+
+# V8.0 Ultra: every factor, 4 needed, aggressive AI-score sizing
+register(Strategy("v8"))
+
+
+class StrategyConfig:
+    """Built-in strategies plus the overrides / variants of a JSON config file,
+    re-read whenever the file's mtime changes"""
+
+    def __init__(self, path=CONFIG_FILE, check_every=RELOAD_SECONDS):
+        self.path = path
+        self.check_every = check_every
+        self.strategies = dict(BUILTIN)
+        self.version = 0
+        self._mtime = None
+        self._next_check = 0.0
+
+    def _build(self, config):
+        """Strategies after applying `config`; a base is resolved whatever the entry order"""
+        strategies = dict(BUILTIN)
+        built = set()
+
+        def build(name, chain=()):
+            if name in built or name not in config:
+                if name not in strategies:
+                    raise ValueError(f"{chain[-1]}: unknown base strategy {name!r}")
+                return strategies[name]
+            if name in chain:
+                raise ValueError(f"{name}: circular base")
+            params = dict(config[name])
+            base = params.pop("base", name if name in BUILTIN else DEFAULT_STRATEGY)
+            parent = BUILTIN[base] if base == name else build(base, chain + (name,))
+            strategies[name] = parent.replace(name=name, **params)
+            built.add(name)
+            return strategies[name]
+
+        for name in config:
+            build(name)
+        return strategies
+
+    def reload(self, force=False):
+        """Re-read the config if it changed; a broken file keeps the previous strategies"""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        first = self._next_check == 0.0
+        self._next_check = now + self.check_every
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            config = {}
+            if mtime is not None:
+                with open(self.path, 'r') as f:
+                    config = json.load(f)
+            strategies = self._build(config)
+        except Exception as e:
+            print(f"⚠️ Strategy config {self.path} ignored: {e}")
+            return False
+        changed = [name for name, s in strategies.items() if self.strategies.get(name) != s]
+        # Unchanged strategies stay the same objects, so bots only react to real changes
+        self.strategies = {name: s if name in changed else self.strategies[name] for name, s in strategies.items()}
+        self.version += 1
+        if changed and not first:
+            print(f"🔁 Strategy config reloaded: {', '.join(changed)}")
+        return True
+
+    def get(self, name=DEFAULT_STRATEGY):
+        """Current parameters of a strategy (the same object until its config changes)"""
+        self.reload()
+        try:
+            return self.strategies[name]
+        except KeyError:
+            raise ValueError(f"Unknown strategy {name!r} (have {', '.join(sorted(self.strategies))})") from None
+
+
+CONFIG = StrategyConfig()
+
+
+def get(name=DEFAULT_STRATEGY):
+    return CONFIG.get(name)
@@ -0,0 +1,215 @@
+"""
+V8.0 EVENT-DRIVEN STREAMING PIPELINE
+Replaces the 60-second polling loop with a stream of ticks or bars:
+  - every tick manages the open trade (SL/TP checked at tick resolution)
+  - every bar close updates the indicators and evaluates check_signal
+  - tick-arrival -> decision latency is recorded in a histogram
+
+Sources are async generators of events:
+  file_replay(path)        CSV/Parquet of ticks (Datetime, Price[, Volume]) or bars (OHLCV)
+  websocket_source(url)    JSON ticks/bars from a websocket
+  serve_replay(path, ...)  local websocket stand-in that streams a file
+
+Run: python streaming.py replay ticks.csv
+     python streaming.py serve ticks.csv --port 8765 --speed 60
+     python streaming.py live ws://localhost:8765
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import pandas as pd
+
+from metrics import Histogram
+
+DEFAULT_TZ = "Asia/Kolkata"
+INTERVAL_SECONDS = {"1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600}
+
+
+def _timestamp(value):
+    if isinstance(value, (int, float)):
+        return pd.Timestamp(value, unit='ms', tz='UTC').tz_convert(DEFAULT_TZ)
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(DEFAULT_TZ) if ts.tz is None else ts
+
+
+def _event(data, recv):
+    """Normalize a raw record into a tick or bar event"""
+    ts = _timestamp(data.get('Datetime', data.get('ts')))
+    if 'Close' in data:
+        return {"kind": "bar", "ts": ts, "recv": recv,
+                "Open": float(data['Open']), "High": float(data['High']),
+                "Low": float(data['Low']), "Close": float(data['Close']),
+                "Volume": float(data.get('Volume', 0))}
+    price = data.get('Price', data.get('price'))
+    return {"kind": "tick", "ts": ts, "recv": recv, "price": float(price),
+            "volume": float(data.get('Volume', data.get('volume', 0)))}
+
+
+async def file_replay(path, speed=0.0):
+    """Replay a recorded file; speed=0 replays as fast as possible, N = N x real time"""
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    previous = None
+    for i, record in enumerate(df.to_dict('records')):
+        event = _event(record, 0.0)
+        if speed and previous is not None:
+            await asyncio.sleep(max(0.0, (event['ts'] - previous).total_seconds() / speed))
+        elif i % 1000 == 0:
+            await asyncio.sleep(0)
+        previous = event['ts']
+        event['recv'] = time.perf_counter()
+        yield event
+
+
+async def websocket_source(url):
+    """JSON ticks/bars from a websocket (one record per message)"""
+    import websockets
+    async with websockets.connect(url) as ws:
+        async for message in ws:
+            recv = time.perf_counter()
+            yield _event(json.loads(message), recv)
+
+
+async def serve_replay(path, host="localhost", port=8765, speed=1.0):
+    """Local websocket stand-in: streams `path` to every client that connects"""
+    import websockets
+
+    async def handler(ws, *args):
+        async for event in file_replay(path, speed):
+            record = {k: v for k, v in event.items() if k not in ("kind", "recv", "ts")}
+            record['ts'] = event['ts'].isoformat()
+            await ws.send(json.dumps(record))
+
+    async with websockets.serve(handler, host, port):
+        print(f"📡 Streaming {path} on ws://{host}:{port} at {speed}x")
+        await asyncio.Future()
+
+
+class BarAggregator:
+    """Builds interval bars from ticks; a bar closes when the first tick of
+    the next interval arrives (or on flush())"""
+
+    def __init__(self, interval="5m"):
+        self.freq = pd.Timedelta(seconds=INTERVAL_SECONDS[interval])
+        self.bar = None
+        self.bar_end = None
+
+    def add_tick(self, ts, price, volume=0.0):
+        """Returns the bar that this tick closed, if any"""
+        closed = None
+        if self.bar is not None and ts >= self.bar_end:
+            closed, self.bar = self.bar, None
+        if self.bar is None:
+            start = ts.floor(self.freq)
+            self.bar_end = start + self.freq
+            self.bar = {"Datetime": start, "Open": price, "High": price, "Low": price,
+                        "Close": price, "Volume": volume}
+        else:
+            bar = self.bar
+            if price > bar['High']: bar['High'] = price
+            if price < bar['Low']: bar['Low'] = price
+            bar['Close'] = price
+            bar['Volume'] += volume
+        return closed
+
+    def flush(self):
+        closed, self.bar = self.bar, None
+        return closed
+
+
+class StreamingEngine:
+    """Drives a LiveBotV8 from a tick/bar stream instead of polling"""
+
+    def __init__(self, bot, interval=None):
+        self.bot = bot
+        self.aggregator = BarAggregator(interval or bot.feed_interval)
+        self.latency = Histogram("tick_to_decision_seconds", "Event arrival to decision")
+        self.events = 0
+        self.bars = 0
+
+    def warmup(self):
+        """Seed the indicators from the local bar store"""
+        history = self.bot.store.bars(self.bot.symbol, self.bot.feed_interval)
+        if not history.empty:
+            self.bot.feed.update_frame(history)
+
+    async def _evaluate(self, bar):
+        """Bar close: update indicators and look for an entry"""
+        bot = self.bot
+        self.bars += 1
+        bot.feed.update(bar['Datetime'], bar['Open'], bar['High'], bar['Low'],
+                        bar['Close'], bar['Volume'])
+        if bot.state['active_trade'] or bot.limits_hit(bar['Datetime'].date()):
+            return
+        signal = bot.check_signal(bot.feed.row())
+        if signal:
+            ai_score, reasoning = await bot.scorer.score_async(signal, bot.symbol)
+            bot.enter_trade(signal, ai_score, reasoning)
+
+    async def handle(self, event):
+        bot = self.bot
+        if event['kind'] == "bar":
+            bar = {k: event[k] for k in ("Open", "High", "Low", "Close", "Volume")}
+            bar['Datetime'] = event['ts']
+            if bot.state['active_trade']:
+                bot.manage_trade(bar['Close'], bar['High'], bar['Low'], bar['Open'])
+                bot.feed.update(bar['Datetime'], bar['Open'], bar['High'], bar['Low'],
+                                bar['Close'], bar['Volume'])
+                self.bars += 1
+            else:
+                await self._evaluate(bar)
+        else:
+            closed = self.aggregator.add_tick(event['ts'], event['price'], event['volume'])
+            if closed is not None:
+                await self._evaluate(closed)
+            if bot.state['active_trade']:
+                price = event['price']
+                bot.manage_trade(price, price, price)
+
+        self.events += 1
+        self.latency.observe(time.perf_counter() - event['recv'])
+
+    async def run(self, source):
+        async for event in source:
+            try:
+                await self.handle(event)
+            except Exception as e:
+                print(f"❌ Error handling {event['kind']} @ {event['ts']}: {e}")
+        closed = self.aggregator.flush()
+        if closed is not None:
+            await self._evaluate(closed)
+        return self.report()
+
+    def report(self):
+        return {"events": self.events, "bars": self.bars, "latency": self.latency.summary()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="V8.0 streaming pipeline")
+    parser.add_argument("mode", choices=["replay", "serve", "live"])
+    parser.add_argument("source", help="Tick/bar file (replay, serve) or ws:// URL (live)")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay speed (0 = max)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        asyncio.run(serve_replay(args.source, port=args.port, speed=args.speed or 1.0))
+        return
+
+    import live_paper_trade_v8 as v8
+    bot = v8.LiveBotV8()
+    engine = StreamingEngine(bot)
+    if args.mode == "live":
+        engine.warmup()
+        source = websocket_source(args.source)
+    else:
+        source = file_replay(args.source, args.speed)
+    started = time.perf_counter()
+    report = asyncio.run(engine.run(source))
+    print(f"🏁 Stream finished in {time.perf_counter() - started:.2f}s: {report}")
+    print(f"💰 Balance: ₹{bot.state['balance']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
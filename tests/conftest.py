@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark import synthetic_bars  # noqa: E402
+from indicators import StreamingIndicators  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def bars():
+    """Seeded 1m bars over a few sessions (benchmark.synthetic_bars)"""
+    return synthetic_bars(3000, seed=7)
+
+
+@pytest.fixture(scope="session")
+def indicator_frame(bars):
+    """Bars with the streaming indicators as the live bot saw them, one row per bar"""
+    ind = StreamingIndicators()
+    rows = []
+    for ts, o, h, l, c, v in bars[["Datetime", "Open", "High", "Low", "Close", "Volume"]].itertuples(index=False):
+        ind.update(ts, o, h, l, c, v)
+        rows.append(ind.row())
+    return pd.DataFrame(rows)
@@ -0,0 +1,99 @@
+"""AIScorer against ai_stub_server: cache, batching, and the late/failed-call paths"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("uvicorn")
+OpenAI = pytest.importorskip("openai").OpenAI
+
+from ai_scorer import UNAVAILABLE_SCORE, AIScorer  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _signal(confluence, entry=100.0):
+    return {"type": "BUY", "entry": entry, "confluence": confluence, "reasons": ["EMA", "MACD"],
+            "adx": 28.0, "bar_time": "2024-01-02 09:20:00"}
+
+
+def _stub_score(confluence):
+    return round(min(10.0, 5.5 + confluence * 0.6), 1)  # ai_stub_server._score
+
+
+@pytest.fixture(scope="module")
+def stub():
+    """Start ai_stub_server with the given env; returns its base URL"""
+    procs = []
+
+    def start(delay_ms=0, error_rate=0):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        env = dict(os.environ, STUB_DELAY_MS=str(delay_ms), STUB_ERROR_RATE=str(error_rate))
+        proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "ai_stub_server:app", "--port", str(port),
+                                 "--log-level", "warning"], cwd=ROOT, env=env)
+        procs.append(proc)
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                return f"http://127.0.0.1:{port}/v1"
+            except OSError:
+                time.sleep(0.1)
+        pytest.fail("ai_stub_server did not start")
+
+    yield start
+    for proc in procs:
+        proc.terminate()
+        proc.wait()
+
+
+def _scorer(base_url, **kwargs):
+    return AIScorer(OpenAI(base_url=base_url, api_key="stub", max_retries=0), **kwargs)
+
+
+def test_cache_hit_skips_api(stub):
+    scorer = _scorer(stub())
+    first = scorer.score(_signal(5))
+    again = scorer.score(_signal(5, entry=100.4))  # price drift inside the bar: same setup
+
+    assert first == (_stub_score(5), "stub")
+    assert again == first
+    assert scorer.counters["api_calls"] == 1
+    assert scorer.counters["cache_hits"] == 1
+
+
+def test_concurrent_setups_share_one_request(stub):
+    scorer = _scorer(stub())
+
+    async def score_all():
+        return await asyncio.gather(*(scorer.score_async(_signal(c), sym)
+                                      for c, sym in [(4, "^NSEI"), (6, "^NSEBANK"), (8, "FIN")]))
+
+    results = asyncio.run(score_all())
+    assert [score for score, _ in results] == [_stub_score(4), _stub_score(6), _stub_score(8)]
+    assert scorer.counters["api_calls"] == 1
+
+
+def test_late_response_is_rejected(stub):
+    scorer = _scorer(stub(delay_ms=1500), deadline=0.3)
+    score, reasoning = scorer.score(_signal(9))
+
+    assert score == UNAVAILABLE_SCORE
+    assert "Unavailable" in reasoning
+    assert scorer.counters["timeouts"] == 1
+    assert scorer.metrics()["cache_size"] == 0  # a fallback is never cached
+
+
+def test_api_error_is_rejected(stub):
+    scorer = _scorer(stub(error_rate=1))
+    results = scorer.score_batch([(_signal(9), "^NSEI"), (_signal(8), "^NSEBANK")])
+
+    assert [score for score, _ in results] == [UNAVAILABLE_SCORE, UNAVAILABLE_SCORE]
+    assert scorer.counters["api_errors"] == 1
+    assert scorer.counters["fallbacks"] == 2
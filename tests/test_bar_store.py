@@ -0,0 +1,64 @@
+"""BarStore.refresh: delta fetch, merge of the revised forming bar, and the history fallback"""
+
+import pandas as pd
+import pytest
+
+from bar_store import BarStore, FileSource
+
+
+class DeltaLessSource(FileSource):
+    """A source whose delta fetch comes back empty, like Yahoo for a too-old start"""
+
+    def __init__(self, root, window=None):
+        super().__init__(root)
+        self.starts = []
+        self._window = window
+
+    def window(self, interval):
+        return self._window
+
+    def fetch(self, symbol, interval, start=None):
+        self.starts.append(start)
+        return None if start is not None else super().fetch(symbol, interval)
+
+
+def _publish(source, bars):
+    """Write the fixture file the source reads and drop its cached copy"""
+    bars.to_csv(f"{source.root}/NSEI_1m.csv", index=False)
+    source._cache.clear()
+
+
+@pytest.fixture
+def grown(bars):
+    """First 200 bars, then 260 with bar 199 (the forming bar) revised"""
+    later = bars.iloc[:260].copy()
+    later.loc[199, "Close"] += 5.0
+    return bars.iloc[:200].copy(), later
+
+
+def _check_merge(store, source, grown, tmp_path):
+    first, later = grown
+    _publish(source, first)
+    assert len(store.refresh("^NSEI", "1m")) == 200
+
+    _publish(source, later)
+    changed = store.refresh("^NSEI", "1m")
+    assert changed["Datetime"].iloc[0] == later["Datetime"].iloc[199]
+    assert len(changed) == 61
+    for frame in (store.bars("^NSEI", "1m"), BarStore(str(tmp_path / "store"), source=source).bars("^NSEI", "1m")):
+        pd.testing.assert_frame_equal(frame[["Close", "Volume"]], later[["Close", "Volume"]], check_dtype=False)
+
+
+def test_delta_merges_forming_bar(grown, tmp_path):
+    source = FileSource(str(tmp_path))
+    _check_merge(BarStore(str(tmp_path / "store"), source=source), source, grown, tmp_path)
+
+
+@pytest.mark.parametrize("window", [None, pd.Timedelta("1D")], ids=["empty-delta", "past-window"])
+def test_falls_back_to_history(grown, tmp_path, window):
+    source = DeltaLessSource(str(tmp_path), window=window)
+    _check_merge(BarStore(str(tmp_path / "store"), source=source), source, grown, tmp_path)
+
+    last = grown[0]["Datetime"].iloc[-1]
+    # An empty delta is retried as a history fetch; a store past the window skips the delta
+    assert source.starts == ([None, last, None] if window is None else [None, None])
@@ -0,0 +1,20 @@
+"""StreamingIndicators against the pandas_ta stack it replaces (compute_indicators)"""
+
+import numpy as np
+import pytest
+
+from indicators import COLUMNS
+
+pytest.importorskip("pandas_ta")
+
+import live_paper_trade_v8 as v8  # noqa: E402
+
+WARMUP = 300  # EMA200 and the Wilder averages settle well before this
+
+
+def test_streaming_matches_pandas_ta(bars, indicator_frame):
+    expected = v8.compute_indicators(bars.copy())
+    for column in COLUMNS:
+        got = indicator_frame[column].to_numpy(dtype=np.float64)[WARMUP:]
+        want = expected[column].to_numpy(dtype=np.float64)[WARMUP:]
+        np.testing.assert_allclose(got, want, rtol=1e-6, atol=1e-6, equal_nan=True, err_msg=column)
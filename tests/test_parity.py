@@ -0,0 +1,89 @@
+"""The backtest and the signal table must decide exactly like the live bot"""
+
+import os
+
+import numpy as np
+import pytest
+
+import backtest_v8 as bt
+import live_paper_trade_v8 as v8
+import signal_rules
+import strategies
+from bar_store import BarStore, FileSource
+
+LEAN = strategies.BUILTIN["v8"].replace(
+    name="lean", factors=["EMA", "Supertrend", "ADX", "MACD", "Volume"], min_confluence=3,
+    min_adx=15, min_ai_score=7.0, sizing=[[9.0, 6.0], [7.0, 3.0]], losing_streak=(1, 1.0),
+    winning_streak=(1, 1.0, 5.0))
+
+
+def _live_trades(frame, strategy, workdir):
+    """Feed the indicator rows through LiveBotV8 one poll per bar"""
+    bot = v8.LiveBotV8(state_file=os.path.join(workdir, "state.json"),
+                       trades_file=os.path.join(workdir, "trades.csv"), client=None,
+                       store=BarStore(os.path.join(workdir, "market_data"), source=FileSource(workdir)))
+    bot.strategy = strategy  # process() never reloads it
+    for row in frame.to_dict("records"):
+        bot.now = lambda ts=row["Datetime"]: ts
+        if bot.limits_hit():
+            continue
+        bot.process(row)
+    bot.ledger.refresh()
+    return bot.ledger.since(), bot.state["balance"]
+
+
+@pytest.mark.parametrize("strategy", [strategies.BUILTIN["v8"], LEAN], ids=["v8", "lean"])
+def test_backtest_matches_live_bot(indicator_frame, strategy, tmp_path):
+    result = bt.run_backtest(indicator_frame, strategy=strategy)
+    expected = result["trades"]  # closed trades, like the ledger
+    live, balance = _live_trades(indicator_frame, strategy, str(tmp_path))
+
+    assert len(expected) > 0
+    assert len(live) == len(expected)
+    for row, trade in zip(live, expected.itertuples()):
+        assert row["type"] == trade.type
+        assert row["qty"] == trade.qty
+        assert row["reason"] == trade.reason
+        assert row["entry_price"] == pytest.approx(trade.entry)
+        assert row["exit_price"] == pytest.approx(trade.exit_price)
+        assert row["total_pnl"] == pytest.approx(trade.total_pnl)
+    assert balance == pytest.approx(result["summary"]["final_balance"], abs=0.01)
+
+
+@pytest.mark.parametrize("factors", [None, ("EMA", "Supertrend", "ADX", "MACD", "Volume")])
+def test_evaluate_row_matches_evaluate(factors):
+    """Random bars around every threshold, with NaNs: vector and row paths agree"""
+    rng = np.random.default_rng(1)
+    n = 20_000
+    close = 100.0 + rng.normal(0, 1, n)
+    arrays = {
+        "Close": close,
+        "ATR": rng.choice([0.0, 0.5, 1.0], n),
+        "EMA20": close + rng.normal(0, 1, n),
+        "EMA50": close + rng.normal(0, 1, n),
+        "EMA200": close + rng.normal(0, 1, n),
+        "Supertrend_Direction": rng.choice([-1.0, 1.0], n),
+        "ADX": rng.choice([20.0, 25.0, 30.0], n),
+        "MACD": rng.normal(0, 1, n),
+        "MACD_SIGNAL": rng.normal(0, 1, n),
+        "Volume_Ratio": rng.choice([1.0, 1.3, 2.0], n),
+        "VWAP": close + rng.normal(0, 1, n),
+        "BB_LOWER": close - rng.uniform(0, 2, n),
+        "BB_MID": close + rng.normal(0, 1, n),
+        "BB_UPPER": close + rng.uniform(0, 2, n),
+        "Stoch_RSI": rng.uniform(0, 100, n),
+        "Trend_15m": rng.choice([-1.0, 1.0, np.nan], n),
+        "Trend_60m": rng.choice([-1.0, 1.0, np.nan], n),
+    }
+    for name in signal_rules.FIELDS:
+        arrays[name][rng.random(n) < 0.02] = np.nan
+    rules = signal_rules.compile_rules(25.0, 1.3, factors)
+
+    direction, confluence, reasons = signal_rules.evaluate(arrays, rules, 4)
+    matrix = np.column_stack([arrays[name] for name in signal_rules.FIELDS])
+    rows = [signal_rules.evaluate_row(x, rules, 4) for x in matrix]
+
+    assert direction.any()
+    assert np.array_equal(direction, [r[0] for r in rows])
+    assert np.array_equal(confluence, [r[1] for r in rows])
+    assert np.array_equal(reasons, [r[2] for r in rows])
@@ -0,0 +1,44 @@
+"""Ledger analytics when several bots, each with a slice of capital, share one ledger"""
+
+import pytest
+
+from trade_ledger import TradeLedger
+
+
+def _trade(symbol, exit_time, pnl, balance):
+    return {"symbol": symbol, "type": "BUY", "exit_time": exit_time, "pnl": pnl, "total_pnl": pnl,
+            "balance": balance, "strategy": "v8", "reason": "TP2" if pnl > 0 else "SL"}
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    """Two bots with 50k each (PortfolioRunner: capital / len(specs)) writing to one file"""
+    path = str(tmp_path / "trades.db")
+    nifty, bank = TradeLedger(path), TradeLedger(path)
+    nifty.record(_trade("^NSEI", "2024-01-02 10:00:00", 1000.0, 51000.0))
+    bank.record(_trade("^NSEBANK", "2024-01-02 11:00:00", -500.0, 49500.0))
+    nifty.record(_trade("^NSEI", "2024-01-03 10:00:00", -2000.0, 49000.0))
+    bank.record(_trade("^NSEBANK", "2024-01-03 11:00:00", 300.0, 49800.0))
+    reader = TradeLedger(path)
+    yield reader
+    for each in (nifty, bank, reader):
+        each.close()
+
+
+def test_equity_combines_bots(ledger):
+    assert ledger.equity()["balance"] == [101000.0, 100500.0, 98500.0, 98800.0]
+    assert ledger.equity("^NSEBANK")["balance"] == [49500.0, 49800.0]
+
+
+def test_drawdown_over_portfolio_equity(ledger):
+    dd = ledger.drawdown()
+    assert dd["peak_balance"] == 101000.0
+    assert dd["trough_balance"] == 98500.0
+    assert dd["max_drawdown_pct"] == pytest.approx(-2500 / 101000 * 100, abs=1e-4)
+
+
+def test_daily_closing_equity(ledger):
+    days = ledger.daily()
+    assert [d["date"] for d in days] == ["2024-01-02", "2024-01-03"]
+    assert [d["pnl"] for d in days] == [500.0, -1700.0]
+    assert [d["balance"] for d in days] == [100500.0, 98800.0]
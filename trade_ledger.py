@@ -0,0 +1,287 @@
+"""
+V8.0 TRADE LEDGER
+Closed trades in an indexed SQLite table (WAL mode), with the full trade
+record: entry/exit prices, size, initial risk, R-multiple, AI score and the
+signal factors. The bot appends one row per closed trade; api_server keeps
+an incrementally-extended copy for /trades and answers the analytics
+queries (equity, drawdown, win rate by reason / AI-score bucket, daily PnL)
+with SQL aggregates and NumPy, cached until the next trade is recorded.
+"""
+
+import bisect
+import csv
+import os
+import sqlite3
+import threading
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT,
+    type TEXT NOT NULL,
+    entry_time TEXT,
+    exit_time TEXT NOT NULL,
+    entry_price REAL,
+    exit_price REAL,
+    qty INTEGER,
+    sl REAL,
+    tp1 REAL,
+    tp2 REAL,
+    risk REAL,
+    tp1_hit INTEGER,
+    partial_pnl REAL,
+    pnl REAL NOT NULL,
+    total_pnl REAL,
+    r_multiple REAL,
+    ai_score REAL,
+    confluence INTEGER,
+    signals TEXT,
+    reason TEXT,
+    balance REAL,
+    strategy TEXT
+);
+CREATE INDEX IF NOT EXISTS trades_exit_time ON trades (exit_time);
+CREATE INDEX IF NOT EXISTS trades_reason ON trades (reason);
+CREATE INDEX IF NOT EXISTS trades_ai_score ON trades (ai_score);
+CREATE INDEX IF NOT EXISTS trades_symbol ON trades (symbol, exit_time);
+"""
+
+COLUMNS = ["id", "symbol", "type", "entry_time", "exit_time", "entry_price", "exit_price", "qty",
+           "sl", "tp1", "tp2", "risk", "tp1_hit", "partial_pnl", "pnl", "total_pnl", "r_multiple",
+           "ai_score", "confluence", "signals", "reason", "balance", "strategy"]
+
+# Win-rate groupings: SQL expression per `by` value
+GROUPS = {
+    "reason": "reason",
+    "ai_score": "CAST(ai_score AS INTEGER)",
+    "symbol": "symbol",
+    "type": "type",
+    "strategy": "strategy",
+}
+
+
+def ledger_path(trades_file):
+    """live_trades.csv -> live_trades.db"""
+    return os.path.splitext(trades_file)[0] + ".db"
+
+
+def trade_record(symbol, trade, exit_price, exit_data):
+    """Ledger row for a closed active_trade (exit_data is the live_trades.csv row)"""
+    partial = trade.get('partial_pnl', 0.0)
+    total = partial + exit_data['pnl']
+    risk = trade.get('risk')
+    qty = trade.get('original_qty', trade.get('qty'))
+    return {
+        **exit_data,
+        "symbol": symbol,
+        "entry_time": trade.get('entry_time'),
+        "entry_price": trade.get('entry'),
+        "exit_price": exit_price,
+        "qty": qty,
+        "sl": trade.get('initial_sl', trade.get('sl')),
+        "tp1": trade.get('tp1'),
+        "tp2": trade.get('tp2'),
+        "risk": risk,
+        "tp1_hit": int(bool(trade.get('tp1_hit'))),
+        "partial_pnl": partial,
+        "total_pnl": total,
+        "r_multiple": total / (risk * qty) if risk and qty else None,
+        "ai_score": trade.get('ai_score'),
+        "confluence": trade.get('confluence'),
+        "signals": ",".join(trade.get('signals', [])) or None,
+        "strategy": trade.get('strategy'),
+    }
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.executescript(SCHEMA)
+    if "strategy" not in {row[1] for row in conn.execute("PRAGMA table_info(trades)")}:
+        conn.execute("ALTER TABLE trades ADD COLUMN strategy TEXT")  # ledgers from before strategies.py
+    return conn
+
+
+def _number(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return text or None
+
+
+def _equity(conn, symbol=None):
+    """(exit times, equity) in recording order. Several bots may share a ledger, each
+    with its own slice of capital, so equity is the bots' combined starting balance
+    (their first row's balance less its PnL) plus the running total of trade PnL."""
+    where, args = ("WHERE symbol = ?", (symbol,)) if symbol else ("", ())
+    start = conn.execute(f"""
+        SELECT COALESCE(SUM(balance - COALESCE(total_pnl, pnl)), 0) FROM trades
+        WHERE id IN (SELECT MIN(id) FROM trades {where} GROUP BY symbol, strategy)""", args).fetchone()[0]
+    rows = conn.execute(f"SELECT exit_time, COALESCE(total_pnl, pnl) FROM trades {where} ORDER BY id",
+                        args).fetchall()
+    pnl = np.array([r[1] for r in rows], dtype=np.float64)
+    return [r[0] for r in rows], start + np.cumsum(pnl)
+
+
+class TradeLedger:
+    """Writer (record) and reader (rows / analytics) over one ledger file"""
+
+    def __init__(self, path, import_csv=None):
+        self.path = path
+        self.rows = []
+        self.times = []
+        self._conn = None
+        self._version = None
+        self._cache = {}
+        self._lock = threading.Lock()
+        if import_csv:
+            self._import(import_csv)
+
+    def _db(self, create=True):
+        if self._conn is None and (create or os.path.exists(self.path)):
+            self._conn = _connect(self.path)
+        return self._conn
+
+    def _import(self, csv_path):
+        """One-off import of a legacy live_trades.csv into an empty ledger"""
+        conn = self._db()
+        if not os.path.exists(csv_path) or conn.execute("SELECT 1 FROM trades LIMIT 1").fetchone():
+            return
+        with open(csv_path, newline='') as f:
+            legacy = [{k: _number(v) if k in ("pnl", "balance") else v for k, v in row.items()}
+                      for row in csv.DictReader(f)]
+        for row in legacy:
+            row.setdefault("total_pnl", row.get("pnl"))
+        self.record_many(legacy)
+        print(f"📥 Imported {len(legacy)} trades from {csv_path} into {self.path}")
+
+    # Writer
+
+    def record_many(self, records):
+        columns = COLUMNS[1:]
+        values = [tuple(r.get(c) for c in columns) for r in records]
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN")
+            conn.executemany(f"INSERT INTO trades ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                             values)
+            conn.execute("COMMIT")
+            self._version = None  # data_version does not move for this connection's own commits
+
+    def record(self, trade):
+        """Append one closed trade"""
+        self.record_many([trade])
+
+    # Reader
+
+    def refresh(self):
+        """Pull trades recorded since the last call; returns a version (None if no ledger yet)"""
+        with self._lock:
+            return self._refresh()
+
+    def read(self, cursor=None):
+        """refresh() and since(cursor) as one step: (version, rows, next cursor),
+        all of the same version even while other threads refresh"""
+        with self._lock:
+            version = self._refresh()
+            return version, self.since(cursor), len(self.rows)
+
+    def _refresh(self):
+        conn = self._db(create=False)
+        if conn is None:
+            return None
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version and self.rows:
+            return (version, len(self.rows))
+        last_id = self.rows[-1]['id'] if self.rows else 0
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM trades WHERE id > ? ORDER BY id", (last_id,))
+        for values in cursor:
+            row = dict(zip(COLUMNS, values))
+            self.rows.append(row)
+            self.times.append(row['exit_time'] or "")
+        if version != self._version:
+            self._cache = {}
+        self._version = version
+        return (version, len(self.rows))
+
+    def since(self, cursor=None):
+        """Rows after `cursor`: a row offset (int) or a timestamp compared against exit_time"""
+        if cursor is None or cursor == "":
+            return self.rows[:]
+        try:
+            return self.rows[max(0, int(cursor)):]
+        except ValueError:
+            return self.rows[bisect.bisect_right(self.times, str(cursor).replace("T", " ")):]
+
+    def _cached(self, key, compute):
+        version = self.refresh()
+        if version is None:
+            return None
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute(self._conn)
+            return self._cache[key]
+
+    def equity(self, symbol=None):
+        """Equity after each trade, running peak and drawdown (percent of peak)"""
+        def compute(conn):
+            time, balance = _equity(conn, symbol)
+            peak = np.maximum.accumulate(balance) if len(balance) else balance
+            drawdown = np.where(peak > 0, (balance - peak) / peak * 100, 0.0)
+            return {"time": time, "balance": balance.tolist(),
+                    "peak": peak.tolist(), "drawdown_pct": np.round(drawdown, 4).tolist()}
+        return self._cached(("equity", symbol), compute)
+
+    def drawdown(self, symbol=None):
+        """Max / current drawdown and when the max drawdown bottomed"""
+        curve = self.equity(symbol)
+        if not curve or not curve['balance']:
+            return {"max_drawdown_pct": 0.0, "current_drawdown_pct": 0.0, "trades": 0}
+        dd = np.asarray(curve['drawdown_pct'])
+        trough = int(np.argmin(dd))
+        peak_idx = int(np.argmax(np.asarray(curve['balance'][:trough + 1])))
+        return {
+            "max_drawdown_pct": round(float(dd[trough]), 4),
+            "current_drawdown_pct": round(float(dd[-1]), 4),
+            "peak_time": curve['time'][peak_idx],
+            "trough_time": curve['time'][trough],
+            "peak_balance": curve['balance'][peak_idx],
+            "trough_balance": curve['balance'][trough],
+            "trades": len(dd),
+        }
+
+    def win_rate(self, by="reason"):
+        """Trades, wins, win rate, PnL and average R per group"""
+        expr = GROUPS[by]
+
+        def compute(conn):
+            rows = conn.execute(f"""
+                SELECT {expr} AS bucket, COUNT(*), SUM(COALESCE(total_pnl, pnl) > 0),
+                       SUM(COALESCE(total_pnl, pnl)), AVG(r_multiple)
+                FROM trades GROUP BY bucket ORDER BY bucket""").fetchall()
+            return [{"bucket": b, "trades": n, "wins": w, "win_rate": round(w / n * 100, 2),
+                     "pnl": round(p, 2), "avg_r": round(r, 3) if r is not None else None}
+                    for b, n, w, p, r in rows]
+        return self._cached(("win_rate", by), compute)
+
+    def daily(self):
+        """PnL, trade count and wins per exit date, with the closing equity"""
+        def compute(conn):
+            rows = conn.execute("""
+                SELECT substr(exit_time, 1, 10) AS day, COUNT(*), SUM(COALESCE(total_pnl, pnl) > 0),
+                       SUM(COALESCE(total_pnl, pnl))
+                FROM trades GROUP BY day ORDER BY day""").fetchall()
+            time, balance = _equity(conn)
+            closing = dict(zip((t[:10] for t in time), balance.tolist()))  # last trade of the day wins
+            return [{"date": d, "trades": n, "wins": w, "pnl": round(p, 2), "balance": closing.get(d)}
+                    for d, n, w, p in rows]
+        return self._cached(("daily",), compute)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,98 @@
+"""
+V8.0 INCREMENTAL TRADE LOG READER
+Follows live_trades.csv like `tail -f`: only bytes appended since the last
+read are parsed, so polling cost does not grow with the length of the log.
+"""
+
+import bisect
+import csv
+import io
+import os
+import threading
+
+
+def _value(text):
+    if text == "":
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class TradeLog:
+    """Parsed rows of an append-only CSV, refreshed from the last byte offset"""
+
+    def __init__(self, path, time_field="exit_time"):
+        self.path = path
+        self.time_field = time_field
+        self.rows = []
+        self.times = []
+        self._header = None
+        self._offset = 0
+        self._stat = None
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self.rows, self.times = [], []
+        self._header, self._offset = None, 0
+
+    def refresh(self):
+        """Parse newly appended lines; returns the (size, mtime) version of the file"""
+        with self._lock:
+            return self._refresh()
+
+    def read(self, cursor=None):
+        """refresh() and since(cursor) as one step: (version, rows, next cursor),
+        all of the same version even while other threads refresh"""
+        with self._lock:
+            version = self._refresh()
+            return version, self.since(cursor), len(self.rows)
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            self._stat = None
+            return None
+        version = (stat.st_size, stat.st_mtime_ns)
+        if version == self._stat:
+            return version
+        if stat.st_size < self._offset:
+            self._reset()  # truncated or rewritten
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1  # leave a half-written last line for next time
+        if end:
+            self._parse(chunk[:end].decode())
+            self._offset += end
+        self._stat = version
+        return version
+
+    def _parse(self, text):
+        reader = csv.reader(io.StringIO(text))
+        if self._header is None:
+            self._header = next(reader, None)
+        for values in reader:
+            if not values:
+                continue
+            row = {k: _value(v) for k, v in zip(self._header, values)}
+            self.rows.append(row)
+            self.times.append(str(row.get(self.time_field) or ""))
+
+    def since(self, cursor=None):
+        """Rows after `cursor`: a row offset (int) or a timestamp compared against time_field"""
+        if cursor is None or cursor == "":
+            return self.rows[:]
+        try:
+            return self.rows[max(0, int(cursor)):]
+        except ValueError:
+            start = bisect.bisect_right(self.times, str(cursor).replace("T", " "))
+            return self.rows[start:]